@@ -4,6 +4,7 @@ Vercel serverless function for repository analysis.
 
 import json
 import os
+import tempfile
 import traceback
 import re
 
@@ -27,7 +28,11 @@ def handler(request):
         
         # Initialize agents
         github_token = os.getenv('GITHUB_TOKEN')
-        agent = GitHubRepoAgent(github_token=github_token)
+        # Only the temp directory is writable in serverless functions; with a
+        # token, the API data comes from one GraphQL query per repository
+        agent = GitHubRepoAgent(github_token=github_token,
+                                cache_dir=os.path.join(tempfile.gettempdir(), 'repo_cache'),
+                                graphql=bool(github_token))
         ai_enhancer = AIEnhancer()
         
         # Handle CORS
@@ -112,9 +117,9 @@ def handler(request):
             
             print(f"Analyzing repository: {repo_url}")
             
-            # Perform analysis (without cloning for Vercel - use GitHub API only)
+            # Perform analysis (Vercel has no git: stream the repository archive instead of cloning)
             try:
-                analysis = agent.analyze_repo(repo_url, clone=False)
+                analysis = agent.analyze_repo(repo_url, clone_strategy='tarball', code_quality=True)
             except ValueError as e:
                 # Handle invalid repository format
                 return {
@@ -180,6 +185,10 @@ def handler(request):
                 print(f"Error generating AI insights: {e}")
                 analysis_dict['ai_insights'] = {}
             
+            # Add code quality analysis (computed while the archive streamed)
+            if analysis.code_quality:
+                analysis_dict['code_quality'] = analysis.code_quality
+            
             return {
                 'statusCode': 200,
                 'headers': headers,
@@ -6,9 +6,13 @@ Command-line interface for GitHub Repository Agent.
 import argparse
 import json
 import sys
+from collections import Counter
+from datetime import datetime
 from pathlib import Path
 
 from github_repo_agent.agent import GitHubRepoAgent
+from github_repo_agent.repo_cache import RepoCache
+from github_repo_agent.scanner import RepoScanner
 
 
 def print_analysis(analysis):
@@ -19,6 +23,11 @@ def print_analysis(analysis):
     
     print(f"\n🔗 URL: {analysis.repo_url}")
     print(f"⏰ Analyzed at: {analysis.analyzed_at}")
+    if analysis.clone_info.get('head'):
+        sources = {'hit': 'cache hit', 'refresh': 'refreshed cache', 'clone': 'fresh clone'}
+        shared = f", objects shared with {analysis.clone_info['reference']}" if 'reference' in analysis.clone_info else ""
+        print(f"📦 Commit: {analysis.clone_info['head'][:12]} "
+              f"({sources.get(analysis.clone_info['source'], analysis.clone_info['source'])}{shared})")
     
     # Languages
     if analysis.languages:
@@ -51,6 +60,21 @@ def print_analysis(analysis):
         print(f"   • Test Files: {metrics.get('test_files', 0)}")
         print(f"   • Total Lines: {metrics.get('total_lines', 0):,}")
         print(f"   • Avg File Size: {metrics.get('avg_file_size', 0):.1f} lines")
+        if metrics.get('skipped_files'):
+            print(f"   • Not Line-Counted (binary/oversized): {len(metrics['skipped_files'])}")
+    
+    # Code quality
+    if analysis.code_quality:
+        print("\n🧪 Code Quality:")
+        quality = analysis.code_quality
+        print(f"   • Security Concerns: {len(quality.get('security_concerns', []))}")
+        print(f"   • Performance Opportunities: {len(quality.get('performance_opportunities', []))}")
+        print(f"   • Code Smells: {len(quality.get('code_smells', []))}")
+        if quality.get('skipped_files'):
+            reasons = Counter(skipped['reason'] for skipped in quality['skipped_files'])
+            print(f"   • Files Skipped: {', '.join(f'{count} {reason}' for reason, count in sorted(reasons.items()))}")
+        for suggestion in quality.get('suggestions', []):
+            print(f"   {suggestion}")
     
     # Recommendations
     if analysis.recommendations:
@@ -89,6 +113,18 @@ def print_analysis(analysis):
     print("\n" + "="*70)
 
 
+def print_cache(cache):
+    """Pretty print the cached clones, least recently used first."""
+    entries = cache.entries()
+    limit = f" of {cache.max_bytes / 1048576:.1f} MiB" if cache.max_bytes is not None else ""
+    print(f"\n📦 Repository cache: {cache.root}")
+    print(f"   {len(entries)} clone(s), {sum(meta.get('size', 0) for meta in entries) / 1048576:.1f} MiB{limit}")
+    for meta in entries:
+        accessed = datetime.fromtimestamp(meta.get('accessed', 0)).strftime('%Y-%m-%d %H:%M')
+        print(f"   • {meta.get('owner')}/{meta['path'].name}: {meta.get('size', 0) / 1048576:.1f} MiB, "
+              f"{meta.get('strategy', 'full')}, last used {accessed}, commit {(meta.get('head') or '')[:12]}")
+
+
 def main():
     """Main CLI entry point."""
     parser = argparse.ArgumentParser(
@@ -110,6 +146,10 @@ Examples:
   
   # Get improvement plan
   python cli.py improve owner/repo
+  
+  # Inspect the repository cache and evict clones unused for a week
+  python cli.py cache
+  python cli.py cache prune --older-than 604800
         """
     )
     
@@ -121,6 +161,26 @@ Examples:
     analyze_parser.add_argument('--no-clone', action='store_true', help='Skip cloning repository')
     analyze_parser.add_argument('--export', help='Export analysis to JSON file')
     analyze_parser.add_argument('--token', help='GitHub personal access token')
+    analyze_parser.add_argument('--backend', choices=GitHubRepoAgent.BACKENDS, default='worktree',
+                                help='Read files from a checked-out clone (worktree) or from git objects of a bare clone (git)')
+    analyze_parser.add_argument('--clone-strategy', choices=list(GitHubRepoAgent.CLONE_STRATEGIES), default='shallow',
+                                help='shallow (--depth 1, the default), full, blobless (--filter=blob:none), '
+                                     'blob-limit (--filter=blob:limit) or tarball (stream the archive, no clone)')
+    analyze_parser.add_argument('--blob-limit', type=int,
+                                help='Largest blob in bytes fetched by --clone-strategy blob-limit (default: --max-file-size)')
+    analyze_parser.add_argument('--max-age', type=float, default=RepoCache.DEFAULT_MAX_AGE,
+                                help='Seconds a cached clone is used before fetching new commits (default: 3600)')
+    analyze_parser.add_argument('--cache-size', type=int, default=RepoCache.DEFAULT_MAX_BYTES,
+                                help='Disk space in bytes cached clones may use before the least recently used are evicted (default: 10 GiB)')
+    analyze_parser.add_argument('--fork-mirrors', action='store_true',
+                                help='Clone forks borrowing objects from one shared mirror of their upstream')
+    analyze_parser.add_argument('--scan-workers', type=int, default=RepoScanner.DEFAULT_WORKERS,
+                                help='Number of threads used to walk the cloned repository')
+    analyze_parser.add_argument('--max-file-size', type=int, default=RepoScanner.DEFAULT_MAX_FILE_SIZE,
+                                help='Size in bytes above which files are not read (default: 1 MiB)')
+    analyze_parser.add_argument('--code-quality', action='store_true', help='Also scan file contents for code quality issues')
+    analyze_parser.add_argument('--quality-workers', type=int, default=1,
+                                help='Number of worker processes for the code quality scan')
     
     # Recommend command
     recommend_parser = subparsers.add_parser('recommend', help='Get recommendations for a repository')
@@ -133,6 +193,14 @@ Examples:
     improve_parser.add_argument('repo', help='Repository URL or owner/repo format')
     improve_parser.add_argument('--token', help='GitHub personal access token')
     
+    # Cache command
+    cache_parser = subparsers.add_parser('cache', help='Inspect or prune the repository cache')
+    cache_parser.add_argument('action', nargs='?', choices=['list', 'prune'], default='list',
+                              help='List cached clones (default) or evict some of them')
+    cache_parser.add_argument('--max-bytes', type=int, help='Evict least recently used clones until the cache fits')
+    cache_parser.add_argument('--older-than', type=float, help='Evict clones not used for this many seconds')
+    cache_parser.add_argument('--all', action='store_true', help='Evict every cached clone')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -140,11 +208,21 @@ Examples:
         sys.exit(1)
     
     # Initialize agent
-    agent = GitHubRepoAgent(github_token=args.token if hasattr(args, 'token') and args.token else None)
+    agent = GitHubRepoAgent(
+        github_token=args.token if hasattr(args, 'token') and args.token else None,
+        scan_workers=getattr(args, 'scan_workers', RepoScanner.DEFAULT_WORKERS),
+        max_file_size=getattr(args, 'max_file_size', RepoScanner.DEFAULT_MAX_FILE_SIZE),
+        quality_workers=getattr(args, 'quality_workers', 1),
+        max_age=getattr(args, 'max_age', RepoCache.DEFAULT_MAX_AGE),
+        cache_size=getattr(args, 'cache_size', RepoCache.DEFAULT_MAX_BYTES),
+        fork_mirrors=getattr(args, 'fork_mirrors', False)
+    )
     
     try:
         if args.command == 'analyze':
-            analysis = agent.analyze_repo(args.repo, clone=not args.no_clone)
+            analysis = agent.analyze_repo(args.repo, clone=not args.no_clone, backend=args.backend,
+                                          code_quality=args.code_quality, clone_strategy=args.clone_strategy,
+                                          blob_limit=args.blob_limit)
             print_analysis(analysis)
             
             if hasattr(args, 'export') and args.export:
@@ -197,6 +275,18 @@ Examples:
                 print("\n🟢 Low Priority:")
                 for rec in improvements['low_priority']:
                     print(f"   • {rec.get('title')}")
+        
+        elif args.command == 'cache':
+            cache = agent.repo_cache
+            if args.action == 'prune':
+                if not (args.all or args.max_bytes is not None or args.older_than is not None):
+                    print("Nothing to prune: pass --max-bytes, --older-than or --all")
+                    sys.exit(1)
+                evicted = cache.prune(max_bytes=0 if args.all else args.max_bytes, older_than=args.older_than)
+                freed = sum(meta.get('size', 0) for meta in evicted)
+                print(f"🧹 Evicted {len(evicted)} cached repositor{'y' if len(evicted) == 1 else 'ies'} "
+                      f"({freed / 1048576:.1f} MiB)")
+            print_cache(cache)
     
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
@@ -7,16 +7,27 @@ __version__ = "0.1.0"
 
 from .agent import GitHubRepoAgent, RepoAnalysis
 from .github_client import GitHubClient
+from .async_client import AsyncGitHubClient
 from .code_analyzer import CodeAnalyzer
 from .recommender import Recommender
 from .ai_enhancer import AIEnhancer
+from .scanner import RepoScanner, FileManifest
+from .blob_cache import BlobCache
+from .repo_cache import RepoCache
+from .response_cache import ResponseCache
 
 __all__ = [
     'GitHubRepoAgent',
     'RepoAnalysis',
     'GitHubClient',
+    'AsyncGitHubClient',
     'CodeAnalyzer',
     'Recommender',
     'AIEnhancer',
+    'RepoScanner',
+    'FileManifest',
+    'BlobCache',
+    'RepoCache',
+    'ResponseCache',
 ]
 
@@ -3,17 +3,31 @@ Main agent class for GitHub repository analysis and recommendations.
 """
 
 import os
+import asyncio
 import json
+import sqlite3
 import subprocess
+import tarfile
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, asdict
+from typing import BinaryIO, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field, asdict
 from datetime import datetime
 
 from .github_client import GitHubClient
+from .async_client import AsyncGitHubClient
 from .code_analyzer import CodeAnalyzer
 from .recommender import Recommender
 from .ai_enhancer import AIEnhancer
+from .scanner import FileEntry, FileManifest, RepoScanner
+from .file_index import FileIndex
+from .blob_cache import BlobCache
+from .repo_cache import RepoCache, run_git_async
+from .response_cache import ResponseCache
+from .git_objects import GitObjectError, fetch_blobs, missing_blobs
 
 
 @dataclass
@@ -28,6 +42,10 @@ class RepoAnalysis:
     metrics: Dict[str, Any]
     recommendations: List[Dict[str, Any]]
     analyzed_at: str
+    code_quality: Dict[str, Any] = field(default_factory=dict)
+    locked_dependencies: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    subproject_dependencies: Dict[str, Dict[str, List[str]]] = field(default_factory=dict)
+    clone_info: Dict[str, Any] = field(default_factory=dict)
 
 
 class GitHubRepoAgent:
@@ -35,81 +53,443 @@ class GitHubRepoAgent:
     Main agent that analyzes GitHub repositories and provides recommendations.
     """
     
-    def __init__(self, github_token: Optional[str] = None, cache_dir: str = ".repo_cache"):
+    def __init__(self, github_token: Optional[str] = None, cache_dir: str = ".repo_cache",
+                 scan_workers: int = RepoScanner.DEFAULT_WORKERS, quality_workers: int = 1,
+                 max_file_size: int = RepoScanner.DEFAULT_MAX_FILE_SIZE,
+                 blob_cache_size: int = BlobCache.DEFAULT_MAX_BYTES,
+                 max_age: Optional[float] = RepoCache.DEFAULT_MAX_AGE,
+                 cache_size: Optional[int] = RepoCache.DEFAULT_MAX_BYTES, fork_mirrors: bool = False,
+                 api_cache_ttl: Optional[float] = ResponseCache.DEFAULT_TTL, graphql: Optional[bool] = None):
         """
         Initialize the GitHub Repository Agent.
         
         Args:
             github_token: GitHub personal access token (optional, for private repos)
             cache_dir: Directory to cache cloned repositories
+            scan_workers: Number of threads used to walk a cloned repository
+            quality_workers: Number of worker processes for the code quality scan
+            max_file_size: Size in bytes above which files are never read
+            blob_cache_size: Bound in bytes on the per-file results shared
+                across repositories by content (0 disables sharing)
+            max_age: Seconds a cached clone is used before checking the
+                remote for new commits (0 always checks, None never does)
+            cache_size: Bound in bytes on the disk space used by cached
+                clones; least recently used clones are evicted (None for no limit)
+            fork_mirrors: Clone forks borrowing objects from a shared mirror of
+                their network's root repository, so forks of one upstream
+                store its objects once (the first fork pays for a full clone
+                of the upstream)
+            api_cache_ttl: Seconds a GitHub API response is reused before it
+                is revalidated with a conditional request (None disables the
+                response cache)
+            graphql: Fetch a repository's metadata, languages, topics and
+                README in one GraphQL query instead of one REST request each
+                (None: whenever there is a token, as GraphQL needs one)
         """
-        self.github_client = GitHubClient(github_token)
-        self.code_analyzer = CodeAnalyzer()
-        self.recommender = Recommender()
-        self.ai_enhancer = AIEnhancer()
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        response_cache = None
+        if api_cache_ttl is not None:
+            try:
+                response_cache = ResponseCache(self.cache_dir / 'api.sqlite', ttl=api_cache_ttl)
+            except sqlite3.Error as e:
+                print(f"⚠️  API response cache unavailable: {e}")
+        self.github_client = GitHubClient(github_token, cache=response_cache)
+        self.github_client.graphql = bool(self.github_client.token) if graphql is None else graphql
+        self.async_github_client = AsyncGitHubClient(self.github_client)
+        self.scanner = RepoScanner(workers=scan_workers, max_file_size=max_file_size)
+        self.code_analyzer = CodeAnalyzer(scanner=self.scanner)
+        self.recommender = Recommender()
+        self.ai_enhancer = AIEnhancer(scanner=self.scanner, workers=quality_workers)
+        self.repo_cache = RepoCache(self.cache_dir / 'repos', max_age=max_age, max_bytes=cache_size)
+        self.fork_mirrors = fork_mirrors
+        self.blob_cache = None
+        if blob_cache_size > 0:
+            try:
+                self.blob_cache = BlobCache(self.cache_dir / 'blobs.sqlite', max_bytes=blob_cache_size)
+            except sqlite3.Error as e:
+                print(f"⚠️  Blob cache unavailable: {e}")
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    # Supported ways of reading a cloned repository
+    BACKENDS = ('worktree', 'git')
+    
+    # Supported ways of cloning a repository; no analysis stage needs history
+    CLONE_STRATEGIES = {
+        'full': [],
+        'shallow': ['--depth', '1'],
+        'blobless': ['--filter=blob:none'],
+        'blob-limit': [],  # --filter=blob:limit=<blob_limit>
+        'tarball': None,  # No clone: stream the repository archive, nothing is written to disk
+    }
     
-    def analyze_repo(self, repo_url: str, clone: bool = True) -> RepoAnalysis:
+    # Analyses analyze_repos_async keeps in flight at once
+    DEFAULT_CONCURRENCY = 50
+    
+    def analyze_repo(self, repo_url: str, clone: bool = True, code_quality: bool = False,
+                     backend: str = 'worktree', clone_strategy: str = 'full',
+                     blob_limit: Optional[int] = None, max_age: Optional[float] = None,
+                     repo_info: Optional[Dict[str, Any]] = None) -> RepoAnalysis:
         """
         Analyze a GitHub repository and return comprehensive analysis.
         
         Args:
             repo_url: GitHub repository URL (e.g., 'owner/repo' or full URL)
             clone: Whether to clone the repository locally for analysis
+            code_quality: Whether to also run the AIEnhancer code quality scan
+            backend: 'worktree' to analyze a checked-out clone, or 'git' to keep
+                a bare clone and read files straight from git objects
+            clone_strategy: 'full' (the default: the cached clone keeps its
+                history), 'shallow' (--depth 1), 'blobless' (--filter=blob:none),
+                'blob-limit' (--filter=blob:limit), or 'tarball' to analyze the
+                repository archive as it downloads without git or a checkout
+                (the backend is then ignored); no analysis stage needs history
+            blob_limit: Largest blob in bytes a 'blob-limit' clone fetches
+                (defaults to the scanner's max_file_size, so only files that
+                are never read are left out)
+            max_age: Seconds a cached clone is used before checking the
+                remote for new commits (defaults to the agent's max_age)
+            repo_info: Repository metadata already fetched (e.g. by
+                GitHubClient.get_many_repo_info), saving the API request
             
+        Concurrent calls for the same repository and options (e.g. from
+        web server threads) share a single clone and analysis and all
+        receive the same RepoAnalysis.
+        
+        Returns:
+            RepoAnalysis object with all analysis results
+        """
+        repo_owner, repo_name = self._parse_options(repo_url, backend, clone_strategy)
+        
+        # Concurrent requests for the same analysis share one run
+        key = self._inflight_key(repo_owner, repo_name, clone, code_quality, backend, clone_strategy, blob_limit,
+                                 max_age=max_age)
+        future, leader = self._join_inflight(key)
+        if not leader:
+            print(f"⏳ Waiting for the analysis of {repo_owner}/{repo_name} already in progress")
+            return future.result()
+        
+        try:
+            future.set_result(self._analyze_repo(repo_owner, repo_name, clone, code_quality, backend,
+                                                 clone_strategy, blob_limit, max_age, repo_info))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._leave_inflight(key)
+        return future.result()
+    
+    async def analyze_repo_async(self, repo_url: str, clone: bool = True, code_quality: bool = False,
+                                 backend: str = 'worktree', clone_strategy: str = 'full',
+                                 blob_limit: Optional[int] = None, max_age: Optional[float] = None,
+                                 repo_info: Optional[Dict[str, Any]] = None,
+                                 executor: Optional[Executor] = None) -> RepoAnalysis:
+        """
+        Analyze a GitHub repository without blocking the event loop (see analyze_repo for the arguments).
+        
+        API requests go through async_github_client and git runs as asyncio
+        subprocesses, so one thread can keep many analyses in flight; the
+        scan and the analysis stages, which are CPU-bound, run in executor.
+        The 'tarball' strategy streams the archive in an executor thread,
+        since scanning it is interleaved with reading it, and so does
+        fetching the objects of a 'blobless' clone with backend='git'.
+        
+        Args:
+            executor: Executor the stages run in (the event loop's default
+                executor if None); it must be a thread pool
+        
+        Concurrent calls for the same repository and options, from
+        coroutines or from analyze_repo, share a single run.
+        
         Returns:
             RepoAnalysis object with all analysis results
         """
-        # Parse repo URL
-        repo_owner, repo_name = self._parse_repo_url(repo_url)
+        repo_owner, repo_name = self._parse_options(repo_url, backend, clone_strategy)
+        
+        key = self._inflight_key(repo_owner, repo_name, clone, code_quality, backend, clone_strategy, blob_limit,
+                                 max_age=max_age)
+        future, leader = self._join_inflight(key)
+        if not leader:
+            print(f"⏳ Waiting for the analysis of {repo_owner}/{repo_name} already in progress")
+            # Shielded: a cancelled waiter must not cancel the run the others share
+            return await asyncio.shield(asyncio.wrap_future(future))
+        
+        try:
+            future.set_result(await self._analyze_repo_async(repo_owner, repo_name, clone, code_quality, backend,
+                                                             clone_strategy, blob_limit, max_age, repo_info,
+                                                             executor))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            self._leave_inflight(key)
+        return future.result()
+    
+    def _parse_options(self, repo_url: str, backend: str, clone_strategy: str) -> Tuple[str, str]:
+        """Check the options of an analysis and return the owner and name of its repository."""
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(self.BACKENDS)}")
+        if clone_strategy not in self.CLONE_STRATEGIES:
+            raise ValueError(f"Unknown clone strategy '{clone_strategy}', "
+                             f"expected one of {', '.join(self.CLONE_STRATEGIES)}")
+        return self._parse_repo_url(repo_url)
+    
+    def _inflight_key(self, repo_owner: str, repo_name: str, *options: Any, max_age: Optional[float]) -> tuple:
+        """
+        Identity of an analysis for sharing it between concurrent calls.
+        
+        max_age is part of it: a caller asking for a fresher clone (e.g.
+        max_age=0 to force a refresh) must not get the result of a run that
+        accepted an older one.
+        """
+        max_age = self.repo_cache.max_age if max_age is None else max_age
+        return (repo_owner.lower(), repo_name.lower(), *options, max_age)
+    
+    def _join_inflight(self, key: tuple) -> Tuple[Future, bool]:
+        """The future shared by the calls running an analysis, and whether the caller must run it."""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        return future, leader
+    
+    def _leave_inflight(self, key: tuple):
+        """Forget an analysis whose future was resolved, so the next call runs it again."""
+        with self._inflight_lock:
+            del self._inflight[key]
+    
+    def analyze_repos(self, repo_urls: List[str], workers: int = 1,
+                      batch_size: int = GitHubClient.DEFAULT_BATCH_SIZE, **options) -> Dict[str, RepoAnalysis]:
+        """
+        Analyze many repositories, fetching their metadata in batches.
+        
+        Args:
+            repo_urls: GitHub repository URLs (e.g., 'owner/repo' or full URLs)
+            workers: Number of repositories analyzed concurrently
+            batch_size: Repositories whose metadata one API request fetches
+                (see GitHubClient.get_many_repo_info)
+            **options: Arguments for analyze_repo (clone, code_quality, ...)
+        
+        Returns:
+            Dictionary mapping each URL that could be analyzed to its RepoAnalysis
+        """
+        names = {}
+        for repo_url in repo_urls:
+            try:
+                names[repo_url] = '/'.join(self._parse_repo_url(repo_url))
+            except ValueError as e:
+                print(f"⚠️  Skipping {repo_url}: {e}")
+        infos = self.github_client.get_many_repo_info(names.values(), batch_size=batch_size)
+        
+        def analyze(repo_url: str) -> Optional[RepoAnalysis]:
+            try:
+                return self.analyze_repo(repo_url, repo_info=infos.get(names[repo_url]), **options)
+            except Exception as e:
+                print(f"⚠️  Failed to analyze {repo_url}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            analyses = dict(zip(names, executor.map(analyze, names)))
+        return {repo_url: analysis for repo_url, analysis in analyses.items() if analysis is not None}
+    
+    async def analyze_repos_async(self, repo_urls: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                                  batch_size: int = GitHubClient.DEFAULT_BATCH_SIZE,
+                                  **options) -> Dict[str, RepoAnalysis]:
+        """
+        Analyze many repositories from one event loop, fetching their metadata in batches.
+        
+        Args:
+            repo_urls: GitHub repository URLs (e.g., 'owner/repo' or full URLs)
+            concurrency: Number of analyses in flight at once
+            batch_size: Repositories whose metadata one API request fetches
+            **options: Arguments for analyze_repo_async (clone, code_quality, executor, ...)
+        
+        Returns:
+            Dictionary mapping each URL that could be analyzed to its RepoAnalysis
+        """
+        names = {}
+        for repo_url in repo_urls:
+            try:
+                names[repo_url] = '/'.join(self._parse_repo_url(repo_url))
+            except ValueError as e:
+                print(f"⚠️  Skipping {repo_url}: {e}")
+        infos = await self.async_github_client.get_many_repo_info(names.values(), batch_size=batch_size)
+        slots = asyncio.Semaphore(max(1, concurrency))
+        
+        async def analyze(repo_url: str) -> Optional[RepoAnalysis]:
+            async with slots:
+                try:
+                    return await self.analyze_repo_async(repo_url, repo_info=infos.get(names[repo_url]), **options)
+                except Exception as e:
+                    print(f"⚠️  Failed to analyze {repo_url}: {e}")
+                    return None
+        
+        analyses = dict(zip(names, await asyncio.gather(*(analyze(repo_url) for repo_url in names))))
+        return {repo_url: analysis for repo_url, analysis in analyses.items() if analysis is not None}
+    
+    async def close_async(self):
+        """Close the connections of async_github_client (await it before the event loop ends)."""
+        await self.async_github_client.close()
+    
+    def _analyze_repo(self, repo_owner: str, repo_name: str, clone: bool, code_quality: bool, backend: str,
+                      clone_strategy: str, blob_limit: Optional[int], max_age: Optional[float],
+                      repo_info: Optional[Dict[str, Any]] = None) -> RepoAnalysis:
+        """Run one analysis for analyze_repo (see its arguments)."""
         full_repo_name = f"{repo_owner}/{repo_name}"
         
         print(f"🔍 Analyzing repository: {full_repo_name}")
         
         # Get repository metadata
-        repo_info = self.github_client.get_repo_info(repo_owner, repo_name)
+        if repo_info is None:
+            repo_info = self.github_client.get_repo_info(repo_owner, repo_name)
+        
+        # Clone (or refresh) and analyze the cached clone under its lock, so
+        # other processes never clone into or evict a clone being analyzed
+        repo_path = None
+        clone_info = {}
+        manifest = None
+        lock = nullcontext()
+        if clone and clone_strategy != 'tarball':
+            lock = self.repo_cache.lock(self.repo_cache.path_for(repo_owner, repo_name, bare=(backend == 'git')))
+        with lock:
+            if clone and clone_strategy == 'tarball':
+                # Per-file results are computed while the archive streams by
+                manifest, clone_info = self._stream_tarball(repo_owner, repo_name, code_quality)
+                repo_path = manifest.root if manifest is not None else None
+            elif clone:
+                repo_path, clone_info = self._clone_repo(repo_owner, repo_name, bare=(backend == 'git'),
+                                                         strategy=clone_strategy, blob_limit=blob_limit,
+                                                         max_age=max_age, network=self._network_root(repo_info))
+            results = self._run_stages(repo_path, manifest, backend, code_quality)
+        
+        return self._build_analysis(full_repo_name, repo_info, results, clone_info)
+    
+    async def _analyze_repo_async(self, repo_owner: str, repo_name: str, clone: bool, code_quality: bool,
+                                  backend: str, clone_strategy: str, blob_limit: Optional[int],
+                                  max_age: Optional[float], repo_info: Optional[Dict[str, Any]],
+                                  executor: Optional[Executor]) -> RepoAnalysis:
+        """Run one analysis for analyze_repo_async (see its arguments)."""
+        loop = asyncio.get_running_loop()
+        full_repo_name = f"{repo_owner}/{repo_name}"
+        
+        print(f"🔍 Analyzing repository: {full_repo_name}")
+        
+        if repo_info is None:
+            repo_info = await self.async_github_client.get_repo_info(repo_owner, repo_name)
         
-        # Clone repository if needed
         repo_path = None
-        if clone:
-            repo_path = self._clone_repo(repo_owner, repo_name)
+        clone_info = {}
+        manifest = None
+        lock = _NullAsyncContext()
+        if clone and clone_strategy != 'tarball':
+            lock = self.repo_cache.lock_async(self.repo_cache.path_for(repo_owner, repo_name, bare=(backend == 'git')))
+        async with lock:
+            if clone and clone_strategy == 'tarball':
+                manifest, clone_info = await loop.run_in_executor(executor, self._stream_tarball,
+                                                                  repo_owner, repo_name, code_quality)
+                repo_path = manifest.root if manifest is not None else None
+            elif clone:
+                repo_path, clone_info = await self._clone_repo_async(repo_owner, repo_name, (backend == 'git'),
+                                                                     clone_strategy, blob_limit, max_age,
+                                                                     self._network_root(repo_info), executor)
+            results = await loop.run_in_executor(executor, self._run_stages, repo_path, manifest, backend,
+                                                 code_quality)
         
-        # Analyze codebase
-        print("📊 Analyzing codebase structure...")
-        structure = self.code_analyzer.analyze_structure(repo_path) if repo_path else {}
+        return await loop.run_in_executor(executor, self._build_analysis, full_repo_name, repo_info, results,
+                                          clone_info)
+    
+    def _run_stages(self, repo_path: Optional[Path], manifest: Optional[FileManifest], backend: str,
+                    code_quality: bool) -> Dict[str, Any]:
+        """
+        Scan a repository (unless it was streamed into manifest) and run the analysis stages on it.
         
-        print("🔎 Detecting languages and dependencies...")
-        languages = self.code_analyzer.detect_languages(repo_path) if repo_path else {}
-        dependencies = self.code_analyzer.extract_dependencies(repo_path) if repo_path else {}
+        Returns:
+            The stage results, keyed by their RepoAnalysis field (all empty
+            if there is no repository)
+        """
+        index = None
+        blob_hits = self.blob_cache.hits if self.blob_cache else 0
         
-        print("🎯 Identifying patterns and best practices...")
-        patterns = self.code_analyzer.identify_patterns(repo_path) if repo_path else []
+        # Walk the repository once; every stage below shares this manifest.
+        # Per-file results are reused from the clone's index when unchanged.
+        if repo_path and manifest is None:
+            index = FileIndex.load(self._index_path(repo_path))
+            if backend == 'git':
+                manifest = self.scanner.scan_git(repo_path, index=index)
+            else:
+                manifest = self.scanner.scan(repo_path, index=index)
+            manifest.blob_cache = self.blob_cache
         
-        print("📈 Calculating metrics...")
-        metrics = self.code_analyzer.calculate_metrics(repo_path) if repo_path else {}
+        # The clean-up runs even if a stage fails (e.g. a blob missing from a
+        # blob-limit clone), so no cat-file process is left behind and the
+        # results computed so far are kept
+        try:
+            # Analyze codebase
+            print("📊 Analyzing codebase structure...")
+            structure = self.code_analyzer.analyze_structure(repo_path, manifest) if repo_path else {}
+            
+            print("🔎 Detecting languages and dependencies...")
+            languages = self.code_analyzer.detect_languages(repo_path, manifest) if repo_path else {}
+            subproject_dependencies = (self.code_analyzer.extract_dependencies_by_subproject(repo_path, manifest)
+                                       if repo_path else {})
+            dependencies = self.code_analyzer.merge_dependencies(subproject_dependencies)
+            locked_dependencies = self.code_analyzer.extract_locked_dependencies(repo_path, manifest) if repo_path else {}
+            
+            print("🎯 Identifying patterns and best practices...")
+            patterns = self.code_analyzer.identify_patterns(repo_path, manifest) if repo_path else []
+            
+            print("📈 Calculating metrics...")
+            metrics = self.code_analyzer.calculate_metrics(repo_path, manifest) if repo_path else {}
+            
+            quality = {}
+            if code_quality and repo_path:
+                print("🧪 Scanning code quality...")
+                quality = self.ai_enhancer.analyze_code_quality(repo_path, manifest)
+        finally:
+            if manifest is not None:
+                manifest.close()
+            if index is not None:
+                if index.hits:
+                    print(f"♻️  Reused indexed results for {index.hits} unchanged file(s)")
+                index.save()
+            if self.blob_cache is not None:
+                if self.blob_cache.hits > blob_hits:
+                    print(f"♻️  Reused {self.blob_cache.hits - blob_hits} result(s) for file contents seen in other analyses")
+                self.blob_cache.flush()
+            if self.github_client.cache is not None:
+                self.github_client.cache.flush()
         
-        # Generate recommendations
+        return {
+            'structure': structure,
+            'languages': languages,
+            'dependencies': dependencies,
+            'patterns': patterns,
+            'metrics': metrics,
+            'code_quality': quality,
+            'locked_dependencies': locked_dependencies,
+            'subproject_dependencies': subproject_dependencies,
+        }
+    
+    def _build_analysis(self, full_repo_name: str, repo_info: Dict[str, Any], results: Dict[str, Any],
+                        clone_info: Dict[str, Any]) -> RepoAnalysis:
+        """Generate the recommendations for the stage results and assemble the RepoAnalysis."""
         print("💡 Generating recommendations...")
         recommendations = self.recommender.generate_recommendations(
             repo_info=repo_info,
-            structure=structure,
-            languages=languages,
-            dependencies=dependencies,
-            patterns=patterns,
-            metrics=metrics
+            structure=results['structure'],
+            languages=results['languages'],
+            dependencies=results['dependencies'],
+            patterns=results['patterns'],
+            metrics=results['metrics']
         )
         
         return RepoAnalysis(
             repo_name=full_repo_name,
             repo_url=repo_info.get('html_url', f"https://github.com/{full_repo_name}"),
-            languages=languages,
-            structure=structure,
-            dependencies=dependencies,
-            patterns=patterns,
-            metrics=metrics,
             recommendations=recommendations,
-            analyzed_at=datetime.now().isoformat()
+            analyzed_at=datetime.now().isoformat(),
+            clone_info=clone_info,
+            **results
         )
     
     def get_recommendations(self, repo_url: str, focus_area: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -176,27 +556,184 @@ class GitHubRepoAgent:
         
         return parts[0], parts[1]
     
-    def _clone_repo(self, owner: str, name: str) -> Optional[Path]:
-        """Clone repository to cache directory."""
-        repo_path = self.cache_dir / name
+    def _stream_tarball(self, owner: str, name: str,
+                        code_quality: bool) -> Tuple[Optional[FileManifest], Dict[str, Any]]:
+        """
+        Download a repository archive and scan it as it streams in.
+        
+        Every stage's per-file work runs while each file's contents are in
+        memory, so nothing is extracted to disk and memory is bounded by the
+        largest file.
         
-        if repo_path.exists():
-            print(f"📦 Using cached repository at {repo_path}")
-            return repo_path
+        Returns:
+            (manifest, info): the manifest (None on failure) and a record of
+            the commit analyzed, the seconds taken and the bytes downloaded
+        """
+        info = {'strategy': 'tarball', 'source': 'download', 'head': None, 'seconds': 0.0}
+        print(f"📥 Streaming repository archive of {owner}/{name}...")
+        
+        def on_file(manifest: FileManifest, entry: FileEntry):
+            self.code_analyzer.prepare_file(manifest, entry)
+            if code_quality:
+                self.ai_enhancer.prepare_file(manifest, entry)
+        
+        start = time.perf_counter()
+        stream = self.github_client.get_repo_tarball(owner, name)
+        if stream is None:
+            return None, info
+        counted = _CountingReader(stream)
+        try:
+            manifest = self.scanner.scan_tarball(counted, on_file=on_file, root=Path(name),
+                                                 blob_cache=self.blob_cache)
+        except (tarfile.TarError, OSError, EOFError) as e:
+            print(f"⚠️  Failed to read repository archive: {e}")
+            return None, info
+        finally:
+            stream.close()
+        
+        info['head'] = manifest.revision or None
+        info['seconds'] = round(time.perf_counter() - start, 3)
+        info['download_bytes'] = counted.bytes_read
+        print(f"⏱️  Streamed {len(manifest.files)} files in {info['seconds']:.2f}s "
+              f"({counted.bytes_read / 1048576:.1f} MiB downloaded)")
+        return manifest, info
+    
+    def _clone_url(self, owner: str, name: str) -> str:
+        """URL the repository is cloned from."""
+        return f"https://github.com/{owner}/{name}.git"
+    
+    @staticmethod
+    def _network_root(repo_info: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Owner and name of the root of a fork's network (None if the repository is not a fork)."""
+        # GraphQL only reports the parent, which shares most objects with the root
+        full_name = (repo_info.get('source') or repo_info.get('parent') or {}).get('full_name', '')
+        if not repo_info.get('fork') or '/' not in full_name:
+            return None
+        owner, name = full_name.split('/', 1)
+        return owner, name
+    
+    def _clone_repo(self, owner: str, name: str, bare: bool = False, strategy: str = 'full',
+                    blob_limit: Optional[int] = None, max_age: Optional[float] = None,
+                    network: Optional[Tuple[str, str]] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """
+        Clone repository to cache directory (as a bare repository if requested),
+        or bring the cached clone up to date.
         
-        repo_url = f"https://github.com/{owner}/{name}.git"
-        print(f"📥 Cloning repository to {repo_path}...")
+        Args:
+            owner: Repository owner
+            name: Repository name
+            bare: Clone without a working tree
+            strategy: One of CLONE_STRATEGIES
+            blob_limit: Blob size limit for the 'blob-limit' strategy
+            max_age: Seconds a cached clone is used without revalidation
+                (defaults to the cache's max_age)
+            network: Owner and name of the fork network's root; with
+                fork_mirrors, a new clone borrows objects from its mirror
         
+        Returns:
+            (path, info): the clone path (None on failure) and a record of
+            where it came from ('hit', 'refresh' or 'clone'), its HEAD commit,
+            the strategy used, the seconds it took, the size of the objects
+            it stores itself and, when it borrows objects, the 'reference'
+            repository they come from
+        """
+        reference = self._network_mirror(owner, name, bare, network, max_age)
+        clone_args = self._clone_args(strategy, blob_limit)
+        repo_path, info = self.repo_cache.checkout(owner, name, self._clone_url(owner, name), bare=bare,
+                                                   strategy=strategy, clone_args=clone_args, max_age=max_age,
+                                                   reference=reference)
+        if repo_path is None:
+            return None, info
+        if bare and info['strategy'] == 'blobless' and info['source'] != 'hit':
+            self._prefetch_blobs(repo_path, info)
+        info['disk_bytes'] = self._object_store_size(repo_path)
+        self._report_clone(repo_path, info, network, reference)
+        return repo_path, info
+    
+    async def _clone_repo_async(self, owner: str, name: str, bare: bool, strategy: str, blob_limit: Optional[int],
+                                max_age: Optional[float], network: Optional[Tuple[str, str]],
+                                executor: Optional[Executor]) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """_clone_repo without blocking the event loop (the mirror and blob fetches run in executor)."""
+        loop = asyncio.get_running_loop()
+        reference = await loop.run_in_executor(executor, self._network_mirror, owner, name, bare, network, max_age)
+        clone_args = self._clone_args(strategy, blob_limit)
+        repo_path, info = await self.repo_cache.checkout_async(owner, name, self._clone_url(owner, name), bare=bare,
+                                                               strategy=strategy, clone_args=clone_args,
+                                                               max_age=max_age, reference=reference)
+        if repo_path is None:
+            return None, info
+        if bare and info['strategy'] == 'blobless' and info['source'] != 'hit':
+            await loop.run_in_executor(executor, self._prefetch_blobs, repo_path, info)
         try:
-            subprocess.run(
-                ['git', 'clone', repo_url, str(repo_path)],
-                check=True,
-                capture_output=True
-            )
-            return repo_path
-        except subprocess.CalledProcessError as e:
-            print(f"⚠️  Failed to clone repository: {e}")
+            info['disk_bytes'] = self._count_objects_bytes(await run_git_async(*self._count_objects_args(repo_path)))
+        except (OSError, subprocess.CalledProcessError):
+            info['disk_bytes'] = 0
+        self._report_clone(repo_path, info, network, reference)
+        return repo_path, info
+    
+    def _clone_args(self, strategy: str, blob_limit: Optional[int]) -> List[str]:
+        """Extra `git clone` arguments of a clone strategy."""
+        clone_args = list(self.CLONE_STRATEGIES[strategy])
+        if strategy == 'blob-limit':
+            limit = blob_limit if blob_limit is not None else self.scanner.max_file_size
+            clone_args.append(f'--filter=blob:limit={limit}')
+        return clone_args
+    
+    def _network_mirror(self, owner: str, name: str, bare: bool, network: Optional[Tuple[str, str]],
+                        max_age: Optional[float]) -> Optional[Path]:
+        """The mirror a clone of a fork borrows objects from with fork_mirrors (None for other clones)."""
+        if not self.fork_mirrors or network is None or network == (owner, name):
             return None
+        # Only a new clone uses the mirror, so only then is it worth refreshing
+        cached = self.repo_cache.load_meta(self.repo_cache.path_for(owner, name, bare)).get('head')
+        return self.repo_cache.mirror(*network, self._clone_url(*network), refresh=not cached, max_age=max_age)
+    
+    def _prefetch_blobs(self, repo_path: Path, info: Dict[str, Any]):
+        """Fetch the blobs of HEAD missing from a new or updated blobless bare clone."""
+        # A checkout would fetch the blobs of HEAD in one batch; do the
+        # same rather than have every read fetch a single blob
+        start = time.perf_counter()
+        try:
+            fetch_blobs(repo_path, missing_blobs(repo_path))
+        except GitObjectError as e:
+            print(f"⚠️  Failed to fetch file contents: {e}")
+        info['seconds'] = round(info['seconds'] + time.perf_counter() - start, 3)
+        self.repo_cache.update_size(repo_path)
+    
+    def _report_clone(self, repo_path: Path, info: Dict[str, Any], network: Optional[Tuple[str, str]],
+                      reference: Optional[Path]):
+        """Record the repository a clone borrows objects from and print what cloning or updating it took."""
+        if reference is not None and self.repo_cache.load_meta(repo_path).get('reference') == str(reference):
+            info['reference'] = '/'.join(network)
+        if info['source'] != 'hit':
+            shared = f", sharing the objects of {info['reference']}" if 'reference' in info else ""
+            print(f"⏱️  {'Cloned' if info['source'] == 'clone' else 'Updated'} in {info['seconds']:.2f}s "
+                  f"({info['disk_bytes'] / 1048576:.1f} MiB of objects{shared})")
+    
+    def _object_store_size(self, repo_path: Path) -> int:
+        """Bytes used by a clone's git objects, as reported by `git count-objects`."""
+        try:
+            out = subprocess.run(['git', *self._count_objects_args(repo_path)],
+                                 check=True, capture_output=True, text=True).stdout
+        except (OSError, subprocess.CalledProcessError):
+            return 0
+        return self._count_objects_bytes(out)
+    
+    @staticmethod
+    def _count_objects_args(repo_path: Path) -> List[str]:
+        """Arguments of the `git count-objects` measuring a clone's object store."""
+        git_dir = repo_path if (repo_path / 'objects').is_dir() else repo_path / '.git'
+        return ['--git-dir', str(git_dir), 'count-objects', '-v']
+    
+    @staticmethod
+    def _count_objects_bytes(out: str) -> int:
+        """Bytes of objects in the output of `git count-objects -v`."""
+        stats = dict(line.split(': ', 1) for line in out.splitlines() if ': ' in line)
+        return (int(stats.get('size', 0)) + int(stats.get('size-pack', 0))) * 1024
+    
+    def _index_path(self, repo_path: Path) -> Path:
+        """Location of the file index stored next to a cached clone."""
+        return self.repo_cache.index_path(repo_path)
     
     def export_analysis(self, analysis: RepoAnalysis, output_path: str):
         """Export analysis results to JSON file."""
@@ -204,3 +741,26 @@ class GitHubRepoAgent:
             json.dump(asdict(analysis), f, indent=2)
         print(f"✅ Analysis exported to {output_path}")
 
+
+
+class _NullAsyncContext:
+    """Async context manager that does nothing (contextlib.nullcontext only supports `async with` from 3.10)."""
+    
+    async def __aenter__(self):
+        return None
+    
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _CountingReader:
+    """Binary stream wrapper that counts the bytes read through it."""
+    
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.bytes_read = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        return data
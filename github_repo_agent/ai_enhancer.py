@@ -3,11 +3,17 @@ AI-enhanced analysis using built-in capabilities (no external API keys needed).
 This module provides enhanced code understanding without requiring OpenAI/Anthropic keys.
 """
 
-import os
-import re
-from typing import Dict, List, Optional, Any
+import json
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+from .git_objects import GitBlobReader
+from .rule_engine import RuleMatcher
+from .scanner import (SNIFF_SIZE, FileEntry, FileFlag, FileManifest, RepoScanner, skip_reason,
+                      sniff_content, sniff_name)
+
 
 class AIEnhancer:
     """
@@ -15,31 +21,73 @@ class AIEnhancer:
     Uses pattern matching, heuristics, and code analysis for intelligent insights.
     """
     
-    def __init__(self):
-        """Initialize AI enhancer."""
-        self.code_patterns = self._load_code_patterns()
+    # Source files that are scanned for quality patterns
+    CODE_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.go', '.rs', '.rb', '.php', '.cpp', '.c'}
+    
+    # Below this many files to scan, a worker pool costs more than it saves
+    PARALLEL_MIN_FILES = 64
+    
+    # Upper bound on the number of files sent to a worker in one batch
+    MAX_BATCH_SIZE = 256
+    
+    # CPU seconds the rule scan may spend on a single file
+    DEFAULT_TIME_BUDGET = 0.5
+    
+    # Files that are not scanned for quality patterns
+    SKIP_FLAGS = (FileFlag.OVERSIZED | FileFlag.BINARY | FileFlag.VENDORED | FileFlag.GENERATED
+                  | FileFlag.MINIFIED)
+    
+    def __init__(self, scanner: Optional[RepoScanner] = None, workers: int = 1,
+                 executor_factory: Callable[..., Executor] = ProcessPoolExecutor,
+                 code_patterns: Optional[Dict[str, List[str]]] = None,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET):
+        """
+        Initialize AI enhancer.
+        
+        Args:
+            scanner: Scanner used when called without a manifest
+            workers: Number of workers scanning file contents (1 scans in-process)
+            executor_factory: Executor class used for parallel scans; called
+                with max_workers=workers
+            code_patterns: Rule set to use instead of the built-in patterns
+            time_budget: CPU seconds the rule scan may spend per file; rules
+                still pending when it runs out are skipped and reported
+                (None scans without a budget)
+        """
+        self.scanner = scanner or RepoScanner()
+        self.workers = max(1, workers)
+        self.executor_factory = executor_factory
+        self.time_budget = time_budget
+        self.code_patterns = code_patterns if code_patterns is not None else self._load_code_patterns()
+        self.matcher = RuleMatcher(self.code_patterns)
         self.best_practices = self._load_best_practices()
+        # Index key for per-file findings; changes whenever the rule set does
+        rules_digest = hashlib.sha1(json.dumps(self.code_patterns, sort_keys=True).encode()).hexdigest()
+        self.findings_key = f"quality:{rules_digest[:12]}"
     
     def _load_code_patterns(self) -> Dict[str, List[str]]:
         """Load code patterns for intelligent analysis."""
+        # Rules avoid overlapping unbounded quantifiers and stay within a
+        # line where possible, so matching cannot backtrack catastrophically
+        # on minified or generated files
         return {
             'security_issues': [
-                r'password\s*=\s*["\'].*["\']',  # Hardcoded passwords
-                r'api[_-]?key\s*=\s*["\'].*["\']',  # Hardcoded API keys
+                r'password\s*=\s*["\'][^\n]*["\']',  # Hardcoded passwords
+                r'api[_-]?key\s*=\s*["\'][^\n]*["\']',  # Hardcoded API keys
                 r'eval\s*\(',  # eval() usage
                 r'exec\s*\(',  # exec() usage
-                r'sql.*\+.*["\']',  # SQL injection risk
+                r'sql[^\n+]*\+[^\n]*?["\']',  # SQL injection risk
                 r'\.innerHTML\s*=',  # XSS risk
             ],
             'performance_issues': [
-                r'for\s+.*\s+in\s+range\(len\(',  # Inefficient iteration
-                r'\.append\(.*\)\s*$',  # List append in loop
+                r'for\s[^\n]*?\sin\s+range\(len\(',  # Inefficient iteration
+                r'\.append\([^\n]*\)[ \t\r]*(?![^\n])',  # List append in loop
                 r'SELECT\s+\*',  # SELECT * queries
             ],
             'code_smells': [
-                r'if\s+.*:\s*if\s+.*:\s*if',  # Nested ifs
+                r'if\s[^\n:]*:\s*if\s[^\n:]*:\s*if',  # Nested ifs
                 r'function\s+\w+\([^)]{100,}\)',  # Long parameter lists
-                r'class\s+\w+.*{[\s\S]{1000,}',  # Large classes
+                r'class\s+\w[^\n{]*\{[\s\S]{1000}',  # Large classes
             ],
         }
     
@@ -62,85 +110,212 @@ class AIEnhancer:
             ],
         }
     
-    def analyze_code_quality(self, repo_path: Optional[Path]) -> Dict[str, Any]:
+    def analyze_code_quality(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> Dict[str, Any]:
         """
         Analyze code quality using pattern matching and heuristics.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
             Dictionary with code quality insights
         """
-        if not repo_path or not repo_path.exists():
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return {}
         
+        if manifest is None:
+            manifest = self.scanner.scan(repo_path)
+        
         insights = {
             'security_concerns': [],
             'performance_opportunities': [],
             'code_smells': [],
             'best_practices_found': [],
+            'skipped_rules': [],
+            'skipped_files': [],
             'suggestions': [],
         }
         
-        code_extensions = {'.py', '.js', '.ts', '.java', '.go', '.rs', '.rb', '.php', '.cpp', '.c'}
-        
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', 'dist', 'build']]
-            
-            for file in files:
-                file_path = Path(root) / file
-                if file_path.suffix.lower() not in code_extensions:
-                    continue
-                
-                try:
-                    content = file_path.read_text(encoding='utf-8', errors='ignore')
-                    rel_path = file_path.relative_to(repo_path)
-                    
-                    # Check for security issues
-                    for pattern in self.code_patterns['security_issues']:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            issue_type = self._identify_issue_type(pattern)
-                            insights['security_concerns'].append({
-                                'file': str(rel_path),
-                                'issue': issue_type,
-                                'severity': 'high',
-                            })
-                    
-                    # Check for performance issues
-                    for pattern in self.code_patterns['performance_issues']:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            insights['performance_opportunities'].append({
-                                'file': str(rel_path),
-                                'suggestion': 'Consider optimizing this code pattern',
-                            })
-                    
-                    # Check for code smells
-                    for pattern in self.code_patterns['code_smells']:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            insights['code_smells'].append({
-                                'file': str(rel_path),
-                                'type': 'complex code structure detected',
-                            })
-                    
-                    # Check for best practices
-                    if 'try' in content and 'except' in content:
-                        insights['best_practices_found'].append('Error handling')
-                    if 'log' in content.lower():
-                        insights['best_practices_found'].append('Logging')
-                    if file_path.suffix == '.py' and 'def ' in content and '->' in content:
-                        insights['best_practices_found'].append('Type hints')
-                    if '"""' in content or "'''" in content:
-                        insights['best_practices_found'].append('Documentation')
-                
-                except Exception:
-                    continue
+        entries = [entry for entry in manifest.iter_files(exclude=FileFlag.BUILD_OUTPUT)
+                   if entry.ext in self.CODE_EXTENSIONS]
+        
+        # Skip what the stat data and names rule out, reuse findings from the
+        # index or for identical contents from the blob cache, then scan
+        # whatever is left
+        results = {}
+        todo = []
+        for entry in entries:
+            reason = self._pre_skip_reason(entry)
+            if reason:
+                results[entry.path] = {'security': [], 'performance': 0, 'smells': 0, 'practices': [],
+                                       'skipped_rules': [], 'skipped': reason}
+                continue
+            findings = manifest.lookup(entry, self.findings_key, self._shared_key(entry))
+            if findings is None:
+                todo.append(entry)
+            else:
+                results[entry.path] = findings
+        
+        for path, findings in self._scan_entries(manifest, todo):
+            results[path] = findings
+        for entry in todo:
+            if results[entry.path].get('skipped') != 'unreadable':
+                manifest.store(entry, self.findings_key, results[entry.path], self._shared_key(entry))
+        
+        # Merge in manifest order so the output does not depend on scheduling
+        for entry in entries:
+            self._merge_findings(insights, entry.path, results[entry.path])
         
         # Generate intelligent suggestions
         insights['suggestions'] = self._generate_suggestions(insights)
         
         return insights
     
+    def prepare_file(self, manifest: FileManifest, entry: FileEntry):
+        """
+        Compute a file's findings while its contents are readable (see CodeAnalyzer.prepare_file).
+        
+        The findings are stored in the manifest's index, where
+        analyze_code_quality finds them later.
+        """
+        if entry.has(FileFlag.BUILD_OUTPUT) or entry.ext not in self.CODE_EXTENSIONS or self._pre_skip_reason(entry):
+            return
+        if manifest.lookup(entry, self.findings_key, self._shared_key(entry)) is None:
+            findings = self._scan_file(manifest, entry)
+            if findings.get('skipped') != 'unreadable':
+                manifest.store(entry, self.findings_key, findings, self._shared_key(entry))
+    
+    def _pre_skip_reason(self, entry: FileEntry) -> Optional[str]:
+        """Why a file is not scanned, judging from its flags and name alone (None to scan it)."""
+        return skip_reason((entry.flags | sniff_name(entry.name)) & self.SKIP_FLAGS)
+    
+    def _shared_key(self, entry: FileEntry) -> str:
+        """Blob cache key of a file's findings; besides the contents they depend on the extension."""
+        return f"{self.findings_key}:{entry.ext}"
+    
+    def _scan_entries(self, manifest: FileManifest, entries: List[FileEntry]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Scan files, splitting them into batches over a worker pool when worthwhile.
+        
+        Returns:
+            (relative path, findings) pairs; order is not guaranteed
+        """
+        # Workers re-open the working tree or the git objects; other sources
+        # (e.g. a streamed archive) can only be read in this process
+        is_git = isinstance(manifest.blob_reader, GitBlobReader)
+        if (self.workers == 1 or len(entries) < self.PARALLEL_MIN_FILES
+                or not (is_git or manifest.blob_reader is None)):
+            return [(entry.path, self._scan_file(manifest, entry)) for entry in entries]
+        
+        batch_size = max(1, min(self.MAX_BATCH_SIZE, -(-len(entries) // (self.workers * 4))))
+        batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+        
+        results = []
+        try:
+            with self.executor_factory(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(_scan_batch, self.code_patterns, self.time_budget,
+                                    str(manifest.root), is_git, batch)
+                    for batch in batches
+                ]
+                for future in futures:
+                    results.extend(future.result())
+        except Exception as e:
+            # Some environments (e.g. serverless sandboxes) cannot fork workers
+            print(f"⚠️  Parallel code scan failed ({e}); scanning sequentially")
+            return [(entry.path, self._scan_file(manifest, entry)) for entry in entries]
+        
+        return results
+    
+    def _scan_file(self, manifest: FileManifest, entry: FileEntry) -> Dict[str, Any]:
+        """
+        Run every quality rule over a single file.
+        
+        Returns:
+            Per-file findings: matched security issue types, the number of
+            performance and code smell matches, best practices found and
+            rules skipped because the time budget ran out; 'skipped' names
+            the reason when the whole file was not scanned ('unreadable'
+            findings are never stored: a read may fail only this once)
+        """
+        findings = {'security': [], 'performance': 0, 'smells': 0, 'practices': [], 'skipped_rules': []}
+        
+        # Oversized files are never read; binary, generated and minified
+        # ones are recognized from the first bytes of what was read
+        reason = skip_reason(entry.flags & self.SKIP_FLAGS)
+        if reason:
+            findings['skipped'] = reason
+            return findings
+        
+        try:
+            data = manifest.read_bytes(entry)
+        except Exception:
+            findings['skipped'] = 'unreadable'
+            return findings
+        
+        reason = skip_reason(sniff_content(entry.name, data[:SNIFF_SIZE]) & self.SKIP_FLAGS)
+        if reason:
+            findings['skipped'] = reason
+            return findings
+        content = data.decode('utf-8', errors='ignore')
+        
+        # Evaluate every rule in a single pass over the content
+        if self.time_budget is None:
+            matched = self.matcher.match(content)
+        else:
+            matched, findings['skipped_rules'] = self.matcher.match_with_budget(content, self.time_budget)
+        
+        # Check for security issues
+        for pattern in matched.get('security_issues', []):
+            findings['security'].append(self._identify_issue_type(pattern))
+        
+        # Check for performance issues
+        findings['performance'] = len(matched.get('performance_issues', []))
+        
+        # Check for code smells
+        findings['smells'] = len(matched.get('code_smells', []))
+        
+        # Check for best practices
+        if 'try' in content and 'except' in content:
+            findings['practices'].append('Error handling')
+        if 'log' in content.lower():
+            findings['practices'].append('Logging')
+        if entry.ext == '.py' and 'def ' in content and '->' in content:
+            findings['practices'].append('Type hints')
+        if '"""' in content or "'''" in content:
+            findings['practices'].append('Documentation')
+        
+        return findings
+    
+    def _merge_findings(self, insights: Dict[str, Any], rel_path: str, findings: Dict[str, Any]):
+        """Fold the findings of one file into the repository-wide insights."""
+        if findings.get('skipped'):
+            insights['skipped_files'].append({'file': rel_path, 'reason': findings['skipped']})
+        for issue_type in findings['security']:
+            insights['security_concerns'].append({
+                'file': rel_path,
+                'issue': issue_type,
+                'severity': 'high',
+            })
+        for _ in range(findings['performance']):
+            insights['performance_opportunities'].append({
+                'file': rel_path,
+                'suggestion': 'Consider optimizing this code pattern',
+            })
+        for _ in range(findings['smells']):
+            insights['code_smells'].append({
+                'file': rel_path,
+                'type': 'complex code structure detected',
+            })
+        insights['best_practices_found'].extend(findings['practices'])
+        if findings.get('skipped_rules'):
+            insights['skipped_rules'].append({
+                'file': rel_path,
+                'rules': findings['skipped_rules'],
+                'reason': 'time budget exceeded',
+            })
+    
     def _identify_issue_type(self, pattern: str) -> str:
         """Identify the type of security issue from pattern."""
         if 'password' in pattern:
@@ -258,3 +433,21 @@ class AIEnhancer:
         
         return steps[:5]  # Limit to top 5
 
+
+# Enhancer reused by every batch a pool worker processes
+_worker_enhancer: Optional[AIEnhancer] = None
+
+
+def _scan_batch(code_patterns: Dict[str, List[str]], time_budget: Optional[float], root: str,
+                is_git: bool, entries: List[FileEntry]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Scan one batch of files inside a pool worker."""
+    global _worker_enhancer
+    if _worker_enhancer is None or _worker_enhancer.code_patterns != code_patterns:
+        _worker_enhancer = AIEnhancer(code_patterns=code_patterns)
+    _worker_enhancer.time_budget = time_budget
+    
+    manifest = FileManifest(root=Path(root), blob_reader=GitBlobReader(Path(root)) if is_git else None)
+    try:
+        return [(entry.path, _worker_enhancer._scan_file(manifest, entry)) for entry in entries]
+    finally:
+        manifest.close()
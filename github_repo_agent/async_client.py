@@ -0,0 +1,322 @@
+"""
+Asyncio variant of the GitHub API client.
+"""
+
+import asyncio
+import base64
+import json
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .github_client import GitHubClient
+
+try:
+    import aiohttp
+except ImportError:  # Optional: calls then run the GitHubClient methods in executor threads
+    aiohttp = None
+
+
+class AsyncGitHubClient:
+    """
+    Client for the GitHub API whose calls are coroutines, so one thread can keep many requests in flight.
+
+    It wraps a GitHubClient and shares its token, timeouts, retry policy,
+    response cache and GraphQL mode; every call returns the same result as
+    the GitHubClient method of the same name. With aiohttp installed,
+    requests go through a non-blocking connection pool and are retried
+    like GitHubClient's. Without it, each call runs the GitHubClient method
+    in an executor thread, so the event loop is still never blocked.
+
+    The aiohttp session is opened by the first request and bound to its
+    event loop; await close() before that loop ends.
+    """
+
+    # Requests in flight at once (GitHub's secondary rate limits allow at
+    # most 100 concurrent requests)
+    DEFAULT_MAX_CONNECTIONS = 50
+
+    def __init__(self, client: Optional[GitHubClient] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, executor: Optional[Executor] = None):
+        """
+        Initialize async GitHub client.
+
+        Args:
+            client: Client whose token, settings and response cache are used
+                (a new GitHubClient, reading GITHUB_TOKEN, if None)
+            max_connections: Requests in flight at once; more wait for a connection
+            executor: Executor running the GitHubClient methods when aiohttp
+                is not installed (the event loop's default executor if None)
+        """
+        self.client = client if client is not None else GitHubClient()
+        self.max_connections = max_connections
+        self.executor = executor
+        self._session = None
+        self._session_loop = None
+
+    async def close(self):
+        """Close the pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """The session of the running event loop, opened on first use."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connect, read = self.client.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def _in_executor(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking GitHubClient call in the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _request(self, url: str, headers: Optional[Dict[str, str]] = None,
+                       json_body: Optional[Dict[str, Any]] = None) -> Tuple[int, Mapping[str, str], bytes]:
+        """
+        GET a URL (or POST a JSON body to it) and read the response, retrying transient failures.
+
+        Args:
+            url: URL to fetch
+            headers: Headers to send in addition to the client's own
+            json_body: POST this body instead of sending a GET (only for
+                requests that are safe to repeat, like GraphQL queries)
+
+        Returns:
+            (status, headers, body) of the final response
+
+        Raises:
+            aiohttp.ClientError: If the final response is an error or the
+                last attempt failed to connect
+            asyncio.TimeoutError: If the last attempt timed out
+        """
+        headers = {**self.client.headers, **headers} if headers else self.client.headers
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with session.request('GET' if json_body is None else 'POST', url,
+                                           headers=headers, json=json_body) as response:
+                    body = await response.read()
+                    text = body.decode('utf-8', errors='replace') if response.status in (403, 429) else ''
+                    delay = self.client._status_retry_delay(response.status, response.headers, text, attempt)
+                    if delay is None or attempt >= self.client.max_retries:
+                        response.raise_for_status()
+                        return response.status, response.headers, body
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= self.client.max_retries or isinstance(e, aiohttp.ClientSSLError):
+                    raise
+                delay = self.client._backoff_delay(attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get_json(self, url: str) -> Any:
+        """
+        GET a JSON API resource, through the GitHubClient's response cache if it has one.
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError, ValueError: If the
+                resource could not be fetched or is not JSON
+        """
+        cache = self.client.cache
+        if cache is None:
+            return json.loads((await self._request(url))[2])
+
+        key = self.client._cache_key(url)
+        body = cache.fresh(key)
+        if body is None:
+            status, headers, content = await self._request(url, headers=cache.validators(key))
+            if status == 304:
+                body = cache.revalidated(key)
+                if body is None:  # Evicted in the meantime
+                    status, headers, content = await self._request(url)
+            if body is None:
+                data = json.loads(content)
+                cache.store(key, content, headers.get('ETag'), headers.get('Last-Modified'))
+                return data
+        return json.loads(body)
+
+    async def _post_graphql(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a GraphQL query and return the decoded response."""
+        return json.loads((await self._request(f"{self.client.BASE_URL}/graphql", json_body=body))[2])
+
+    async def get_repo_info(self, owner: str, repo: str) -> Dict:
+        """
+        Get repository information from GitHub API (see GitHubClient.get_repo_info).
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+
+        Returns:
+            Dictionary with repository information
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_repo_info, owner, repo)
+        bundle = await self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['info']
+        url = f"{self.client.BASE_URL}/repos/{owner}/{repo}"
+
+        try:
+            return await self._get_json(url)
+        except _ERRORS as e:
+            print(f"⚠️  Error fetching repo info: {e}")
+            return self.client._placeholder_info(owner, repo)
+
+    async def get_many_repo_info(self, repos: Iterable[str],
+                                 batch_size: int = GitHubClient.DEFAULT_BATCH_SIZE) -> Dict[str, Dict]:
+        """
+        Get information on many repositories (see GitHubClient.get_many_repo_info).
+
+        The batch queries, and any per-repository fallbacks, are all sent
+        concurrently.
+
+        Args:
+            repos: Repositories as 'owner/name'
+            batch_size: Repositories per query
+
+        Returns:
+            Dictionary mapping each 'owner/name' to information shaped like
+            get_repo_info's
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_many_repo_info, repos, batch_size)
+        names = list(dict.fromkeys(repos))
+        batches = [names[start:start + max(1, batch_size)] for start in range(0, len(names), max(1, batch_size))]
+        if self.client.token:
+            answers = await asyncio.gather(*(self._query_repositories(batch) for batch in batches))
+        else:
+            answers = [None] * len(batches)
+
+        results: Dict[str, Dict] = {}
+        fallback = []
+        for batch, repositories in zip(batches, answers):
+            for i, full_name in enumerate(batch):
+                owner, _, repo = full_name.partition('/')
+                if repositories is None:
+                    fallback.append(full_name)
+                elif repositories[i] is None:
+                    results[full_name] = self.client._placeholder_info(owner, repo)
+                else:
+                    results[full_name] = self.client._info_from_graphql(repositories[i])
+        infos = await asyncio.gather(*(self.get_repo_info(*full_name.split('/', 1)) for full_name in fallback))
+        results.update(zip(fallback, infos))
+        return {full_name: results[full_name] for full_name in names}
+
+    async def _query_repositories(self, batch: List[str]) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """Fetch the info fields of several repositories in one GraphQL query (see GitHubClient)."""
+        try:
+            payload = await self._post_graphql(self.client._repositories_query(batch))
+        except _ERRORS as e:
+            print(f"⚠️  Error fetching repository batch: {e}")
+            return None
+        return self.client._repositories_from_payload(batch, payload)
+
+    async def get_repo_languages(self, owner: str, repo: str) -> Dict[str, int]:
+        """
+        Get repository language statistics.
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+
+        Returns:
+            Dictionary mapping language names to bytes of code
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_repo_languages, owner, repo)
+        bundle = await self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['languages']
+
+        try:
+            return await self._get_json(f"{self.client.BASE_URL}/repos/{owner}/{repo}/languages")
+        except _ERRORS:
+            return {}
+
+    async def get_repo_topics(self, owner: str, repo: str) -> List[str]:
+        """
+        Get repository topics.
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+
+        Returns:
+            List of topic strings
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_repo_topics, owner, repo)
+        bundle = await self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['topics']
+
+        try:
+            data = await self._get_json(f"{self.client.BASE_URL}/repos/{owner}/{repo}/topics")
+            return data.get('names', [])
+        except _ERRORS:
+            return []
+
+    async def get_repo_readme(self, owner: str, repo: str) -> Optional[str]:
+        """
+        Get repository README content.
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+
+        Returns:
+            README content as string, or None if not found
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_repo_readme, owner, repo)
+        bundle = await self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['readme']
+
+        try:
+            content = (await self._get_json(f"{self.client.BASE_URL}/repos/{owner}/{repo}/readme")).get('content', '')
+            return base64.b64decode(content).decode('utf-8')
+        except _ERRORS:
+            return None
+
+    async def get_repo_bundle(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch what an analysis needs from the API in a single GraphQL query (see GitHubClient.get_repo_bundle).
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+
+        Returns:
+            The bundle, or None if the query failed or there is no token
+        """
+        if aiohttp is None:
+            return await self._in_executor(self.client.get_repo_bundle, owner, repo)
+        if not self.client.token:
+            return None
+        try:
+            payload = await self._post_graphql(self.client._bundle_query(owner, repo))
+        except _ERRORS as e:
+            print(f"⚠️  Error fetching repository bundle: {e}")
+            return None
+        return self.client._bundle_from_payload(payload)
+
+    async def _bundle(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """The bundle answering get_repo_* calls in GraphQL mode, shared with the GitHubClient."""
+        if not self.client.graphql or not self.client.token:
+            return None
+        found, bundle = self.client._recall_bundle(owner, repo)
+        if not found:
+            bundle = await self.get_repo_bundle(owner, repo)
+            self.client._remember_bundle(owner, repo, bundle)
+        return bundle
+
+
+# Failures of a request, or of decoding its response, that calls report with their fallback result
+_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError) if aiohttp is not None else ()
@@ -0,0 +1,67 @@
+"""
+Content-addressed cache of per-file results shared across repositories.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from .sqlite_cache import SQLiteCache
+
+
+class BlobCache(SQLiteCache):
+    """
+    SQLite-backed cache of per-file results keyed by git blob id.
+
+    Identical file contents have the same blob id in every repository, so
+    results computed for one repository are reused for its forks and for
+    vendored copies of the same files. The cache is bounded by the total
+    size of the stored results; when it grows past max_bytes the least
+    recently used results are evicted. Processes can share the database
+    (see SQLiteCache); call flush() after an analysis.
+    """
+
+    TABLE = 'results'
+    COLUMNS = ('sha TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,'
+               ' size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (sha, key)')
+    KEY_COLUMNS = ('sha', 'key')
+    DESCRIPTION = 'Blob cache'
+
+    # Default bound on the stored (JSON-encoded) result size
+    DEFAULT_MAX_BYTES = 64 << 20
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize blob cache.
+
+        Args:
+            path: Location of the SQLite database (':memory:' for a private in-memory cache)
+            max_bytes: Total result size kept before least recently used results are evicted
+        """
+        super().__init__(path, max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha: str, key: str) -> Any:
+        """
+        Return a cached result for a blob, or None if there is none.
+
+        Args:
+            sha: Git blob id of the file contents
+            key: Result name (must identify everything besides the contents
+                that the result depends on)
+        """
+        with self._lock:
+            row = self._select('value', (sha, key))
+            if row is None:
+                self.misses += 1
+                return None
+            self._touch((sha, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, sha: str, key: str, value: Any):
+        """Store a result for a blob, evicting old results if the cache grows too large."""
+        data = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            self._store((sha, key), {'value': data}, len(data))
@@ -2,12 +2,21 @@
 Code analyzer for understanding repository structure, patterns, and metrics.
 """
 
-import os
 import re
+import posixpath
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from collections import Counter, defaultdict
 
+from .git_objects import GitObjectError
+from .line_counter import count_lines
+from .lockfiles import LOCKFILE_PARSERS, parse_lockfile
+from .scanner import FileEntry, FileFlag, FileManifest, RepoScanner, skip_reason
+
+
+# Separators between the words of a file or directory name
+_NAME_TOKEN_SPLIT = re.compile(r'[\s._-]+')
+
 
 class CodeAnalyzer:
     """Analyzes codebase structure, patterns, and metrics."""
@@ -55,23 +64,82 @@ class CodeAnalyzer:
         '.dart': 'dart',
     }
     
-    def __init__(self):
-        """Initialize code analyzer."""
-        pass
+    # Line comment markers used for comment line counts
+    COMMENT_PREFIXES = {
+        'python': (b'#',),
+        'ruby': (b'#',),
+        'shell': (b'#',),
+        'r': (b'#',),
+        'php': (b'//', b'#', b'/*', b'*'),
+        'matlab': (b'%',),
+        'html': (b'<!--',),
+        'vue': (b'<!--', b'//'),
+        'css': (b'/*', b'*'),
+        'scss': (b'//', b'/*', b'*'),
+        'sass': (b'//', b'/*'),
+    }
+    
+    # C-style comments are the default for the remaining languages
+    DEFAULT_COMMENT_PREFIXES = (b'//', b'/*', b'*')
+    
+    # Code files whose lines are not counted
+    COUNT_ONLY_FLAGS = FileFlag.OVERSIZED | FileFlag.BINARY
     
-    def analyze_structure(self, repo_path: Optional[Path]) -> Dict[str, Any]:
+    # Files left out of the metrics
+    METRICS_EXCLUDE_FLAGS = FileFlag.HIDDEN | FileFlag.BUILD_OUTPUT | FileFlag.VENDORED
+    
+    # Dependency files that are not parsed
+    MANIFEST_EXCLUDE_FLAGS = FileFlag.BUILD_OUTPUT | FileFlag.VENDORED
+    
+    # Architectural patterns and practices, detected by any of their indicators:
+    # '.ext' is a file extension, 'a/b' a relative directory path, anything
+    # else a file or directory name, name without extension, or a name token
+    # ('api' matches api/, api_client.py and routes.api.ts, but not rapid.py)
+    PATTERN_INDICATORS = {
+        'MVC': ['models', 'views', 'controllers'],
+        'REST API': ['api', 'routes', 'endpoints'],
+        'Microservices': ['services', 'microservice'],
+        'Docker': ['Dockerfile', 'docker-compose'],
+        'Kubernetes': ['k8s', 'kubernetes', 'deployment.yaml'],
+        'Testing': ['test', 'spec', '__tests__', 'tests'],
+        'CI/CD': ['.github/workflows', '.gitlab-ci.yml', '.travis.yml'],
+        'TypeScript': ['tsconfig.json', '.ts'],
+        'React': ['react', '.jsx', '.tsx'],
+        'Vue': ['vue.config.js', '.vue'],
+        'Django': ['manage.py', 'settings.py'],
+        'Flask': ['app.py', 'flask'],
+        'Express': ['express', 'app.js', 'server.js'],
+    }
+    
+    def __init__(self, scanner: Optional[RepoScanner] = None):
+        """
+        Initialize code analyzer.
+        
+        Args:
+            scanner: Scanner used when a stage is called without a manifest
+        """
+        self.scanner = scanner or RepoScanner(set(self.LANGUAGE_EXTENSIONS))
+    
+    def _get_manifest(self, repo_path: Path, manifest: Optional[FileManifest]) -> FileManifest:
+        """Return the shared manifest, scanning the repository only if none was given."""
+        return manifest if manifest is not None else self.scanner.scan(repo_path)
+    
+    def analyze_structure(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> Dict[str, Any]:
         """
         Analyze repository structure.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
             Dictionary with structure analysis
         """
-        if not repo_path or not repo_path.exists():
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return {}
         
+        manifest = self._get_manifest(repo_path, manifest)
+        
         structure = {
             'has_readme': False,
             'has_license': False,
@@ -89,63 +157,56 @@ class CodeAnalyzer:
             'CI': ['.github/workflows', '.gitlab-ci.yml', '.travis.yml', 'circleci', '.circleci'],
         }
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden directories and common ignore patterns
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env']]
-            
-            rel_root = Path(root).relative_to(repo_path)
-            
-            # Check for common files
-            for file in files:
-                file_lower = file.lower()
-                if any(pattern in file_lower for pattern in common_files['README']):
-                    structure['has_readme'] = True
-                if any(pattern in file_lower for pattern in common_files['LICENSE']):
-                    structure['has_license'] = True
-                if file_lower in ['test', 'tests', 'spec', '__tests__'] or 'test' in str(rel_root).lower():
-                    structure['has_tests'] = True
-                if 'doc' in str(rel_root).lower() or file_lower.endswith('.md'):
-                    structure['has_docs'] = True
-            
-            # Check for CI/CD
-            if any(ci_pattern in str(rel_root) for ci_pattern in common_files['CI']):
+        # Check for common files
+        for entry in manifest.files:
+            file_lower = entry.name.lower()
+            dir_lower = entry.dir.lower()
+            if any(pattern in file_lower for pattern in common_files['README']):
+                structure['has_readme'] = True
+            if any(pattern in file_lower for pattern in common_files['LICENSE']):
+                structure['has_license'] = True
+            if file_lower in ['test', 'tests', 'spec', '__tests__'] or 'test' in dir_lower:
+                structure['has_tests'] = True
+            if 'doc' in dir_lower or file_lower.endswith('.md'):
+                structure['has_docs'] = True
+        
+        # Check for CI/CD
+        for rel_dir in manifest.directories:
+            if any(ci_pattern in rel_dir for ci_pattern in common_files['CI']):
                 structure['has_ci'] = True
-            
-            # Collect top-level directories
-            if rel_root == Path('.'):
-                structure['directories'] = [d for d in dirs if not d.startswith('.')]
+                break
+        
+        # Collect top-level directories
+        structure['directories'] = list(manifest.top_level_dirs)
         
         return structure
     
-    def detect_languages(self, repo_path: Optional[Path]) -> Dict[str, float]:
+    def detect_languages(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> Dict[str, float]:
         """
         Detect programming languages used in repository.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
             Dictionary mapping language names to percentage of code
         """
-        if not repo_path or not repo_path.exists():
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return {}
         
+        manifest = self._get_manifest(repo_path, manifest)
+        
         language_files = Counter()
         total_files = 0
         
-        for root, dirs, files in os.walk(repo_path):
-            # Skip common ignore patterns
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', 'dist', 'build']]
-            
-            for file in files:
-                if file.startswith('.'):
-                    continue
-                
-                ext = Path(file).suffix.lower()
-                if ext in self.LANGUAGE_EXTENSIONS:
-                    language = self.LANGUAGE_EXTENSIONS[ext]
-                    language_files[language] += 1
-                    total_files += 1
+        # Like GitHub's linguist, vendored and generated code does not count towards languages
+        for entry in manifest.iter_files(include=FileFlag.CODE,
+                                         exclude=FileFlag.HIDDEN | FileFlag.BUILD_OUTPUT | FileFlag.VENDORED
+                                         | FileFlag.GENERATED):
+            language = self.LANGUAGE_EXTENSIONS[entry.ext]
+            language_files[language] += 1
+            total_files += 1
         
         if total_files == 0:
             return {}
@@ -153,39 +214,165 @@ class CodeAnalyzer:
         # Convert to percentages
         return {lang: (count / total_files) * 100 for lang, count in language_files.items()}
     
-    def extract_dependencies(self, repo_path: Optional[Path]) -> Dict[str, List[str]]:
+    def extract_dependencies(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> Dict[str, List[str]]:
         """
         Extract dependencies from dependency files.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
-            Dictionary mapping language to list of dependencies
+            Dictionary mapping language to list of dependencies, deduplicated
+            across every sub-project of the repository
         """
-        if not repo_path or not repo_path.exists():
+        return self.merge_dependencies(self.extract_dependencies_by_subproject(repo_path, manifest))
+    
+    def extract_dependencies_by_subproject(self, repo_path: Optional[Path],
+                                           manifest: Optional[FileManifest] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Extract dependencies of every sub-project of a (mono)repository.
+        
+        Dependency files anywhere in the tree are found by the scanner
+        (flagged MANIFEST) and parsed; each directory holding
+        one is a sub-project.
+        
+        Args:
+            repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
+        
+        Returns:
+            Dictionary mapping sub-project directory ('.' for the root) to
+            its language -> dependencies mapping
+        """
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return {}
         
-        dependencies = {}
+        manifest = self._get_manifest(repo_path, manifest)
+        entries = [entry for entry in self._manifest_files(manifest) if entry.name not in LOCKFILE_PARSERS]
+        results = self._parse_files(manifest, entries, 'dependencies', self._parse_dependencies)
+        
+        subprojects: Dict[str, Dict[str, List[str]]] = {}
+        for entry in entries:
+            for language, deps in results[entry.path].items():
+                if deps:
+                    known = subprojects.setdefault(entry.dir, {}).setdefault(language, [])
+                    known.extend(dep for dep in deps if dep not in known)
+        return subprojects
+    
+    @staticmethod
+    def merge_dependencies(subprojects: Dict[str, Dict[str, List[str]]]) -> Dict[str, List[str]]:
+        """Combine per-sub-project dependencies into one deduplicated list per language."""
+        merged: Dict[str, Dict[str, None]] = {}
+        for dependencies in subprojects.values():
+            for language, deps in dependencies.items():
+                merged.setdefault(language, {}).update(dict.fromkeys(deps))
+        return {language: list(deps) for language, deps in merged.items()}
+    
+    def _manifest_files(self, manifest: FileManifest) -> List[FileEntry]:
+        """Dependency files outside build output and vendored code, in path order."""
+        return list(manifest.iter_files(include=FileFlag.MANIFEST, exclude=self.MANIFEST_EXCLUDE_FLAGS))
+    
+    def prepare_file(self, manifest: FileManifest, entry: FileEntry):
+        """
+        Compute the per-file results of every stage for one file while its contents are readable.
         
-        for language, files in self.DEPENDENCY_FILES.items():
-            deps = []
-            for dep_file in files:
-                file_path = repo_path / dep_file
-                if file_path.exists():
-                    deps.extend(self._parse_dependency_file(file_path, language))
-            
-            if deps:
-                dependencies[language] = list(set(deps))  # Remove duplicates
+        For sources that can only be read once, such as a streamed archive
+        (see RepoScanner.scan_tarball): the results are stored in the
+        manifest's index, where the stages find them later without reading
+        the file again.
+        """
+        if entry.has(FileFlag.MANIFEST) and not entry.has(self.MANIFEST_EXCLUDE_FLAGS):
+            if entry.name in LOCKFILE_PARSERS:
+                key, parse = 'lockfile', self._parse_lockfile
+            else:
+                key, parse = 'dependencies', self._parse_dependencies
+            manifest.cached(entry, key, lambda: parse(manifest, entry), f'{key}:{entry.name}')
+        
+        if entry.has(FileFlag.CODE) and not entry.has(self.METRICS_EXCLUDE_FLAGS):
+            if not manifest.content_flags(entry) & self.COUNT_ONLY_FLAGS:
+                self._line_counts(manifest, entry)
+    
+    def _parse_files(self, manifest: FileManifest, entries: List[FileEntry], key: str,
+                     parse: Callable[[FileManifest, FileEntry], Any]) -> Dict[str, Any]:
+        """
+        Parse files, reusing results from the index and the blob cache.
+        
+        Parsing is CPU-bound Python, so it runs on the calling thread:
+        worker threads would only contend for the GIL, and a process pool
+        would have to re-open the manifest's sources (git objects, a
+        streamed archive) in every worker.
+        
+        Returns:
+            Mapping of relative path to parse result
+        """
+        results = {}
+        for entry in entries:
+            value = manifest.lookup(entry, key, f'{key}:{entry.name}')
+            if value is None:
+                value = parse(manifest, entry)
+                manifest.store(entry, key, value, f'{key}:{entry.name}')
+            results[entry.path] = value
+        return results
+    
+    def _parse_dependencies(self, manifest: FileManifest, entry: FileEntry) -> Dict[str, List[str]]:
+        """Parse one dependency file for every language that uses its name."""
+        try:
+            content = manifest.read_text(entry)
+        except (OSError, GitObjectError):
+            return {}
+        file_path = manifest.full_path(entry)
+        return {language: self._parse_dependency_file(file_path, language, content)
+                for language, files in self.DEPENDENCY_FILES.items() if entry.name in files}
+    
+    def extract_locked_dependencies(self, repo_path: Optional[Path],
+                                    manifest: Optional[FileManifest] = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Extract resolved package versions from the lockfiles of every sub-project.
+        
+        Lockfiles are parsed line by line, so even lockfiles of tens of MB
+        (which the size cap would otherwise exclude) are read with bounded memory.
         
-        return dependencies
+        Args:
+            repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
+        
+        Returns:
+            Dictionary mapping language to {package name: resolved versions}
+        """
+        if manifest is None and (not repo_path or not repo_path.exists()):
+            return {}
+        
+        manifest = self._get_manifest(repo_path, manifest)
+        entries = [entry for entry in self._manifest_files(manifest) if entry.name in LOCKFILE_PARSERS]
+        results = self._parse_files(manifest, entries, 'lockfile', self._parse_lockfile)
+        
+        locked: Dict[str, Dict[str, List[str]]] = {}
+        for entry in entries:
+            language, _ = LOCKFILE_PARSERS[entry.name]
+            merged = locked.setdefault(language, {})
+            for package, versions in results[entry.path].items():
+                known = merged.setdefault(package, [])
+                known.extend(v for v in versions if v not in known)
+        
+        return locked
+    
+    def _parse_lockfile(self, manifest: FileManifest, entry: FileEntry) -> Dict[str, List[str]]:
+        """Parse a single lockfile, returning no packages if it cannot be read."""
+        try:
+            with manifest.open_binary(entry) as raw:
+                return parse_lockfile(entry.name, raw)
+        except (OSError, GitObjectError) as e:
+            print(f"⚠️  Could not parse {entry.path}: {e}")
+            return {}
     
-    def _parse_dependency_file(self, file_path: Path, language: str) -> List[str]:
+    def _parse_dependency_file(self, file_path: Path, language: str, content: Optional[str] = None) -> List[str]:
         """Parse a dependency file and extract package names."""
         deps = []
         
         try:
-            content = file_path.read_text()
+            if content is None:
+                content = file_path.read_text()
             
             if language == 'python':
                 if file_path.name == 'requirements.txt':
@@ -231,100 +418,129 @@ class CodeAnalyzer:
         
         return deps
     
-    def identify_patterns(self, repo_path: Optional[Path]) -> List[str]:
+    def identify_patterns(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> List[str]:
         """
         Identify architectural patterns and practices.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
             List of identified patterns
         """
-        if not repo_path or not repo_path.exists():
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return []
         
-        patterns = []
-        
-        # Check for common patterns
-        patterns_to_check = {
-            'MVC': ['models', 'views', 'controllers'],
-            'REST API': ['api', 'routes', 'endpoints'],
-            'Microservices': ['services', 'microservice'],
-            'Docker': ['Dockerfile', 'docker-compose'],
-            'Kubernetes': ['k8s', 'kubernetes', 'deployment.yaml'],
-            'Testing': ['test', 'spec', '__tests__', 'tests'],
-            'CI/CD': ['.github/workflows', '.gitlab-ci.yml', '.travis.yml'],
-            'TypeScript': ['tsconfig.json', '.ts'],
-            'React': ['react', 'jsx', 'tsx'],
-            'Vue': ['vue.config.js', '.vue'],
-            'Django': ['manage.py', 'settings.py'],
-            'Flask': ['app.py', 'flask'],
-            'Express': ['express', 'app.js', 'server.js'],
-        }
+        manifest = self._get_manifest(repo_path, manifest)
         
-        repo_str = str(repo_path).lower()
-        file_list = []
-        for root, dirs, files in os.walk(repo_path):
-            file_list.extend([f.lower() for f in files])
-            file_list.extend([d.lower() for d in dirs])
+        names, extensions, dir_paths = self._name_index(repo_path, manifest)
         
-        all_content = ' '.join(file_list) + ' ' + repo_str
+        def present(indicator: str) -> bool:
+            if '/' in indicator:
+                if indicator in dir_paths:
+                    return True
+                # Paths below pruned directories (e.g. .github/) were not listed
+                return manifest.blob_reader is None and (manifest.root / indicator).exists()
+            if indicator.startswith('.') and indicator.count('.') == 1:
+                return indicator in extensions
+            return indicator in names
         
-        for pattern_name, indicators in patterns_to_check.items():
-            if any(ind.lower() in all_content for ind in indicators):
-                patterns.append(pattern_name)
+        return [pattern_name for pattern_name, indicators in self.PATTERN_INDICATORS.items()
+                if any(present(indicator.lower()) for indicator in indicators)]
+    
+    @staticmethod
+    def _name_index(repo_path: Path, manifest: FileManifest):
+        """
+        Build lookup sets for pattern indicators from a manifest.
         
-        return list(set(patterns))
+        Returns:
+            (names, extensions, dir_paths): lower-cased basenames, stems and
+            name tokens of every file and directory; file extensions; and
+            relative directory paths
+        """
+        names = set()
+        extensions = set()
+        seen = set()
+        
+        def add_name(name: str):
+            if name in seen:
+                return
+            seen.add(name)
+            stem = posixpath.splitext(name)[0]
+            names.add(name)
+            names.add(stem)
+            names.update(token for token in _NAME_TOKEN_SPLIT.split(stem) if token)
+        
+        for entry in manifest.files:
+            add_name(entry.name.lower())
+            extensions.add(entry.ext)
+        
+        dir_paths = set()
+        for rel_dir in manifest.directories + manifest.pruned_directories:
+            if rel_dir != '.':
+                dir_paths.add(rel_dir.lower())
+                add_name(posixpath.basename(rel_dir).lower())
+        
+        # The clone directory is named after the repository (e.g. 'owner_react')
+        repo_name = Path(repo_path).name.lower()
+        if repo_name.endswith('.git'):
+            repo_name = repo_name[:-4]
+        names.update(token for token in _NAME_TOKEN_SPLIT.split(repo_name) if token)
+        
+        return names, extensions, dir_paths
     
-    def calculate_metrics(self, repo_path: Optional[Path]) -> Dict[str, Any]:
+    def calculate_metrics(self, repo_path: Optional[Path], manifest: Optional[FileManifest] = None) -> Dict[str, Any]:
         """
         Calculate codebase metrics.
         
         Args:
             repo_path: Path to repository root
+            manifest: Shared file manifest (scanned on demand if omitted)
         
         Returns:
             Dictionary with various metrics
         """
-        if not repo_path or not repo_path.exists():
+        if manifest is None and (not repo_path or not repo_path.exists()):
             return {}
         
+        manifest = self._get_manifest(repo_path, manifest)
+        
         metrics = {
             'total_files': 0,
             'total_lines': 0,
             'code_files': 0,
             'test_files': 0,
             'avg_file_size': 0,
+            'total_bytes': 0,
+            'blank_lines': 0,
+            'comment_lines': 0,
+            'skipped_files': [],
         }
         
-        code_extensions = set(self.LANGUAGE_EXTENSIONS.keys())
         total_lines = 0
         code_file_count = 0
         
-        for root, dirs, files in os.walk(repo_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', 'dist', 'build']]
+        for entry in manifest.iter_files(exclude=self.METRICS_EXCLUDE_FLAGS):
+            metrics['total_files'] += 1
             
-            for file in files:
-                if file.startswith('.'):
-                    continue
+            if entry.has(FileFlag.CODE):
+                code_file_count += 1
+                if entry.has(FileFlag.TEST):
+                    metrics['test_files'] += 1
                 
-                file_path = Path(root) / file
-                ext = file_path.suffix.lower()
-                
-                metrics['total_files'] += 1
+                # Binary and oversized files are counted by size only
+                reason = skip_reason(manifest.content_flags(entry) & self.COUNT_ONLY_FLAGS)
+                if reason:
+                    metrics['total_bytes'] += entry.size
+                    metrics['skipped_files'].append({'file': entry.path, 'reason': reason})
+                    continue
                 
-                if ext in code_extensions:
-                    code_file_count += 1
-                    if 'test' in str(file_path).lower():
-                        metrics['test_files'] += 1
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = len(f.readlines())
-                            total_lines += lines
-                    except:
-                        pass
+                counts = self._line_counts(manifest, entry)
+                total_lines += counts['lines']
+                metrics['total_bytes'] += counts['bytes']
+                metrics['blank_lines'] += counts['blank']
+                metrics['comment_lines'] += counts['comment']
         
         metrics['code_files'] = code_file_count
         metrics['total_lines'] = total_lines
@@ -332,4 +548,30 @@ class CodeAnalyzer:
             metrics['avg_file_size'] = total_lines / code_file_count
         
         return metrics
-
+    
+    def _line_counts(self, manifest: FileManifest, entry: FileEntry) -> Dict[str, int]:
+        """
+        Line counts of a file, reused from the index or the blob cache when available.
+        
+        A file that cannot be read counts as empty, and that result is not
+        stored: the read may fail only this once.
+        """
+        # Counts only depend on the contents and the language's comment markers
+        shared_key = f"line_counts:{self.LANGUAGE_EXTENSIONS.get(entry.ext, '')}"
+        counts = manifest.lookup(entry, 'line_counts', shared_key)
+        if counts is None:
+            counts = self._count_lines(manifest, entry)
+            if counts is None:
+                return {'lines': 0, 'bytes': 0, 'blank': 0, 'comment': 0}
+            manifest.store(entry, 'line_counts', counts, shared_key)
+        return counts
+    
+    def _count_lines(self, manifest: FileManifest, entry: FileEntry) -> Optional[Dict[str, int]]:
+        """Count lines, bytes, blank lines and comment lines of a single file (None if it cannot be read)."""
+        language = self.LANGUAGE_EXTENSIONS.get(entry.ext)
+        prefixes = self.COMMENT_PREFIXES.get(language, self.DEFAULT_COMMENT_PREFIXES)
+        try:
+            with manifest.open_binary(entry) as raw:
+                return count_lines(raw, prefixes)
+        except (OSError, GitObjectError):
+            return None
@@ -0,0 +1,109 @@
+"""
+Persistent per-clone index of file results for incremental re-analysis.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+
+class FileIndex:
+    """
+    On-disk index of per-file analysis results.
+
+    Results are keyed by relative path and stored together with the file's
+    (size, mtime, inode) stat signature, or its blob id for manifests built
+    from git objects. A result is only returned while the signature still
+    matches, so re-analysis only re-processes changed files.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize file index.
+
+        Args:
+            path: Location of the JSON index file (None keeps it in memory only)
+        """
+        self.path = Path(path) if path else None
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen: Set[str] = set()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> 'FileIndex':
+        """Load an index from disk, starting empty if it is missing or unreadable."""
+        index = cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == cls.VERSION:
+                index.files = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+        return index
+
+    @staticmethod
+    def signature(entry) -> list:
+        """Stat signature of a manifest entry."""
+        if entry.sha:
+            return [entry.sha]
+        return [entry.size, entry.mtime, entry.inode]
+
+    def get(self, entry, key: str) -> Any:
+        """
+        Return a cached result for an entry, or None if missing or stale.
+
+        Args:
+            entry: FileEntry from the current manifest
+            key: Result name (e.g. 'lines')
+        """
+        self._seen.add(entry.path)
+        record = self.files.get(entry.path)
+        if record is not None and record['stat'] == self.signature(entry):
+            value = record['results'].get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, entry, key: str, value: Any):
+        """Store a result for an entry, discarding results for an older version of the file."""
+        self._seen.add(entry.path)
+        signature = self.signature(entry)
+        record = self.files.get(entry.path)
+        if record is None or record['stat'] != signature:
+            record = {'stat': signature, 'results': {}}
+            self.files[entry.path] = record
+        record['results'][key] = value
+        self._dirty = True
+
+    def save(self, prune: bool = True):
+        """
+        Write the index to disk.
+
+        Args:
+            prune: Drop records for files that were not looked up in this run
+        """
+        if prune and self._seen:
+            stale = set(self.files) - self._seen
+            for path in stale:
+                del self.files[path]
+            self._dirty = self._dirty or bool(stale)
+
+        if not self.path or not self._dirty:
+            return
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'files': self.files}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️  Failed to save file index: {e}")
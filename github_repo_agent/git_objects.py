@@ -0,0 +1,290 @@
+"""
+Access to repository contents straight from git objects, without a checkout.
+"""
+
+import hashlib
+import io
+import subprocess
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+class GitObjectError(Exception):
+    """Raised when git cannot list or read the requested objects."""
+
+
+def _git(git_dir: Path, *args: str, input: Optional[bytes] = None) -> bytes:
+    """Run a git command against a repository and return its stdout."""
+    try:
+        result = subprocess.run(
+            ['git', '--git-dir', str(git_dir), *args],
+            input=input,
+            check=True,
+            capture_output=True
+        )
+    except subprocess.CalledProcessError as e:
+        raise GitObjectError(e.stderr.decode('utf-8', errors='ignore').strip() or str(e))
+    return result.stdout
+
+
+def is_partial_clone(git_dir: Path) -> bool:
+    """Whether a repository was cloned with --filter, so blobs may be missing locally."""
+    # Older git records the promisor remote under extensions.partialClone,
+    # newer git only marks the remote itself
+    try:
+        out = _git(git_dir, 'config', '--get-regexp', r'^(extensions\.partialclone|remote\..*\.promisor)$')
+    except GitObjectError:
+        return False  # No matching key
+    return any(value.strip() and value.strip() != b'false'
+               for _, _, value in (line.partition(b' ') for line in out.splitlines()))
+
+
+def missing_blobs(git_dir: Path, rev: str = 'HEAD') -> List[str]:
+    """
+    Blobs of a revision's tree that a partial clone has not fetched yet.
+
+    Args:
+        git_dir: Path to a bare repository (or a .git directory)
+        rev: Tree-ish to inspect
+    """
+    out = _git(git_dir, 'rev-list', '--objects', '--missing=print', f'{rev}^{{tree}}')
+    return [line[1:].decode() for line in out.splitlines() if line.startswith(b'?')]
+
+
+def fetch_blobs(git_dir: Path, shas: List[str], remote: str = 'origin'):
+    """
+    Fetch missing blobs of a partial clone from its promisor remote in one request.
+
+    Reading a missing blob makes git fetch it on its own, one round trip
+    per object; fetching them up front in a batch avoids that.
+    """
+    if not shas:
+        return
+    _git(git_dir, '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', '-q', remote, '--no-tags',
+         '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none', '--stdin',
+         input='\n'.join(shas).encode('ascii') + b'\n')
+
+
+def list_tree(git_dir: Path, rev: str = 'HEAD') -> Iterator[Tuple[str, str, Optional[int], str]]:
+    """
+    Enumerate every blob reachable from a revision with `git ls-tree -r`.
+
+    In partial clones, sizes are only looked up for blobs that are present
+    (asking git for the size of a missing blob would fetch it); blobs the
+    clone filter left out are reported with a size of None.
+
+    Args:
+        git_dir: Path to a bare repository (or a .git directory)
+        rev: Tree-ish to list
+
+    Yields:
+        (mode, sha, size, path) tuples for every blob in the tree
+    """
+    if not is_partial_clone(git_dir):
+        for record in _git(git_dir, 'ls-tree', '-r', '-l', '-z', rev).split(b'\0'):
+            if not record:
+                continue
+            meta, _, path = record.partition(b'\t')
+            mode, obj_type, sha, size = meta.split()
+            if obj_type != b'blob':
+                continue  # Submodule commits have no content here
+            yield (mode.decode(), sha.decode(), int(size), path.decode('utf-8', errors='surrogateescape'))
+        return
+
+    missing = set(missing_blobs(git_dir, rev))
+    blobs = []
+    for record in _git(git_dir, 'ls-tree', '-r', '-z', rev).split(b'\0'):
+        if not record:
+            continue
+        meta, _, path = record.partition(b'\t')
+        mode, obj_type, sha = meta.split()
+        if obj_type == b'blob':
+            blobs.append((mode.decode(), sha.decode(), path.decode('utf-8', errors='surrogateescape')))
+
+    present = sorted({sha for _, sha, _ in blobs if sha not in missing})
+    sizes = {}
+    if present:
+        out = _git(git_dir, 'cat-file', '--batch-check=%(objectname) %(objectsize)',
+                   input='\n'.join(present).encode('ascii') + b'\n')
+        for line in out.splitlines():
+            sha, _, size = line.partition(b' ')
+            if size.isdigit():
+                sizes[sha.decode()] = int(size)
+
+    for mode, sha, path in blobs:
+        yield (mode, sha, sizes.get(sha), path)
+
+
+def worktree_blob_ids(repo_path: Path) -> Dict[str, str]:
+    """
+    Blob ids of the tracked files of a working tree that are unchanged since checkout.
+
+    Ids come from the git index (`git ls-files -s`); files that
+    `git diff-files` reports as changed are left out, so every returned id
+    matches the file on disk. Returns an empty dict outside a git working tree.
+
+    Args:
+        repo_path: Path to the working tree root
+
+    Returns:
+        Mapping of relative POSIX path to blob id
+    """
+    try:
+        staged = subprocess.run(['git', '-C', str(repo_path), 'ls-files', '-s', '-z'],
+                                check=True, capture_output=True).stdout
+        changed = subprocess.run(['git', '-C', str(repo_path), 'diff-files', '--name-only', '-z'],
+                                 check=True, capture_output=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    dirty = set(changed.split(b'\0'))
+    blob_ids = {}
+    for record in staged.split(b'\0'):
+        if not record:
+            continue
+        meta, _, path = record.partition(b'\t')
+        mode, sha, _stage = meta.split()
+        if mode != b'160000' and path not in dirty:  # Submodules are commits, not blobs
+            blob_ids[path.decode('utf-8', errors='surrogateescape')] = sha.decode()
+    return blob_ids
+
+
+def hash_blob(stream: BinaryIO, size: int, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the git blob id of a stream's contents, as `git hash-object` would.
+
+    Args:
+        stream: Binary file-like object positioned at the start
+        size: Number of bytes the stream holds
+        chunk_size: Size of each read
+    """
+    digest = hashlib.sha1(b'blob %d\0' % size)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GitBlobReader:
+    """
+    Streams blob contents through one long-lived `git cat-file --batch` process.
+
+    The process is started lazily on the first read and shared by every
+    caller; reads are serialized so the reader is safe to use from threads.
+    """
+
+    def __init__(self, git_dir: Path):
+        """
+        Initialize blob reader.
+
+        Args:
+            git_dir: Path to a bare repository (or a .git directory)
+        """
+        self.git_dir = Path(git_dir)
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        """Start (or restart) the cat-file process."""
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ['git', '--git-dir', str(self.git_dir), 'cat-file', '--batch'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        return self._proc
+
+    def read(self, sha: str) -> bytes:
+        """
+        Read the contents of a blob.
+
+        Args:
+            sha: Object id of the blob
+
+        Returns:
+            Raw blob contents
+        """
+        with self._lock:
+            proc = self._start()
+            proc.stdin.write(sha.encode('ascii') + b'\n')
+            proc.stdin.flush()
+
+            header = proc.stdout.readline().split()
+            if len(header) != 3:
+                raise GitObjectError(f"Object {sha} is missing")
+
+            size = int(header[2])
+            data = proc.stdout.read(size)
+            proc.stdout.read(1)  # Trailing newline after every object
+            return data
+
+    def open(self, sha: str) -> BinaryIO:
+        """
+        Stream the contents of a blob without holding them in memory.
+
+        read() returns whole blobs, which is cheapest for the small files
+        that make up most of a repository; for large ones, this reads
+        through a `git cat-file blob` process of their own instead, so
+        memory is bounded by the read size. Close the stream when done.
+
+        Args:
+            sha: Object id of the blob
+
+        Returns:
+            Binary stream of the blob contents; reading it raises
+            GitObjectError if the blob is missing
+        """
+        proc = subprocess.Popen(
+            ['git', '--git-dir', str(self.git_dir), 'cat-file', 'blob', sha],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        return io.BufferedReader(_BlobStream(proc, sha))
+
+    def close(self):
+        """Stop the cat-file process."""
+        with self._lock:
+            if self._proc is not None:
+                try:
+                    self._proc.stdin.close()
+                    self._proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proc.kill()
+                self._proc = None
+
+    def __enter__(self) -> 'GitBlobReader':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _BlobStream(io.RawIOBase):
+    """Output of a `git cat-file blob` process, checked for success once it ends."""
+
+    def __init__(self, proc: subprocess.Popen, sha: str):
+        self._proc = proc
+        self._sha = sha
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._proc.stdout.readinto(buffer)
+        if not count and self._proc.wait() != 0:
+            raise GitObjectError(f"Object {self._sha} is missing")
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._proc.stdout.close()
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+        super().close()
@@ -3,22 +3,87 @@ GitHub API client for fetching repository information.
 """
 
 import os
+import hashlib
+import json
+import random
+import threading
+import time
 import requests
-from typing import Dict, Optional, List
+from requests.adapters import HTTPAdapter
+from typing import Any, BinaryIO, Dict, Iterable, Mapping, Optional, List, Tuple
 from urllib.parse import urljoin
 
+from .response_cache import ResponseCache
+
 
 class GitHubClient:
-    """Client for interacting with GitHub API."""
+    """
+    Client for interacting with GitHub API.
+    
+    All requests go through one pooled session, so calls reuse keep-alive
+    connections instead of opening a new TCP and TLS connection each time.
+    Server errors, secondary rate limits and connection failures are
+    retried with jittered exponential backoff. With a ResponseCache, API
+    responses are reused and revalidated with conditional requests.
+    
+    In GraphQL mode, the first call for a repository fetches its metadata,
+    languages, topics, README, root tree and root dependency manifests in
+    one GraphQL query (see get_repo_bundle), and the other get_repo_*
+    calls are answered from it in the REST shapes. GraphQL needs a token;
+    without one, or if the query fails, the REST endpoints are used.
+    """
     
     BASE_URL = "https://api.github.com"
     
-    def __init__(self, token: Optional[str] = None):
+    # Connections kept open per host
+    DEFAULT_POOL_SIZE = 10
+    
+    # Seconds to wait for a connection and for each read from the server
+    DEFAULT_TIMEOUT = (5.0, 30.0)
+    
+    # Attempts after the first one, and the base delay in seconds between them
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_BACKOFF = 0.5
+    
+    # Longest delay before a retry; a longer Retry-After is not waited for
+    MAX_BACKOFF = 60.0
+    
+    # Statuses retried as transient server errors
+    RETRY_STATUSES = {500, 502, 503, 504}
+    
+    # Root files whose contents a repository bundle includes (lockfiles are
+    # left out: they can be megabytes)
+    BUNDLE_FILES = ('requirements.txt', 'setup.py', 'pyproject.toml', 'Pipfile', 'package.json',
+                    'tsconfig.json', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'go.mod',
+                    'Cargo.toml', 'Gemfile', 'composer.json')
+    
+    # README names tried by a repository bundle, in order
+    BUNDLE_READMES = ('README.md', 'README.rst', 'README.txt', 'README', 'readme.md', 'Readme.md')
+    
+    # Seconds a repository bundle answers get_repo_* calls
+    BUNDLE_TTL = 60.0
+    
+    # Repositories per get_many_repo_info query
+    DEFAULT_BATCH_SIZE = 50
+    
+    def __init__(self, token: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, cache: Optional[ResponseCache] = None,
+                 graphql: bool = False):
         """
         Initialize GitHub client.
         
         Args:
             token: GitHub personal access token (optional)
+            pool_size: Connections kept open per host (set to at least the
+                number of threads sharing the client)
+            timeout: (connect, read) timeouts in seconds
+            max_retries: Times a failed request is retried
+            backoff: Base delay in seconds; retry n waits a random time of up
+                to backoff * 2**n, or what the server asks in Retry-After
+            cache: Cache of API responses (the archive download is never cached)
+            graphql: Answer get_repo_* calls from one GraphQL query per
+                repository instead of one REST request each
         """
         self.token = token or os.getenv('GITHUB_TOKEN')
         self.headers = {
@@ -26,6 +91,131 @@ class GitHubClient:
         }
         if self.token:
             self.headers['Authorization'] = f'token {self.token}'
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cache = cache
+        self.graphql = graphql
+        self._bundles: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._bundles_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+    
+    def _get(self, url: str, stream: bool = False, headers: Optional[Dict[str, str]] = None,
+             json_body: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        GET a URL (or POST a JSON body to it) through the pooled session, retrying transient failures.
+        
+        Args:
+            url: URL to fetch
+            stream: Leave the body unread (the caller must consume or close it)
+            headers: Headers to send in addition to the client's own
+            json_body: POST this body instead of sending a GET (only for
+                requests that are safe to repeat, like GraphQL queries)
+        
+        Returns:
+            The final response, successful or not
+        
+        Raises:
+            requests.exceptions.RequestException: If the last attempt failed
+                to connect or timed out
+        """
+        headers = {**self.headers, **headers} if headers else self.headers
+        attempt = 0
+        while True:
+            try:
+                if json_body is None:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+                else:
+                    response = self.session.post(url, headers=headers, timeout=self.timeout, json=json_body)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or isinstance(e, requests.exceptions.SSLError):
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                delay = self._retry_delay(response, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+    
+    def _get_json(self, url: str) -> Any:
+        """
+        GET a JSON API resource, through the response cache if there is one.
+        
+        Raises:
+            requests.exceptions.RequestException: If the resource could not
+                be fetched or is not JSON
+        """
+        if self.cache is None:
+            response = self._get(url)
+            response.raise_for_status()
+            return response.json()
+        
+        key = self._cache_key(url)
+        body = self.cache.fresh(key)
+        if body is None:
+            response = self._get(url, headers=self.cache.validators(key))
+            if response.status_code == 304:
+                body = self.cache.revalidated(key)
+                if body is None:  # Evicted in the meantime
+                    response = self._get(url)
+            if body is None:
+                response.raise_for_status()
+                data = response.json()
+                self.cache.store(key, response.content, response.headers.get('ETag'),
+                                 response.headers.get('Last-Modified'))
+                return data
+        return json.loads(body)
+    
+    def _cache_key(self, url: str) -> str:
+        """Key of a URL's response in the response cache."""
+        # Responses vary with the credentials (private repositories)
+        return hashlib.sha256(self.headers.get('Authorization', '').encode()).hexdigest()[:16] + ' ' + url
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a response, or None if it should not be retried."""
+        text = response.text if response.status_code in (403, 429) else ''
+        return self._status_retry_delay(response.status_code, response.headers, text, attempt)
+    
+    def _status_retry_delay(self, status: int, headers: Mapping[str, str], text: str,
+                            attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a response, or None if it should not be retried.
+        
+        Args:
+            status: HTTP status of the response
+            headers: Response headers (looked up case-insensitively)
+            text: Response body (only needed for 403 and 429 responses)
+            attempt: Number of the attempt that got the response, from 0
+        """
+        if status in (403, 429):
+            # Only secondary rate limits clear quickly; the primary one lasts
+            # until X-RateLimit-Reset, and other 403s are missing permissions
+            if headers.get('X-RateLimit-Remaining') == '0' or (
+                    'Retry-After' not in headers and 'secondary rate limit' not in text.lower()):
+                return None
+        elif status not in self.RETRY_STATUSES:
+            return None
+        retry_after = headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                return None
+            return delay if delay <= self.MAX_BACKOFF else None
+        return self._backoff_delay(attempt)
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Jittered exponential delay before retry number attempt + 1."""
+        return random.uniform(0, min(self.MAX_BACKOFF, self.backoff * 2 ** attempt))
     
     def get_repo_info(self, owner: str, repo: str) -> Dict:
         """
@@ -38,24 +228,107 @@ class GitHubClient:
         Returns:
             Dictionary with repository information
         """
+        bundle = self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['info']
         url = f"{self.BASE_URL}/repos/{owner}/{repo}"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(url)
         except requests.exceptions.RequestException as e:
             print(f"⚠️  Error fetching repo info: {e}")
-            return {
-                'name': repo,
-                'full_name': f"{owner}/{repo}",
-                'html_url': f"https://github.com/{owner}/{repo}",
-                'description': '',
-                'language': None,
-                'stargazers_count': 0,
-                'forks_count': 0,
-                'open_issues_count': 0,
-            }
+            return self._placeholder_info(owner, repo)
+    
+    @staticmethod
+    def _placeholder_info(owner: str, repo: str) -> Dict:
+        """Repository information used when it could not be fetched."""
+        return {
+            'name': repo,
+            'full_name': f"{owner}/{repo}",
+            'html_url': f"https://github.com/{owner}/{repo}",
+            'description': '',
+            'language': None,
+            'stargazers_count': 0,
+            'forks_count': 0,
+            'open_issues_count': 0,
+        }
+    
+    def get_many_repo_info(self, repos: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Dict]:
+        """
+        Get information on many repositories, batch_size of them per GraphQL query.
+        
+        Each query asks for every repository of its batch under its own
+        alias, so a repository that is missing or inaccessible only fails
+        itself. GraphQL needs a token; without one, or for a batch whose
+        query fails as a whole, get_repo_info is called per repository.
+        
+        Args:
+            repos: Repositories as 'owner/name'
+            batch_size: Repositories per query
+        
+        Returns:
+            Dictionary mapping each 'owner/name' to information shaped like
+            get_repo_info's (the same placeholder for repositories that could
+            not be fetched)
+        """
+        names = list(dict.fromkeys(repos))
+        results: Dict[str, Dict] = {}
+        for start in range(0, len(names), max(1, batch_size)):
+            batch = names[start:start + max(1, batch_size)]
+            repositories = self._query_repositories(batch) if self.token else None
+            for i, full_name in enumerate(batch):
+                owner, _, repo = full_name.partition('/')
+                if repositories is None:
+                    results[full_name] = self.get_repo_info(owner, repo)
+                elif repositories[i] is None:
+                    results[full_name] = self._placeholder_info(owner, repo)
+                else:
+                    results[full_name] = self._info_from_graphql(repositories[i])
+        return results
+    
+    def _query_repositories(self, batch: List[str]) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """
+        Fetch the info fields of several repositories in one aliased GraphQL query.
+        
+        Returns:
+            The repositories in batch order (None for those that failed), or
+            None if the query failed as a whole
+        """
+        try:
+            response = self._get(f"{self.BASE_URL}/graphql", json_body=self._repositories_query(batch))
+            response.raise_for_status()
+            payload = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Error fetching repository batch: {e}")
+            return None
+        return self._repositories_from_payload(batch, payload)
+    
+    @staticmethod
+    def _repositories_query(batch: List[str]) -> Dict[str, Any]:
+        """Body of the GraphQL request for a batch of 'owner/name' repositories."""
+        params = ', '.join(f'$owner{i}: String!, $name{i}: String!' for i in range(len(batch)))
+        fields = '\n  '.join(f'repo{i}: repository(owner: $owner{i}, name: $name{i}) {{ ...info }}'
+                               for i in range(len(batch)))
+        variables = {}
+        for i, full_name in enumerate(batch):
+            variables[f'owner{i}'], _, variables[f'name{i}'] = full_name.partition('/')
+        return {'query': f'query({params}) {{\n  {fields}\n}}\n' + _INFO_FRAGMENT, 'variables': variables}
+    
+    @staticmethod
+    def _repositories_from_payload(batch: List[str],
+                                   payload: Dict[str, Any]) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """Repositories of a batch query's response (see _query_repositories)."""
+        data = payload.get('data')
+        if not data:
+            errors = '; '.join(error.get('message', '') for error in payload.get('errors') or [])
+            print(f"⚠️  Error fetching repository batch: {errors or 'no data'}")
+            return None
+        
+        repositories = [data.get(f'repo{i}') for i in range(len(batch))]
+        failed = [full_name for full_name, repository in zip(batch, repositories) if repository is None]
+        if failed:
+            print(f"⚠️  Could not fetch {len(failed)} repositor{'y' if len(failed) == 1 else 'ies'}: {', '.join(failed)}")
+        return repositories
     
     def get_repo_languages(self, owner: str, repo: str) -> Dict[str, int]:
         """
@@ -68,12 +341,13 @@ class GitHubClient:
         Returns:
             Dictionary mapping language names to bytes of code
         """
+        bundle = self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['languages']
         url = f"{self.BASE_URL}/repos/{owner}/{repo}/languages"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get_json(url)
         except requests.exceptions.RequestException:
             return {}
     
@@ -88,12 +362,13 @@ class GitHubClient:
         Returns:
             List of topic strings
         """
+        bundle = self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['topics']
         url = f"{self.BASE_URL}/repos/{owner}/{repo}/topics"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(url)
             return data.get('names', [])
         except requests.exceptions.RequestException:
             return []
@@ -109,14 +384,198 @@ class GitHubClient:
         Returns:
             README content as string, or None if not found
         """
+        bundle = self._bundle(owner, repo)
+        if bundle is not None:
+            return bundle['readme']
         url = f"{self.BASE_URL}/repos/{owner}/{repo}/readme"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
             import base64
-            content = response.json().get('content', '')
+            content = self._get_json(url).get('content', '')
             return base64.b64decode(content).decode('utf-8')
         except requests.exceptions.RequestException:
             return None
+    
+    def get_repo_bundle(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch what an analysis needs from the API in a single GraphQL query.
+        
+        Args:
+            owner: Repository owner
+            repo: Repository name
+        
+        Returns:
+            Dictionary with 'info', 'languages', 'topics' and 'readme' shaped
+            like the get_repo_* results, 'tree' (the default branch's root
+            entries with their path, type, sha and, for files, size) and
+            'files' (contents of the BUNDLE_FILES found at the root); None if
+            the query failed or there is no token (GraphQL requires one)
+        """
+        if not self.token:
+            return None
+        try:
+            response = self._get(f"{self.BASE_URL}/graphql", json_body=self._bundle_query(owner, repo))
+            response.raise_for_status()
+            payload = response.json()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Error fetching repository bundle: {e}")
+            return None
+        return self._bundle_from_payload(payload)
+    
+    def _bundle_query(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Body of the GraphQL request for a repository bundle."""
+        objects = [f'readme{i}: object(expression: "HEAD:{name}") {{ ...text }}'
+                   for i, name in enumerate(self.BUNDLE_READMES)]
+        objects += [f'file{i}: object(expression: "HEAD:{name}") {{ ...text }}'
+                    for i, name in enumerate(self.BUNDLE_FILES)]
+        query = _BUNDLE_QUERY.replace('OBJECTS', '\n    '.join(objects))
+        return {'query': query, 'variables': {'owner': owner, 'name': repo}}
+    
+    def _bundle_from_payload(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Bundle of a bundle query's response (None if the repository is missing)."""
+        repository = (payload.get('data') or {}).get('repository')
+        if repository is None:
+            errors = '; '.join(error.get('message', '') for error in payload.get('errors') or [])
+            print(f"⚠️  Error fetching repository bundle: {errors or 'repository not found'}")
+            return None
+        return self._bundle_from_graphql(repository)
+    
+    @staticmethod
+    def _info_from_graphql(r: Dict[str, Any]) -> Dict:
+        """Map a repository's info fields from a GraphQL query onto the REST shape of get_repo_info."""
+        topics = [node['topic']['name'] for node in (r.get('repositoryTopics') or {}).get('nodes', [])]
+        license_info = r.get('licenseInfo')
+        info = {
+            'name': r['name'],
+            'full_name': r['nameWithOwner'],
+            'html_url': r['url'],
+            'description': r.get('description'),
+            'homepage': r.get('homepageUrl'),
+            'language': (r.get('primaryLanguage') or {}).get('name'),
+            'stargazers_count': r.get('stargazerCount', 0),
+            # REST counts open pull requests as issues
+            'open_issues_count': ((r.get('issues') or {}).get('totalCount', 0)
+                                  + (r.get('pullRequests') or {}).get('totalCount', 0)),
+            'forks_count': r.get('forkCount', 0),
+            'fork': r.get('isFork', False),
+            'archived': r.get('isArchived', False),
+            'private': r.get('isPrivate', False),
+            'default_branch': (r.get('defaultBranchRef') or {}).get('name'),
+            'created_at': r.get('createdAt'),
+            'updated_at': r.get('updatedAt'),
+            'pushed_at': r.get('pushedAt'),
+            'license': ({'key': license_info['key'], 'name': license_info['name'], 'spdx_id': license_info['spdxId']}
+                        if license_info else None),
+            'topics': topics,
+        }
+        if r.get('parent'):
+            info['parent'] = {'full_name': r['parent']['nameWithOwner']}
+        return info
+    
+    def _bundle_from_graphql(self, r: Dict[str, Any]) -> Dict[str, Any]:
+        """Map the repository of a bundle query onto the REST shapes."""
+        info = self._info_from_graphql(r)
+        tree = []
+        for entry in (r.get('tree') or {}).get('entries', []):
+            item = {'path': entry['name'], 'type': entry['type'], 'sha': entry['oid']}
+            if (entry.get('object') or {}).get('byteSize') is not None:
+                item['size'] = entry['object']['byteSize']
+            tree.append(item)
+        
+        def text(alias: str) -> Optional[str]:
+            return (r.get(alias) or {}).get('text')
+        
+        return {
+            'info': info,
+            'languages': {edge['node']['name']: edge['size'] for edge in (r.get('languages') or {}).get('edges', [])},
+            'topics': info['topics'],
+            'readme': next((text(f'readme{i}') for i in range(len(self.BUNDLE_READMES))
+                            if text(f'readme{i}') is not None), None),
+            'tree': tree,
+            'files': {name: text(f'file{i}') for i, name in enumerate(self.BUNDLE_FILES)
+                      if text(f'file{i}') is not None},
+        }
+    
+    def _bundle(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """The bundle answering get_repo_* calls in GraphQL mode (None to use the REST endpoints)."""
+        if not self.graphql or not self.token:
+            return None
+        found, bundle = self._recall_bundle(owner, repo)
+        if not found:
+            bundle = self.get_repo_bundle(owner, repo)
+            self._remember_bundle(owner, repo, bundle)
+        return bundle
+    
+    def _recall_bundle(self, owner: str, repo: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Whether a repository's bundle was fetched less than BUNDLE_TTL ago, and the bundle."""
+        with self._bundles_lock:
+            cached = self._bundles.get((owner.lower(), repo.lower()))
+        if cached is not None and time.time() - cached[0] < self.BUNDLE_TTL:
+            return True, cached[1]
+        return False, None
+    
+    def _remember_bundle(self, owner: str, repo: str, bundle: Optional[Dict[str, Any]]):
+        """Keep a repository's bundle for BUNDLE_TTL seconds."""
+        # A failed query is remembered too, so the REST fallback does not retry it per call
+        now = time.time()
+        with self._bundles_lock:
+            self._bundles = {k: v for k, v in self._bundles.items() if now - v[0] < self.BUNDLE_TTL}
+            self._bundles[(owner.lower(), repo.lower())] = (now, bundle)
+    
+    def get_repo_tarball(self, owner: str, repo: str, ref: Optional[str] = None) -> Optional[BinaryIO]:
+        """
+        Open the gzipped tar archive of a repository as a stream.
+        
+        Args:
+            owner: Repository owner
+            repo: Repository name
+            ref: Branch, tag or commit (defaults to the default branch)
+        
+        Returns:
+            Binary stream of the archive (close it when done), or None if it
+            could not be fetched
+        """
+        url = f"{self.BASE_URL}/repos/{owner}/{repo}/tarball" + (f"/{ref}" if ref else "")
+        
+        try:
+            response = self._get(url, stream=True)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Error fetching repository archive: {e}")
+            return None
+        # Undo any transfer encoding, leaving the .tar.gz bytes
+        response.raw.decode_content = True
+        return response.raw
+
+
+# Repository fields get_repo_info's result is mapped from
+_INFO_FRAGMENT = """
+fragment info on Repository {
+  name nameWithOwner url description homepageUrl
+  stargazerCount forkCount isFork isArchived isPrivate
+  createdAt updatedAt pushedAt
+  primaryLanguage { name }
+  licenseInfo { key name spdxId }
+  defaultBranchRef { name }
+  parent { nameWithOwner }
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+  repositoryTopics(first: 100) { nodes { topic { name } } }
+}
+"""
+
+# Everything get_repo_bundle fetches; OBJECTS becomes the aliased README and manifest lookups
+_BUNDLE_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    ...info
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+    tree: object(expression: "HEAD:") {
+      ... on Tree { entries { name type oid object { ... on Blob { byteSize } } } }
+    }
+    OBJECTS
+  }
+}
 
+fragment text on Blob { text }
+""" + _INFO_FRAGMENT
@@ -0,0 +1,204 @@
+"""
+Compiled .gitignore and .gitattributes rules used to prune the repository walk.
+"""
+
+import re
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+
+def translate_pattern(pattern: str) -> Tuple[str, bool]:
+    """
+    Translate a gitignore-style glob into a regular expression.
+
+    Args:
+        pattern: Glob as written in a .gitignore or .gitattributes file,
+            without the leading '!' of negated patterns
+
+    Returns:
+        (regex, dir_only): regex matching paths relative to the file's
+        directory, and whether the pattern only applies to directories
+    """
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    # A slash anywhere but the end anchors the pattern to the file's directory
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', '^', ']') else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body[0] in '!^':
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+
+    prefix = '' if anchored else '(?:.*/)?'
+    return prefix + ''.join(out), dir_only
+
+
+class IgnoreRules:
+    """
+    The patterns of one .gitignore (or one attribute of .gitattributes), compiled together.
+
+    As in git, the last pattern matching a path decides; a negated pattern
+    ('!keep.log') re-includes what earlier patterns excluded. All patterns
+    are compiled into one alternation, tried last-to-first, so a lookup is a
+    single regex match however many patterns the file has.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, bool]], prefix: str = ''):
+        """
+        Initialize ignore rules.
+
+        Args:
+            rules: (glob, value) pairs in file order; value is False for
+                negated (re-including) patterns
+            prefix: Relative POSIX path plus '/' of the directory holding the
+                rules ('' for the repository root)
+        """
+        self.prefix = prefix
+        self.values: List[bool] = []
+        file_alternatives = []
+        dir_alternatives = []
+        for i, (glob, value) in enumerate(rules):
+            regex, dir_only = translate_pattern(glob)
+            self.values.append(value)
+            group = f"(?P<r{i}>{regex})"
+            dir_alternatives.append(group)
+            if not dir_only:
+                file_alternatives.append(group)
+        self._file_re = self._compile(file_alternatives)
+        self._dir_re = self._compile(dir_alternatives)
+
+    @staticmethod
+    def _compile(alternatives: List[str]) -> Optional[Pattern]:
+        """One expression trying the alternatives from the last rule to the first."""
+        if not alternatives:
+            return None
+        return re.compile('|'.join(reversed(alternatives)), re.DOTALL)
+
+    @classmethod
+    def from_gitignore(cls, text: str, prefix: str = '') -> Optional['IgnoreRules']:
+        """
+        Parse the contents of a .gitignore file.
+
+        Returns:
+            Compiled rules, or None if the file has no patterns
+        """
+        rules = []
+        for line in text.splitlines():
+            line = _strip_trailing_spaces(line)
+            if not line or line.startswith('#'):
+                continue
+            value = True
+            if line.startswith('!'):
+                value = False
+                line = line[1:]
+            elif line.startswith(('\\!', '\\#')):
+                line = line[1:]
+            if line.strip('/'):
+                rules.append((line, value))
+        return cls(rules, prefix) if rules else None
+
+    @classmethod
+    def from_gitattributes(cls, text: str, attribute: str, prefix: str = '') -> Optional['IgnoreRules']:
+        """
+        Collect the patterns of a .gitattributes file that set or unset one attribute.
+
+        'attr' and 'attr=true' set the attribute; '-attr', '!attr' and
+        'attr=false' unset it.
+
+        Returns:
+            Compiled rules, or None if the attribute is never mentioned
+        """
+        rules = []
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            for attr in fields[1:]:
+                if attr in (attribute, attribute + '=true'):
+                    rules.append((fields[0], True))
+                elif attr in ('-' + attribute, '!' + attribute, attribute + '=false'):
+                    rules.append((fields[0], False))
+        return cls(rules, prefix) if rules else None
+
+    @property
+    def has_negations(self) -> bool:
+        """Whether any pattern re-includes (or unsets) paths."""
+        return not all(self.values)
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Decide a path against these rules.
+
+        Args:
+            rel_path: Relative POSIX path from the repository root (below prefix)
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True if the last matching pattern excludes (or sets) the path,
+            False if it re-includes (or unsets) it, None if none matches
+        """
+        pattern = self._dir_re if is_dir else self._file_re
+        if pattern is None:
+            return None
+        m = pattern.fullmatch(rel_path, len(self.prefix))
+        if m is None:
+            return None
+        return self.values[int(m.lastgroup[1:])]
+
+
+def is_ignored(chain: Sequence[IgnoreRules], rel_path: str, is_dir: bool) -> bool:
+    """
+    Decide a path against nested .gitignore files.
+
+    Args:
+        chain: Rules of the .gitignore files from the root down to the
+            path's directory; deeper files take precedence
+        rel_path: Relative POSIX path from the repository root
+        is_dir: Whether the path is a directory
+    """
+    for rules in reversed(chain):
+        decision = rules.match(rel_path, is_dir)
+        if decision is not None:
+            return decision
+    return False
+
+
+def _strip_trailing_spaces(line: str) -> str:
+    """Remove trailing spaces unless they are escaped with a backslash."""
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    return stripped.rstrip('\r')
@@ -0,0 +1,95 @@
+"""
+Fast line counting over raw bytes.
+"""
+
+import re
+from typing import BinaryIO, Dict, Optional, Pattern, Tuple
+
+
+# Size of each read; peak memory stays around this regardless of file size
+CHUNK_SIZE = 1 << 20
+
+_NON_WHITESPACE = re.compile(rb'[^ \t\r\f\v]')
+_BLANK_LINE = re.compile(rb'^[ \t\r\f\v]*$', re.MULTILINE)
+
+_comment_patterns: Dict[Tuple[bytes, ...], Pattern] = {}
+
+
+def _comment_pattern(prefixes: Tuple[bytes, ...]) -> Pattern:
+    """Compiled pattern matching lines that start with one of the comment prefixes."""
+    pattern = _comment_patterns.get(prefixes)
+    if pattern is None:
+        alternatives = b'|'.join(re.escape(prefix) for prefix in prefixes)
+        pattern = re.compile(rb'^[ \t\r\f\v]*(?:' + alternatives + rb')', re.MULTILINE)
+        _comment_patterns[prefixes] = pattern
+    return pattern
+
+
+def count_lines(stream: BinaryIO, comment_prefixes: Optional[Tuple[bytes, ...]] = None) -> Dict[str, int]:
+    """
+    Count lines, bytes, blank lines and comment lines of a binary stream in one pass.
+
+    The stream is read in CHUNK_SIZE pieces and never decoded. Lines are
+    terminated by b'\\n' (so '\\r\\n' counts once); a final line without a
+    terminator still counts, matching len(f.readlines()).
+
+    Args:
+        stream: Binary file-like object positioned at the start
+        comment_prefixes: Line comment markers (e.g. (b'#',)); None skips
+            comment counting
+
+    Returns:
+        Dictionary with 'lines', 'bytes', 'blank' and 'comment' counts
+    """
+    comment_re = _comment_pattern(comment_prefixes) if comment_prefixes else None
+    counts = {'lines': 0, 'bytes': 0, 'blank': 0, 'comment': 0}
+
+    # Only the start of a line decides whether it is blank or a comment, so
+    # an unfinished line is carried over as b' ' (leading whitespace, if
+    # any) plus its first few non-whitespace bytes, never as a whole line
+    keep = max((len(p) for p in comment_prefixes), default=1) if comment_prefixes else 1
+    carry = b''
+
+    def extend(head: bytes, data: bytes, pos: int, endpos: int) -> bytes:
+        """Append data[pos:endpos] to a carried line head, keeping only what classification needs."""
+        if len(head) > keep:
+            return head
+        if len(head) > 1:
+            return head + data[pos:min(endpos, pos + keep + 1 - len(head))]
+        m = _NON_WHITESPACE.search(data, pos, endpos)
+        if m is None:
+            return b' ' if (head or endpos > pos) else b''
+        return b' ' + data[m.start():min(endpos, m.start() + keep)]
+
+    def classify(data: bytes, pos: int = 0, endpos: Optional[int] = None):
+        """Add the blank and comment lines of data[pos:endpos] to the counts."""
+        if endpos is None:
+            endpos = len(data)
+        counts['blank'] += sum(1 for _ in _BLANK_LINE.finditer(data, pos, endpos))
+        if comment_re is not None:
+            counts['comment'] += sum(1 for _ in comment_re.finditer(data, pos, endpos))
+
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        counts['bytes'] += len(chunk)
+
+        first_newline = chunk.find(b'\n')
+        if first_newline == -1:
+            carry = extend(carry, chunk, 0, len(chunk))
+            continue
+
+        counts['lines'] += chunk.count(b'\n')
+        # Finish the carried line, then classify the complete lines in place
+        classify(extend(carry, chunk, 0, first_newline))
+        last_newline = chunk.rfind(b'\n')
+        if last_newline > first_newline:
+            classify(chunk, first_newline + 1, last_newline)
+        carry = extend(b'', chunk, last_newline + 1, len(chunk))
+
+    if carry:
+        counts['lines'] += 1
+        classify(carry)
+
+    return counts
@@ -0,0 +1,195 @@
+"""
+Streaming parsers for dependency lockfiles.
+
+Every parser consumes the file one line at a time and yields
+(package, resolved version) pairs, so memory use is bounded by the number of
+packages rather than by the size of the file. They rely on the layout the
+package managers write (one JSON key or TOML/YAML entry per line), which is
+what checked-in lockfiles look like.
+"""
+
+import io
+import re
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Package = Tuple[str, str]
+
+_JSON_OBJECT_KEY = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:\s*\{\s*$')
+_JSON_STRING_FIELD = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"\s*,?\s*$')
+_TOML_STRING_FIELD = re.compile(r'^(name|version)\s*=\s*"([^"]*)"')
+_GEM_SPEC = re.compile(r'^    ([^\s(]+) \(([^)]+)\)\s*$')
+
+
+def _json_fields(lines: Iterable[str]) -> Iterator[Tuple[List[Optional[str]], str, str]]:
+    """
+    Yield the string fields of pretty-printed JSON with the keys of their enclosing objects.
+
+    Yields:
+        (stack, key, value): stack lists the keys of the enclosing objects
+        from the outside in (None for the root and for array elements)
+    """
+    stack: List[Optional[str]] = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith(('}', ']')):
+            if stripped.startswith('}') and stack:
+                stack.pop()
+            continue
+        if stripped.endswith('{'):
+            m = _JSON_OBJECT_KEY.match(stripped)
+            stack.append(m.group(1) if m else None)
+            continue
+        m = _JSON_STRING_FIELD.match(stripped)
+        if m:
+            yield stack, m.group(1), m.group(2)
+
+
+def parse_package_lock(lines: Iterable[str]) -> Iterator[Package]:
+    """Packages of an npm package-lock.json (lockfileVersion 1, 2 or 3)."""
+    for stack, key, value in _json_fields(lines):
+        if key != 'version' or len(stack) < 2:
+            continue
+        name = stack[-1]
+        if name and 'node_modules/' in name:
+            # v2/v3: "packages": {"node_modules/a/node_modules/b": {...}}
+            yield name.rsplit('node_modules/', 1)[1], value
+        elif name and stack[-2] == 'dependencies':
+            # v1: nested "dependencies": {"b": {"version": ...}}
+            yield name, value
+
+
+def parse_composer_lock(lines: Iterable[str]) -> Iterator[Package]:
+    """Packages of a composer.lock ("packages" and "packages-dev" arrays)."""
+    name = None
+    for stack, key, value in _json_fields(lines):
+        if len(stack) != 2 or stack[-1] is not None:
+            continue
+        if key == 'name':
+            name = value
+        elif key == 'version' and name:
+            yield name, value
+            name = None
+
+
+def parse_yarn_lock(lines: Iterable[str]) -> Iterator[Package]:
+    """Packages of a yarn.lock (classic v1 and berry)."""
+    name = None
+    for line in lines:
+        if not line.strip() or line.startswith('#'):
+            continue
+        if not line[0].isspace():
+            # e.g. '"@babel/core@^7.0.0", "@babel/core@^7.1.0":' or 'lodash@npm:^4.17.21:'
+            spec = line.rstrip().rstrip(':').split(',')[0].strip().strip('"')
+            at = spec.find('@', 1)
+            name = spec[:at] if at > 0 else None
+        elif name and line.startswith('  version') and not line.startswith('   '):
+            version = line.strip()[len('version'):].lstrip(':').strip().strip('"')
+            yield name, version
+            name = None
+
+
+def parse_pnpm_lock(lines: Iterable[str]) -> Iterator[Package]:
+    """Packages of a pnpm-lock.yaml (lockfileVersion 5 to 9)."""
+    major = 9
+    section = None
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        if not line[0].isspace():
+            section, _, rest = line.partition(':')
+            if section == 'lockfileVersion':
+                m = re.match(r"\s*['\"]?(\d+)", rest)
+                if m:
+                    major = int(m.group(1))
+            continue
+        if section != 'packages' or not line.startswith('  ') or line.startswith('   '):
+            continue
+
+        key = line.strip().rstrip(':').strip('\'"').lstrip('/')
+        if major < 6:
+            # '/@babel/core/7.0.0_peer@1.0.0'
+            key = key.split('_', 1)[0]
+            name, _, version = key.rpartition('/')
+        else:
+            # '/@babel/core@7.0.0(peer@1.0.0)' or '@babel/core@7.0.0'
+            key = key.split('(', 1)[0]
+            at = key.find('@', 1)
+            name, version = (key[:at], key[at + 1:]) if at > 0 else ('', '')
+        if name and version:
+            yield name, version
+
+
+def parse_toml_packages(lines: Iterable[str]) -> Iterator[Package]:
+    """Packages of a TOML lockfile made of [[package]] tables (poetry.lock, Cargo.lock)."""
+    in_package = False
+    name = version = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('['):
+            in_package = stripped == '[[package]]'
+            name = version = None
+            continue
+        if not in_package:
+            continue
+        m = _TOML_STRING_FIELD.match(stripped)
+        if m:
+            if m.group(1) == 'name':
+                name = m.group(2)
+            else:
+                version = m.group(2)
+            if name and version:
+                yield name, version
+                in_package = False
+
+
+def parse_go_sum(lines: Iterable[str]) -> Iterator[Package]:
+    """Modules of a go.sum."""
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 3:
+            version = fields[1]
+            if version.endswith('/go.mod'):
+                version = version[:-len('/go.mod')]
+            yield fields[0], version
+
+
+def parse_gemfile_lock(lines: Iterable[str]) -> Iterator[Package]:
+    """Gems of a Gemfile.lock (the 'specs:' entries of every source)."""
+    for line in lines:
+        m = _GEM_SPEC.match(line)
+        if m:
+            yield m.group(1), m.group(2)
+
+
+# Lockfile name -> (language, parser)
+LOCKFILE_PARSERS: Dict[str, Tuple[str, Callable[[Iterable[str]], Iterator[Package]]]] = {
+    'package-lock.json': ('javascript', parse_package_lock),
+    'yarn.lock': ('javascript', parse_yarn_lock),
+    'pnpm-lock.yaml': ('javascript', parse_pnpm_lock),
+    'poetry.lock': ('python', parse_toml_packages),
+    'Cargo.lock': ('rust', parse_toml_packages),
+    'go.sum': ('go', parse_go_sum),
+    'Gemfile.lock': ('ruby', parse_gemfile_lock),
+    'composer.lock': ('php', parse_composer_lock),
+}
+
+
+def parse_lockfile(name: str, stream: BinaryIO) -> Dict[str, List[str]]:
+    """
+    Extract resolved package versions from a lockfile.
+
+    Args:
+        name: Lockfile name (a key of LOCKFILE_PARSERS)
+        stream: Binary stream of the lockfile contents
+
+    Returns:
+        Mapping of package name to its distinct resolved versions, in file order
+    """
+    _, parser = LOCKFILE_PARSERS[name]
+    packages: Dict[str, List[str]] = {}
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='ignore', newline=None)
+    for package, version in parser(lines):
+        versions = packages.setdefault(package, [])
+        if version not in versions:
+            versions.append(version)
+    return packages
@@ -0,0 +1,613 @@
+"""
+On-disk cache of cloned repositories that is kept up to date with incremental fetches.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+
+class RepoCache:
+    """
+    Cache of cloned repositories keyed by owner/name.
+
+    Each clone lives at <root>/<owner>/<name> (<name>.git for bare clones)
+    next to a <name>.meta.json record of how it was cloned, the HEAD commit
+    it holds and when it was last fetched. A clone younger than max_age is
+    used as is; an older one is revalidated against the remote's HEAD and,
+    if that moved, updated with an incremental `git fetch` and reset rather
+    than cloned again.
+
+    The metadata also records each clone's disk usage and last access. The
+    size is measured once when a clone is created or updated, so the total
+    is the sum of the records and checking the quota never walks the
+    clones; when it exceeds max_bytes, the least recently used clones are
+    evicted.
+
+    Processes sharing the cache coordinate through per-clone file locks
+    (under <root>/.locks): hold lock() while cloning into or reading a
+    clone, and eviction skips clones that are locked.
+
+    Forks can share one object store per fork network: mirror() keeps a
+    bare clone of the network's root under <root>/.mirrors, and clones made
+    with checkout(reference=...) borrow its objects through git alternates,
+    so only the objects a fork adds are fetched and stored. A mirror is
+    only evicted once no cached clone borrows from it.
+
+    checkout_async() and lock_async() are the same for coroutines: git
+    runs as asyncio subprocesses, walks of a clone run in an executor and
+    a held lock is polled, so the event loop is never blocked.
+    """
+
+    # Seconds a clone is used without asking the remote whether HEAD moved
+    DEFAULT_MAX_AGE = 3600
+
+    # Default bound on the disk space used by cached clones
+    DEFAULT_MAX_BYTES = 10 << 30
+
+    # Files stored next to a clone (removed with it)
+    SIDECAR_SUFFIXES = ('.meta.json', '.index.json')
+
+    # Directory below the root holding the shared mirrors of fork networks
+    MIRRORS_DIR = '.mirrors'
+
+    # Seconds between attempts to take a lock held elsewhere in lock_async
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, root: Path, max_age: Optional[float] = DEFAULT_MAX_AGE,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        """
+        Initialize repository cache.
+
+        Args:
+            root: Directory holding the cached clones
+            max_age: Seconds before a cached clone is revalidated (0 always
+                revalidates, None never does)
+            max_bytes: Disk space the clones may use before the least
+                recently used ones are evicted (None for no limit)
+        """
+        self.root = Path(root)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, owner: str, name: str, bare: bool = False) -> Path:
+        """Location of the cached clone of a repository (GitHub names are case-insensitive)."""
+        owner, name = owner.lower(), name.lower()
+        return self.root / owner / (f"{name}.git" if bare else name)
+
+    def mirror_path(self, owner: str, name: str) -> Path:
+        """Location of the shared mirror of a fork network's root repository."""
+        return self.root / self.MIRRORS_DIR / owner.lower() / f"{name.lower()}.git"
+
+    @staticmethod
+    def meta_path(repo_path: Path) -> Path:
+        """Location of the metadata record stored next to a cached clone."""
+        return repo_path.with_name(repo_path.name + '.meta.json')
+
+    @staticmethod
+    def index_path(repo_path: Path) -> Path:
+        """Location of the file index stored next to a cached clone."""
+        return repo_path.with_name(repo_path.name + '.index.json')
+
+    def lock_path(self, repo_path: Path) -> Path:
+        """Location of the lock file of a cached clone (kept apart so eviction can remove the clone's directory)."""
+        try:
+            relative = repo_path.relative_to(self.root)
+        except ValueError:
+            relative = Path(repo_path.parent.name, repo_path.name)
+        return self.root / '.locks' / relative.with_name(relative.name + '.lock')
+
+    @contextmanager
+    def lock(self, repo_path: Path, blocking: bool = True) -> Iterator[bool]:
+        """
+        Hold an exclusive lock on a cached clone, shared with other processes.
+
+        Args:
+            repo_path: Cached clone (see path_for); it need not exist yet
+            blocking: Wait for the lock instead of giving up if it is held
+
+        Yields:
+            Whether the lock was acquired (always True when blocking)
+        """
+        if fcntl is None:
+            yield True
+            return
+        path = self.lock_path(repo_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a') as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @asynccontextmanager
+    async def lock_async(self, repo_path: Path) -> AsyncIterator[None]:
+        """
+        Hold the lock of lock() from a coroutine, waiting without blocking the event loop.
+
+        Args:
+            repo_path: Cached clone (see path_for); it need not exist yet
+        """
+        if fcntl is None:
+            yield
+            return
+        path = self.lock_path(repo_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a') as f:
+            while True:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def load_meta(self, repo_path: Path) -> Dict[str, Any]:
+        """Metadata of a cached clone ({} if missing or unreadable)."""
+        try:
+            with open(self.meta_path(repo_path), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_meta(self, repo_path: Path, meta: Dict[str, Any]):
+        """Atomically write the metadata record of a cached clone."""
+        path = self.meta_path(repo_path)
+        tmp = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+            tmp.replace(path)
+        except OSError as e:
+            print(f"⚠️  Failed to save cache metadata: {e}")
+
+    def checkout(self, owner: str, name: str, url: str, bare: bool = False, strategy: str = 'full',
+                 clone_args: Sequence[str] = (), max_age: Optional[float] = None,
+                 reference: Optional[Path] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """
+        Return an up-to-date clone of a repository, cloning or refreshing it as needed.
+
+        Args:
+            owner: Repository owner
+            name: Repository name
+            url: URL to clone and fetch from
+            bare: Keep a bare clone instead of a checkout
+            strategy: Name of the clone strategy, recorded in the metadata
+            clone_args: Extra `git clone` arguments (depth and filter); later
+                fetches keep the same depth, and git remembers the filter
+            max_age: Overrides the cache's max_age for this call
+            reference: Mirror (see mirror()) a new clone borrows objects from;
+                clones already cached keep whatever they were made with
+
+        Returns:
+            (path, info): the clone path (None on failure) and a record with
+            'source' ('hit', 'refresh' or 'clone'), 'head', 'strategy' and
+            the 'seconds' spent cloning or fetching
+        """
+        repo_path = self.path_for(owner, name, bare)
+        max_age = self.max_age if max_age is None else max_age
+        meta = self.load_meta(repo_path) if repo_path.exists() else {}
+
+        if not meta.get('head'):
+            return self._clone(repo_path, url, bare, strategy, clone_args, owner, name, reference)
+
+        info = {'source': 'hit', 'head': meta['head'], 'strategy': meta.get('strategy', strategy), 'seconds': 0.0}
+        if max_age is not None and time.time() - meta.get('checked_at', 0) < max_age:
+            print(f"📦 Using cached repository at {repo_path}")
+            self._touch(repo_path, meta)
+            return repo_path, info
+
+        start = time.perf_counter()
+        try:
+            remote_head = self._remote_head(repo_path)
+            if remote_head != meta['head']:
+                print(f"🔄 Updating cached repository at {repo_path}...")
+                self._fetch(repo_path, bare, meta.get('clone_args', []))
+                meta['head'] = self._head(repo_path)
+                meta['fetched_at'] = time.time()
+                info['source'] = 'refresh'
+            else:
+                print(f"📦 Using cached repository at {repo_path} (up to date)")
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Failed to update cached repository, using it as is: {self._stderr(e)}")
+            info['stale'] = True
+            self._touch(repo_path, meta)
+            return repo_path, info
+
+        meta['checked_at'] = time.time()
+        if info['source'] == 'refresh':
+            meta['size'] = self.disk_usage(repo_path)
+        self._touch(repo_path, meta)
+        if info['source'] == 'refresh':
+            self.enforce_quota(keep=repo_path)
+        info['head'] = meta['head']
+        info['seconds'] = round(time.perf_counter() - start, 3)
+        return repo_path, info
+
+    async def checkout_async(self, owner: str, name: str, url: str, bare: bool = False, strategy: str = 'full',
+                             clone_args: Sequence[str] = (), max_age: Optional[float] = None,
+                             reference: Optional[Path] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """
+        checkout() without blocking the event loop (same arguments and result).
+
+        Hold lock_async() rather than lock() around it.
+        """
+        loop = asyncio.get_running_loop()
+        repo_path = self.path_for(owner, name, bare)
+        max_age = self.max_age if max_age is None else max_age
+        meta = self.load_meta(repo_path) if repo_path.exists() else {}
+
+        if not meta.get('head'):
+            return await self._clone_async(repo_path, url, bare, strategy, clone_args, owner, name, reference)
+
+        info = {'source': 'hit', 'head': meta['head'], 'strategy': meta.get('strategy', strategy), 'seconds': 0.0}
+        if max_age is not None and time.time() - meta.get('checked_at', 0) < max_age:
+            print(f"📦 Using cached repository at {repo_path}")
+            self._touch(repo_path, meta)
+            return repo_path, info
+
+        start = time.perf_counter()
+        try:
+            out = await self._run_async(repo_path, 'ls-remote', 'origin', 'HEAD')
+            if (out.split()[0] if out.strip() else '') != meta['head']:
+                print(f"🔄 Updating cached repository at {repo_path}...")
+                for args in self._fetch_commands(bare, meta.get('clone_args', [])):
+                    await self._run_async(repo_path, *args)
+                meta['head'] = (await self._run_async(repo_path, 'rev-parse', 'HEAD')).strip()
+                meta['fetched_at'] = time.time()
+                info['source'] = 'refresh'
+            else:
+                print(f"📦 Using cached repository at {repo_path} (up to date)")
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Failed to update cached repository, using it as is: {self._stderr(e)}")
+            info['stale'] = True
+            self._touch(repo_path, meta)
+            return repo_path, info
+
+        meta['checked_at'] = time.time()
+        if info['source'] == 'refresh':
+            meta['size'] = await loop.run_in_executor(None, self.disk_usage, repo_path)
+        self._touch(repo_path, meta)
+        if info['source'] == 'refresh':
+            await loop.run_in_executor(None, partial(self.enforce_quota, keep=repo_path))
+        info['head'] = meta['head']
+        info['seconds'] = round(time.perf_counter() - start, 3)
+        return repo_path, info
+
+    def _clone(self, repo_path: Path, url: str, bare: bool, strategy: str, clone_args: Sequence[str],
+               owner: str, name: str, reference: Optional[Path] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """Clone a repository that is not cached (or whose cache is unusable)."""
+        info = {'source': 'clone', 'head': None, 'strategy': strategy, 'seconds': 0.0}
+        args = self._clone_command(repo_path, url, bare, strategy, clone_args, reference)
+        start = time.perf_counter()
+        try:
+            subprocess.run(['git', *args], check=True, capture_output=True)
+            info['head'] = self._head(repo_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Failed to clone repository: {self._stderr(e)}")
+            shutil.rmtree(repo_path, ignore_errors=True)
+            return None, info
+
+        self.save_meta(repo_path, self._clone_meta(owner, name, strategy, clone_args, info['head'],
+                                                   self.disk_usage(repo_path), reference))
+        info['seconds'] = round(time.perf_counter() - start, 3)
+        self.enforce_quota(keep=repo_path)
+        return repo_path, info
+
+    async def _clone_async(self, repo_path: Path, url: str, bare: bool, strategy: str, clone_args: Sequence[str],
+                           owner: str, name: str,
+                           reference: Optional[Path] = None) -> Tuple[Optional[Path], Dict[str, Any]]:
+        """_clone() without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        info = {'source': 'clone', 'head': None, 'strategy': strategy, 'seconds': 0.0}
+        args = self._clone_command(repo_path, url, bare, strategy, clone_args, reference)
+        start = time.perf_counter()
+        try:
+            await run_git_async(*args)
+            info['head'] = (await self._run_async(repo_path, 'rev-parse', 'HEAD')).strip()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️  Failed to clone repository: {self._stderr(e)}")
+            await loop.run_in_executor(None, partial(shutil.rmtree, repo_path, ignore_errors=True))
+            return None, info
+
+        size = await loop.run_in_executor(None, self.disk_usage, repo_path)
+        self.save_meta(repo_path, self._clone_meta(owner, name, strategy, clone_args, info['head'], size, reference))
+        info['seconds'] = round(time.perf_counter() - start, 3)
+        await loop.run_in_executor(None, partial(self.enforce_quota, keep=repo_path))
+        return repo_path, info
+
+    def _clone_command(self, repo_path: Path, url: str, bare: bool, strategy: str, clone_args: Sequence[str],
+                       reference: Optional[Path]) -> List[str]:
+        """Make room for a new clone and return the arguments of the `git clone` creating it."""
+        if repo_path.exists():
+            shutil.rmtree(repo_path, ignore_errors=True)  # Clone without metadata, e.g. interrupted
+        repo_path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"📥 Cloning repository to {repo_path} ({strategy})...")
+
+        args = ['clone', '--quiet']
+        if bare:
+            args.append('--bare')
+        args.extend(clone_args)
+        if reference is not None:
+            args.extend(['--reference-if-able', str(reference)])
+        return args + [url, str(repo_path)]
+
+    @staticmethod
+    def _clone_meta(owner: str, name: str, strategy: str, clone_args: Sequence[str], head: str, size: int,
+                    reference: Optional[Path]) -> Dict[str, Any]:
+        """Metadata record of a new clone."""
+        now = time.time()
+        meta = {
+            'owner': owner,
+            'name': name,
+            'strategy': strategy,
+            'clone_args': list(clone_args),
+            'head': head,
+            'fetched_at': now,
+            'checked_at': now,
+            'accessed': now,
+            'size': size,
+        }
+        if reference is not None:
+            meta['reference'] = str(reference)
+        return meta
+
+    def mirror(self, owner: str, name: str, url: str, refresh: bool = True,
+               max_age: Optional[float] = None) -> Optional[Path]:
+        """
+        Return the shared mirror of a fork network's root repository, creating it if needed.
+
+        The mirror is a full bare clone of every branch and tag. It is never
+        pruned by `git gc`, so objects forks borrow stay available even
+        after upstream force-pushes.
+
+        Args:
+            owner: Owner of the network's root repository
+            name: Name of the network's root repository
+            url: URL to clone and fetch from
+            refresh: Fetch new commits if the mirror is older than max_age
+                (a stale mirror only means forks fetch more objects)
+            max_age: Overrides the cache's max_age for this call
+
+        Returns:
+            The mirror path, or None if it could not be cloned
+        """
+        mirror_path = self.mirror_path(owner, name)
+        max_age = self.max_age if max_age is None else max_age
+        with self.lock(mirror_path):
+            meta = self.load_meta(mirror_path) if mirror_path.exists() else {}
+            if not meta.get('head'):
+                mirror_path, _ = self._clone(mirror_path, url, True, 'mirror', (), owner, name)
+                if mirror_path is not None:
+                    try:
+                        self._run(mirror_path, 'config', 'gc.pruneExpire', 'never')
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        print(f"⚠️  Failed to configure shared mirror: {self._stderr(e)}")
+                return mirror_path
+
+            if refresh and max_age is not None and time.time() - meta.get('checked_at', 0) >= max_age:
+                print(f"🔄 Updating shared mirror of {owner}/{name}...")
+                try:
+                    self._run(mirror_path, 'fetch', '--quiet', '--prune', 'origin',
+                              '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+                    meta['head'] = self._head(mirror_path)
+                    meta['fetched_at'] = meta['checked_at'] = time.time()
+                    meta['size'] = self.disk_usage(mirror_path)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    print(f"⚠️  Failed to update shared mirror, using it as is: {self._stderr(e)}")
+            self._touch(mirror_path, meta)
+        return mirror_path
+
+    def _touch(self, repo_path: Path, meta: Dict[str, Any]):
+        """Record an access to a cached clone."""
+        if 'size' not in meta:
+            meta['size'] = self.disk_usage(repo_path)
+        meta['accessed'] = time.time()
+        self.save_meta(repo_path, meta)
+
+    def update_size(self, repo_path: Path) -> int:
+        """Re-measure a cached clone after it was changed outside of checkout (e.g. blobs fetched)."""
+        meta = self.load_meta(repo_path)
+        if not meta:
+            return 0
+        meta['size'] = self.disk_usage(repo_path)
+        self.save_meta(repo_path, meta)
+        return meta['size']
+
+    @staticmethod
+    def disk_usage(path: Path) -> int:
+        """Bytes of disk used by a directory tree (allocated blocks where the platform reports them)."""
+        total = 0
+        stack = [str(path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        blocks = getattr(st, 'st_blocks', None)
+                        total += blocks * 512 if blocks is not None else st.st_size
+            except OSError:
+                continue
+        return total
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Metadata of every cached clone, least recently used first.
+
+        Each record also carries 'path', the location of the clone.
+        """
+        entries = []
+        meta_files = list(self.root.glob('*/*.meta.json')) + list(self.root.glob(f'{self.MIRRORS_DIR}/*/*.meta.json'))
+        for meta_file in meta_files:
+            repo_path = meta_file.with_name(meta_file.name[:-len('.meta.json')])
+            meta = self.load_meta(repo_path)
+            if meta:
+                meta['path'] = repo_path
+                entries.append(meta)
+        entries.sort(key=lambda meta: meta.get('accessed', 0))
+        return entries
+
+    @property
+    def usage(self) -> int:
+        """Recorded disk usage of all cached clones in bytes."""
+        return sum(meta.get('size', 0) for meta in self.entries())
+
+    def evict(self, repo_path: Path):
+        """Delete a cached clone and the files stored next to it."""
+        shutil.rmtree(repo_path, ignore_errors=True)
+        for suffix in self.SIDECAR_SUFFIXES:
+            try:
+                repo_path.with_name(repo_path.name + suffix).unlink()
+            except OSError:
+                pass
+        try:
+            repo_path.parent.rmdir()  # Last clone of this owner
+        except OSError:
+            pass
+
+    def prune(self, max_bytes: Optional[int] = None, older_than: Optional[float] = None,
+              keep: Optional[Path] = None) -> List[Dict[str, Any]]:
+        """
+        Evict cached clones, least recently used first.
+
+        Mirrors are skipped while a remaining clone borrows objects from them.
+
+        Args:
+            max_bytes: Evict until the clones use at most this many bytes
+            older_than: Also evict clones not accessed for this many seconds
+            keep: A clone never evicted (the one being analyzed); clones
+                locked by other analyses are skipped as well
+
+        Returns:
+            Metadata of the evicted clones
+        """
+        entries = self.entries()
+        total = sum(meta.get('size', 0) for meta in entries)
+        borrowers: Dict[str, int] = {}
+        for meta in entries:
+            if meta.get('reference'):
+                borrowers[meta['reference']] = borrowers.get(meta['reference'], 0) + 1
+        now = time.time()
+        evicted = []
+        # A mirror skipped for its borrowers is reconsidered once they are evicted
+        progress = True
+        while progress:
+            progress = False
+            for meta in entries:
+                if meta in evicted or (keep is not None and meta['path'] == keep):
+                    continue
+                expired = older_than is not None and now - meta.get('accessed', 0) > older_than
+                over_quota = max_bytes is not None and total > max_bytes
+                if not (expired or over_quota) or borrowers.get(str(meta['path'])):
+                    continue
+                with self.lock(meta['path'], blocking=False) as acquired:
+                    if not acquired:
+                        continue  # Being cloned or analyzed
+                    self.evict(meta['path'])
+                total -= meta.get('size', 0)
+                evicted.append(meta)
+                if meta.get('reference'):
+                    borrowers[meta['reference']] -= 1
+                    progress = True
+        return evicted
+
+    def enforce_quota(self, keep: Optional[Path] = None) -> List[Dict[str, Any]]:
+        """Evict least recently used clones while the cache exceeds max_bytes."""
+        if self.max_bytes is None:
+            return []
+        evicted = self.prune(max_bytes=self.max_bytes, keep=keep)
+        for meta in evicted:
+            print(f"🧹 Evicted cached repository {meta.get('owner')}/{meta.get('name')} "
+                  f"({meta.get('size', 0) / 1048576:.1f} MiB)")
+        return evicted
+
+    def _fetch(self, repo_path: Path, bare: bool, clone_args: List[str]):
+        """Fetch the remote's HEAD into a cached clone and move the clone to it."""
+        for args in self._fetch_commands(bare, clone_args):
+            self._run(repo_path, *args)
+
+    @staticmethod
+    def _fetch_commands(bare: bool, clone_args: List[str]) -> List[List[str]]:
+        """Arguments of the git commands run by _fetch, in order."""
+        fetch_args = []
+        if '--depth' in clone_args:
+            fetch_args = clone_args[clone_args.index('--depth'):clone_args.index('--depth') + 2]
+        commands = [['fetch', '--quiet', '--no-tags', *fetch_args, 'origin', 'HEAD']]
+        if bare:
+            commands.append(['update-ref', 'HEAD', 'FETCH_HEAD'])
+        else:
+            commands.append(['reset', '--quiet', '--hard', 'FETCH_HEAD'])
+            commands.append(['clean', '--quiet', '-ffdx'])
+        return commands
+
+    def _remote_head(self, repo_path: Path) -> str:
+        """Commit the remote's HEAD points to."""
+        out = self._run(repo_path, 'ls-remote', 'origin', 'HEAD')
+        return out.split()[0] if out.strip() else ''
+
+    def _head(self, repo_path: Path) -> str:
+        """Commit a clone's HEAD points to."""
+        return self._run(repo_path, 'rev-parse', 'HEAD').strip()
+
+    @staticmethod
+    def _run(repo_path: Path, *args: str) -> str:
+        """Run a git command in a cached clone and return its stdout."""
+        return subprocess.run(['git', '-C', str(repo_path), *args],
+                              check=True, capture_output=True, text=True).stdout
+
+    @staticmethod
+    async def _run_async(repo_path: Path, *args: str) -> str:
+        """_run() without blocking the event loop."""
+        return await run_git_async('-C', str(repo_path), *args)
+
+    @staticmethod
+    def _stderr(error: Exception) -> str:
+        """Readable message for a failed git command."""
+        stderr = getattr(error, 'stderr', None)
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode('utf-8', errors='ignore')
+        return (stderr or '').strip() or str(error)
+
+
+async def run_git_async(*args: str) -> str:
+    """
+    Run a git command as an asyncio subprocess and return its stdout.
+
+    Raises:
+        OSError: If git cannot be started
+        subprocess.CalledProcessError: If the command fails (with its stderr)
+    """
+    process = await asyncio.create_subprocess_exec('git', *args, stdin=asyncio.subprocess.DEVNULL,
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await process.communicate()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, ['git', *args], stdout, stderr)
+    return stdout.decode('utf-8', errors='replace')
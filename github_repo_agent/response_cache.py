@@ -0,0 +1,108 @@
+"""
+Persistent cache of GitHub API responses revalidated with conditional requests.
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .sqlite_cache import SQLiteCache
+
+
+class ResponseCache(SQLiteCache):
+    """
+    SQLite-backed cache of API response bodies with their ETag and Last-Modified validators.
+
+    A response younger than the TTL is served without a request. An older
+    one is revalidated with If-None-Match / If-Modified-Since: GitHub
+    answers 304 Not Modified if it did not change, which is faster than a
+    full response and does not count against the rate limit. The cache is
+    bounded by the total size of the stored bodies; when it grows past
+    max_bytes the least recently used responses are evicted. Processes
+    can share the database (see SQLiteCache).
+
+    Counters: hits (served without a request), revalidations (304s served
+    from the cache) and misses (full responses stored).
+    """
+
+    TABLE = 'responses'
+    COLUMNS = ('key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT,'
+               ' size INTEGER NOT NULL, fetched_at REAL NOT NULL, accessed REAL NOT NULL')
+    KEY_COLUMNS = ('key',)
+    DESCRIPTION = 'API response cache'
+
+    # Seconds a response is served without asking GitHub whether it changed
+    DEFAULT_TTL = 60.0
+
+    # Default bound on the stored body size
+    DEFAULT_MAX_BYTES = 32 << 20
+
+    def __init__(self, path: Path, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize response cache.
+
+        Args:
+            path: Location of the SQLite database (':memory:' for a private in-memory cache)
+            ttl: Seconds a response is used without revalidation (0 always revalidates)
+            max_bytes: Total body size kept before least recently used responses are evicted
+        """
+        super().__init__(path, max_bytes)
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def fresh(self, key: str) -> Optional[bytes]:
+        """
+        Return a stored body that is still within the TTL, or None.
+
+        Args:
+            key: Request identity (URL and anything the response varies on,
+                such as the credentials)
+        """
+        with self._lock:
+            row = self._select('body, fetched_at', (key,))
+            if row is None or time.time() - row[1] >= self.ttl:
+                return None
+            self._touch((key,))
+            self.hits += 1
+        return bytes(row[0])
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for a stored response ({} if there is none)."""
+        with self._lock:
+            row = self._select('etag, last_modified', (key,))
+        headers = {}
+        if row is not None and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row is not None and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def revalidated(self, key: str) -> Optional[bytes]:
+        """
+        Return the stored body after the server answered 304 Not Modified, restarting its TTL.
+
+        Returns:
+            The stored body, or None if it was evicted in the meantime
+        """
+        with self._lock:
+            row = self._select('body', (key,))
+            if row is None:
+                return None
+            self._update((key,), {'fetched_at': time.time()})
+            self._touch((key,))
+            self.revalidations += 1
+        return bytes(row[0])
+
+    def store(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a full response, evicting old responses if the cache grows too large."""
+        with self._lock:
+            self._store((key,), {'body': body, 'etag': etag, 'last_modified': last_modified,
+                                 'fetched_at': time.time()}, len(body))
+            self.misses += 1
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of hits, revalidations and misses since the cache was opened."""
+        return {'hits': self.hits, 'revalidations': self.revalidations, 'misses': self.misses}
@@ -0,0 +1,252 @@
+"""
+Compiled multi-pattern matcher for the AIEnhancer rule set.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+
+class Rule:
+    """A single pattern rule belonging to a category."""
+    __slots__ = ('id', 'category', 'pattern', 'literal', 'standalone')
+
+    def __init__(self, rule_id: int, category: str, pattern: str):
+        self.id = rule_id
+        self.category = category
+        self.pattern = pattern
+        self.literal = required_literal(pattern)
+        # Backreferences, named groups and global inline flags are scoped to a
+        # single pattern and cannot be combined into one alternation
+        self.standalone = bool(re.search(r'\\[1-9]|\(\?P[=<]|\(\?[aiLmsux]+\)', pattern))
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """
+    Find a lower-cased literal that every match of a pattern must contain.
+
+    The analysis is deliberately conservative: patterns with alternation or
+    anything it does not understand yield None, which disables prefiltering
+    for that rule rather than risking a missed match.
+
+    Args:
+        pattern: Regular expression source
+
+    Returns:
+        The longest required literal of at least three characters, or None
+    """
+    if '|' in pattern or re.search(r'\\[xuUN0-7]', pattern):
+        return None
+
+    runs = []
+    current = ''
+    depth = 0
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c.isascii() and (c.isalnum() or c == '_'):
+            if depth == 0:
+                current += c
+            i += 1
+            continue
+
+        # Any other token ends the current run; an optional quantifier
+        # makes the preceding character optional as well
+        if c in '?*' or (c == '{' and pattern[i + 1:i + 2] in ('0', ',')):
+            current = current[:-1]
+        if current:
+            runs.append(current)
+        current = ''
+
+        if c == '\\':
+            i += 2
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                return None
+            i = end + 1
+        elif c == '{':
+            end = pattern.find('}', i)
+            if end == -1:
+                return None
+            i = end + 1
+        elif c == '(':
+            depth += 1
+            i += 1
+        elif c == ')':
+            depth -= 1
+            i += 1
+        else:
+            i += 1
+    if current:
+        runs.append(current)
+
+    runs = [run for run in runs if len(run) >= 3]
+    if not runs:
+        return None
+    return max(runs, key=len).lower()
+
+
+class RuleMatcher:
+    """
+    Evaluates a whole rule set with a single pass over the content.
+
+    All rules are compiled into one alternation of named groups. Each search
+    reports the leftmost match of any remaining rule; the matched rule is
+    then dropped and the search resumes at the same position, so every rule
+    is found exactly as a separate re.search would find it while the content
+    is only traversed once. A cheap literal prefilter removes rules whose
+    required keyword (e.g. 'eval', 'password', 'innerhtml') is absent.
+    """
+
+    # Bound on the number of combined expressions kept per matcher
+    MAX_COMPILED = 256
+    
+    # Budgeted scans search the content in windows of this many characters...
+    WINDOW_SIZE = 1024
+    
+    # ...letting matches run this far past the window end
+    WINDOW_OVERLAP = 1280
+
+    def __init__(self, rules: Dict[str, List[str]], flags: int = re.IGNORECASE):
+        """
+        Initialize rule matcher.
+
+        Args:
+            rules: Mapping of category name to list of pattern strings
+            flags: Regex flags applied to every rule
+        """
+        self.flags = flags
+        self.rules: List[Rule] = []
+        for category, patterns in rules.items():
+            for pattern in patterns:
+                self.rules.append(Rule(len(self.rules), category, pattern))
+        self._compiled: Dict[Tuple[Tuple[int, ...], int], Pattern] = {}
+        self._standalone = {rule.id: re.compile(rule.pattern, flags) for rule in self.rules if rule.standalone}
+
+    def _combined(self, rule_ids: Tuple[int, ...], window: int = 0) -> Pattern:
+        """
+        Compiled alternation for a set of rules.
+
+        With a window, the alternation is prefixed by a lazy skip of at most
+        window - 1 characters, so pattern.match() only tries match starts
+        inside the window while still letting the match itself run past it.
+        """
+        key = (rule_ids, window)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            if len(self._compiled) >= self.MAX_COMPILED:
+                self._compiled.clear()
+            source = '|'.join(f"(?P<r{i}>{self.rules[i].pattern})" for i in rule_ids)
+            if window:
+                source = f"[\\s\\S]{{0,{window - 1}}}?(?:{source})"
+            compiled = re.compile(source, self.flags)
+            self._compiled[key] = compiled
+        return compiled
+
+    def candidates(self, content: str) -> List[Rule]:
+        """Rules that survive the literal prefilter for some content."""
+        if not content.isascii():
+            # Case-insensitive matching of non-ASCII text does not agree with
+            # str.lower(), so skip prefiltering rather than risk a miss
+            return list(self.rules)
+        haystack = content.lower()
+        return [rule for rule in self.rules if rule.literal is None or rule.literal in haystack]
+
+    def match(self, content: str) -> Dict[str, List[str]]:
+        """
+        Find which rules match anywhere in the content.
+
+        Args:
+            content: Text to scan
+
+        Returns:
+            Mapping of category to matched patterns, in rule-set order
+        """
+        found = set()
+        combined, standalone = self._split(self.candidates(content))
+        self._search(content, 0, len(content), combined, standalone, found)
+        return self._group(found)
+
+    def match_with_budget(self, content: str, budget: float) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Find matching rules while spending at most a CPU time budget.
+
+        Match starts are tried one window at a time and the budget is
+        checked between windows, so the cost of a scan is bounded by the
+        budget plus the cost of a single window (which the built-in rules
+        keep small). Matches may extend WINDOW_OVERLAP characters past the
+        window they start in; longer matches may be missed.
+
+        Args:
+            content: Text to scan
+            budget: CPU seconds (of the calling thread) the scan may use
+
+        Returns:
+            (matched, skipped): matched patterns by category as in match(),
+            and the patterns left unevaluated when the budget ran out
+        """
+        deadline = time.thread_time() + budget
+        found = set()
+        combined, standalone = self._split(self.candidates(content))
+        n = len(content)
+        pos = 0
+
+        while pos < n and (combined or standalone):
+            end = min(n, pos + self.WINDOW_SIZE)
+            limit = self._line_boundary(content, end, end + self.WINDOW_OVERLAP)
+            self._search(content, pos, limit, combined, standalone, found, self.WINDOW_SIZE)
+            pos = end
+            if time.thread_time() > deadline:
+                break
+
+        skipped = []
+        if pos < n:
+            skipped = [self.rules[rule_id].pattern for rule_id in sorted(combined + standalone)]
+        return self._group(found), skipped
+
+    @staticmethod
+    def _line_boundary(content: str, start: int, end: int) -> int:
+        """Cut a window at the last newline before end, or at end if there is none."""
+        if end >= len(content):
+            return len(content)
+        newline = content.rfind('\n', start, end)
+        return newline + 1 if newline >= start else end
+
+    @staticmethod
+    def _split(rules: List[Rule]) -> Tuple[List[int], List[int]]:
+        """Separate rules that can share the combined expression from standalone ones."""
+        combined = [rule.id for rule in rules if not rule.standalone]
+        standalone = [rule.id for rule in rules if rule.standalone]
+        return combined, standalone
+
+    def _search(self, content: str, pos: int, endpos: int, combined: List[int],
+                standalone: List[int], found: set, window: int = 0):
+        """
+        Search content[pos:endpos], moving every rule that matches from the pending lists into found.
+
+        With a window, only matches starting within window characters of pos are looked for.
+        """
+        for rule_id in list(standalone):
+            if self._standalone[rule_id].search(content, pos, endpos):
+                found.add(rule_id)
+                standalone.remove(rule_id)
+
+        while combined:
+            pattern = self._combined(tuple(combined), window)
+            m = pattern.match(content, pos, endpos) if window else pattern.search(content, pos, endpos)
+            if m is None:
+                break
+            rule_id = int(m.lastgroup[1:])
+            found.add(rule_id)
+            combined.remove(rule_id)
+            pos = m.start(m.lastgroup)
+
+    def _group(self, found: set) -> Dict[str, List[str]]:
+        """Matched patterns by category, in rule-set order."""
+        matched: Dict[str, List[str]] = {}
+        for rule in self.rules:
+            if rule.id in found:
+                matched.setdefault(rule.category, []).append(rule.pattern)
+        return matched
@@ -0,0 +1,840 @@
+"""
+Single-pass repository scanner that builds a shared file manifest.
+
+Every analysis stage (structure, languages, patterns, metrics, code quality)
+consumes the same manifest, so the filesystem is only traversed once per
+analysis. Manifests can be built from a working tree, directly from the
+git objects of a bare clone, or from a repository archive as it streams in.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import posixpath
+import tarfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from enum import IntFlag
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .blob_cache import BlobCache
+from .file_index import FileIndex
+from .git_objects import GitBlobReader, GitObjectError, hash_blob, list_tree, worktree_blob_ids
+from .ignore_rules import IgnoreRules, is_ignored
+
+
+class FileFlag(IntFlag):
+    """Classification flags recorded for every file in a manifest."""
+    NONE = 0
+    HIDDEN = 1          # File name starts with a dot
+    CODE = 2            # Extension maps to a known programming language
+    TEST = 4            # Relative path mentions 'test'
+    BUILD_OUTPUT = 8    # Lives below a dist/ or build/ directory
+    OVERSIZED = 16      # Larger than the scanner's max_file_size
+    BINARY = 32         # Header contains NUL bytes or mostly non-text bytes
+    MINIFIED = 64       # Minified name or very long average line length
+    GENERATED = 128     # Generated-code marker in the header or name, or linguist-generated
+    VENDORED = 256      # Marked linguist-vendored in .gitattributes
+    MANIFEST = 512      # Dependency manifest or lockfile (e.g. package.json, go.mod)
+
+
+# Bytes read from the start of a file to sniff its content type
+SNIFF_SIZE = 8192
+
+# Average line length (over a header of at least MINIFIED_MIN_HEADER bytes) above which a file is minified
+MINIFIED_LINE_LENGTH = 500
+MINIFIED_MIN_HEADER = 2048
+
+# Markers that generators put near the top of their output (matched case-insensitively)
+GENERATED_MARKERS = (b'@generated', b'do not edit', b'code generated by', b'autogenerated', b'auto-generated')
+
+# File name endings of well-known generated sources
+GENERATED_SUFFIXES = ('_pb2.py', '_pb2_grpc.py', '.pb.go', '.pb.cc', '.pb.h', '.g.dart', '.freezed.dart', '.designer.cs')
+
+# Bytes that occur in text files; anything else counts towards the binary ratio
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+
+
+def sniff_content(name: str, header: bytes) -> FileFlag:
+    """
+    Classify a file as binary, minified or generated from its name and first bytes.
+
+    Args:
+        name: File name
+        header: Up to SNIFF_SIZE bytes from the start of the file
+
+    Returns:
+        Any of FileFlag.BINARY, FileFlag.MINIFIED and FileFlag.GENERATED
+    """
+    if b'\0' in header or (header and len(header.translate(None, _TEXT_BYTES)) > len(header) * 0.3):
+        return FileFlag.BINARY
+
+    flags = sniff_name(name)
+    if len(header) >= MINIFIED_MIN_HEADER:
+        if len(header) / (header.count(b'\n') + 1) > MINIFIED_LINE_LENGTH:
+            flags |= FileFlag.MINIFIED
+    if any(marker in header[:1024].lower() for marker in GENERATED_MARKERS):
+        flags |= FileFlag.GENERATED
+    return flags
+
+
+def sniff_name(name: str) -> FileFlag:
+    """Classify a file as minified or generated from its name alone."""
+    flags = FileFlag.NONE
+    lower_name = name.lower()
+    if '.min.' in lower_name:
+        flags |= FileFlag.MINIFIED
+    if lower_name.endswith(GENERATED_SUFFIXES):
+        flags |= FileFlag.GENERATED
+    return flags
+
+
+def skip_reason(flags: FileFlag) -> Optional[str]:
+    """Name of the first oversized/binary/vendored/generated/minified flag set, or None."""
+    for flag, reason in ((FileFlag.OVERSIZED, 'oversized'), (FileFlag.BINARY, 'binary'),
+                         (FileFlag.VENDORED, 'vendored'), (FileFlag.GENERATED, 'generated'),
+                         (FileFlag.MINIFIED, 'minified')):
+        if flags & flag:
+            return reason
+    return None
+
+
+@dataclass
+class FileEntry:
+    """A single file recorded by the scanner."""
+    path: str  # Relative POSIX path from the repository root
+    name: str
+    ext: str  # Lower-cased suffix, including the dot
+    size: int
+    mtime: float
+    flags: FileFlag = FileFlag.NONE
+    inode: int = 0
+    sha: str = ''  # Git blob id (only set for manifests built from git objects or archives)
+
+    @property
+    def dir(self) -> str:
+        """Relative POSIX path of the containing directory ('.' for the root)."""
+        return posixpath.dirname(self.path) or '.'
+
+    def has(self, flag: FileFlag) -> bool:
+        """Return True if any of the given flags are set on this entry."""
+        return bool(self.flags & flag)
+
+
+@dataclass
+class FileManifest:
+    """In-memory listing of a repository produced by a single tree walk."""
+    root: Path
+    files: List[FileEntry] = field(default_factory=list)
+    directories: List[str] = field(default_factory=list)
+    pruned_directories: List[str] = field(default_factory=list)
+    top_level_dirs: List[str] = field(default_factory=list)
+    index: Optional[FileIndex] = None
+    blob_reader: Optional[GitBlobReader] = None
+    blob_cache: Optional[BlobCache] = None
+    revision: str = ''  # Commit the manifest was built from, when the source records it
+    _sniffed: Set[str] = field(default_factory=set, repr=False, compare=False)
+    _blob_ids: Optional[Dict[str, str]] = field(default=None, repr=False, compare=False)
+
+    def iter_files(self, include: FileFlag = FileFlag.NONE,
+                   exclude: FileFlag = FileFlag.NONE) -> Iterator[FileEntry]:
+        """
+        Iterate over manifest entries filtered by flags.
+
+        Args:
+            include: Only yield entries that carry all of these flags
+            exclude: Skip entries that carry any of these flags
+        """
+        for entry in self.files:
+            if include and (entry.flags & include) != include:
+                continue
+            if exclude and entry.flags & exclude:
+                continue
+            yield entry
+
+    def cached(self, entry: FileEntry, key: str, compute: Callable[[], Any],
+               shared_key: Optional[str] = None) -> Any:
+        """
+        Return a per-file result, reusing the persistent index when the file is unchanged.
+
+        Args:
+            entry: Manifest entry the result belongs to
+            key: Result name stored in the index
+            compute: Callable producing the result on a miss (must not return None)
+            shared_key: Name under which the result is also shared by content
+                through the blob cache; it must identify everything besides
+                the file contents that the result depends on
+        """
+        value = self.lookup(entry, key, shared_key)
+        if value is None:
+            value = compute()
+            self.store(entry, key, value, shared_key)
+        return value
+
+    def lookup(self, entry: FileEntry, key: str, shared_key: Optional[str] = None) -> Any:
+        """Find a stored result in the index, then in the blob cache; None if neither has one."""
+        value = self.index.get(entry, key) if self.index is not None else None
+        if value is None and shared_key and self.blob_cache is not None:
+            blob_id = self.content_sha(entry)
+            if blob_id:
+                value = self.blob_cache.get(blob_id, shared_key)
+                if value is not None and self.index is not None:
+                    self.index.put(entry, key, value)
+        return value
+
+    def store(self, entry: FileEntry, key: str, value: Any, shared_key: Optional[str] = None):
+        """Record a computed result in the index and, if shared_key is given, in the blob cache."""
+        if self.index is not None:
+            self.index.put(entry, key, value)
+        if shared_key and self.blob_cache is not None:
+            blob_id = self.content_sha(entry)
+            if blob_id:
+                self.blob_cache.put(blob_id, shared_key, value)
+
+    def content_sha(self, entry: FileEntry) -> str:
+        """
+        Git blob id of an entry's contents ('' if the file cannot be read).
+
+        Manifests built from git objects or archives already know it (except
+        for archive members streamed past unhashed); for working trees it is
+        taken from the git index when the file is unchanged since checkout,
+        and hashed from the file otherwise.
+        """
+        if entry.sha or self.blob_reader is not None:
+            return entry.sha
+        if self._blob_ids is None:
+            self._blob_ids = worktree_blob_ids(self.root)
+        blob_id = self._blob_ids.get(entry.path)
+        if blob_id:
+            return blob_id
+
+        def compute():
+            try:
+                with self.open_binary(entry) as f:
+                    return hash_blob(f, entry.size)
+            except OSError:
+                return ''
+        return self.cached(entry, 'blob_sha', compute)
+
+    def content_flags(self, entry: FileEntry) -> FileFlag:
+        """
+        Sniff an entry's header for binary, minified and generated content.
+
+        The header is only read once per entry (and not at all while the
+        index holds a result for the unchanged file); the flags found are
+        also set on entry.flags. Oversized entries are never read.
+
+        Args:
+            entry: Manifest entry to classify
+
+        Returns:
+            The entry's flags, including the sniffed ones
+        """
+        if entry.path not in self._sniffed and not entry.has(FileFlag.OVERSIZED):
+            sniffed = self.cached(entry, 'content_flags', lambda: int(self._sniff(entry)))
+            entry.flags |= FileFlag(sniffed)
+            self._sniffed.add(entry.path)
+        return entry.flags
+
+    def _sniff(self, entry: FileEntry) -> FileFlag:
+        """Read an entry's header and classify it."""
+        try:
+            if self.blob_reader is not None:
+                header = self.blob_reader.read(entry.sha)[:SNIFF_SIZE]
+            else:
+                with open(os.path.join(self.root, entry.path), 'rb') as f:
+                    header = f.read(SNIFF_SIZE)
+        except (OSError, GitObjectError):
+            return FileFlag.NONE
+        return sniff_content(entry.name, header)
+
+    def full_path(self, entry: FileEntry) -> Path:
+        """Absolute path of a manifest entry on disk."""
+        return self.root / entry.path
+
+    def open_binary(self, entry: FileEntry) -> BinaryIO:
+        """
+        Open a manifest entry for binary reading.
+
+        Oversized entries (such as large lockfiles, which are still parsed)
+        are streamed from git objects and archives rather than read whole.
+        """
+        if self.blob_reader is not None:
+            if entry.has(FileFlag.OVERSIZED):
+                return self.blob_reader.open(entry.sha)
+            return io.BytesIO(self.blob_reader.read(entry.sha))
+        return open(os.path.join(self.root, entry.path), 'rb')
+
+    def read_bytes(self, entry: FileEntry) -> bytes:
+        """Read the raw contents of a manifest entry."""
+        if self.blob_reader is not None:
+            return self.blob_reader.read(entry.sha)
+        with open(os.path.join(self.root, entry.path), 'rb') as f:
+            return f.read()
+
+    def read_text(self, entry: FileEntry) -> str:
+        """Read a manifest entry as text, ignoring undecodable bytes."""
+        return self.read_bytes(entry).decode('utf-8', errors='ignore')
+
+    def close(self):
+        """Release resources held by the manifest (e.g. the git blob reader)."""
+        if self.blob_reader is not None:
+            self.blob_reader.close()
+
+
+class _AttributeRules:
+    """linguist-vendored / linguist-generated rules from the root .gitattributes."""
+    __slots__ = ('vendored', 'generated')
+
+    def __init__(self, text: str = ''):
+        self.vendored = IgnoreRules.from_gitattributes(text, 'linguist-vendored')
+        self.generated = IgnoreRules.from_gitattributes(text, 'linguist-generated')
+
+    def file_flags(self, rel_path: str) -> FileFlag:
+        """Flags the attributes put on a file."""
+        flags = FileFlag.NONE
+        if self.vendored is not None and self.vendored.match(rel_path, False):
+            flags |= FileFlag.VENDORED
+        if self.generated is not None and self.generated.match(rel_path, False):
+            flags |= FileFlag.GENERATED
+        return flags
+
+    def prunes(self, rel_dir: str) -> bool:
+        """
+        Whether every file below a directory is vendored.
+
+        Attribute patterns that match a directory do not apply to its
+        contents, so only 'dir/**'-style patterns prune, and only while no
+        rule unsets the attribute again (which could re-include a file).
+        """
+        vendored = self.vendored
+        if vendored is None or vendored.has_negations:
+            return False
+        return bool(vendored.match(rel_dir + '/\0', False))
+
+
+class _DirListing:
+    """Result of listing a single directory."""
+    __slots__ = ('prefix', 'files', 'dir_names', 'subdirs', 'pruned')
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.files: List[FileEntry] = []
+        self.dir_names: List[str] = []
+        self.subdirs: List[Tuple[str, str, bool, tuple]] = []
+        self.pruned: List[str] = []
+
+
+class _ArchiveMemberReader:
+    """
+    Serves the contents of the archive member being scanned; the blob_reader of tarball manifests.
+
+    Streamed archives can only be read once, so contents are available
+    while the scanner's on_file callback runs and gone afterwards. Members
+    too large to hold are instead passed on as the archive's own stream of
+    them, which can be read once.
+    """
+
+    def __init__(self):
+        self._sha = ''
+        self._data = b''
+        self._stream: Optional[BinaryIO] = None
+
+    def hold(self, sha: str, data: bytes):
+        """Make the contents of the current member available."""
+        self._sha = sha
+        self._data = data
+
+    def hold_stream(self, stream: BinaryIO):
+        """Make the current member available as a stream (its blob id is not known)."""
+        self._stream = stream
+
+    def release(self):
+        """Drop the contents of the current member."""
+        self._sha = ''
+        self._data = b''
+        self._stream = None
+
+    def read(self, sha: str) -> bytes:
+        """Return the current member's contents if it has the given blob id."""
+        return self.open(sha).read()
+
+    def open(self, sha: str) -> BinaryIO:
+        """Open the current member's contents if it has the given blob id."""
+        if self._stream is not None and not sha:
+            stream, self._stream = self._stream, None
+            return stream
+        if not sha or sha != self._sha:
+            raise GitObjectError(f"contents of {sha or 'an unread file'} were not kept while streaming the archive")
+        return io.BytesIO(self._data)
+
+    def close(self):
+        self.release()
+
+
+class _TreeFilter:
+    """
+    Pruning decisions for a repository listed as a flat sequence of paths (git trees, archives).
+
+    Applies the same rules as the working tree walk: hidden and SKIP_DIRS
+    directories, .gitignore files and vendored directories are pruned.
+    Directory decisions are memoized, so each directory is decided once.
+    """
+
+    def __init__(self, skip_dirs: Set[str]):
+        self.skip_dirs = skip_dirs
+        self.attributes = _AttributeRules()
+        self._gitignores: Dict[str, IgnoreRules] = {}
+        self._chains: Dict[str, Tuple[IgnoreRules, ...]] = {}
+        self._dir_pruned: Dict[str, bool] = {}
+
+    def add_rules(self, rel_path: str, text: str):
+        """Take in the contents of a .gitignore file or of the root .gitattributes."""
+        if rel_path == '.gitattributes':
+            self.attributes = _AttributeRules(text)
+            return
+        rules = IgnoreRules.from_gitignore(text, rel_path[:-len('.gitignore')])
+        if rules is not None:
+            self._gitignores[rules.prefix] = rules
+            # Forget chains that were built without these rules
+            self._chains = {prefix: chain for prefix, chain in self._chains.items()
+                            if not prefix.startswith(rules.prefix)}
+
+    def chain_for(self, prefix: str) -> Tuple[IgnoreRules, ...]:
+        """Rules of the .gitignore files from the root down to a directory."""
+        chain = self._chains.get(prefix)
+        if chain is None:
+            chain = ()
+            if prefix:
+                chain = self.chain_for(prefix[:prefix.rfind('/', 0, len(prefix) - 1) + 1])
+            if prefix in self._gitignores:
+                chain = chain + (self._gitignores[prefix],)
+            self._chains[prefix] = chain
+        return chain
+
+    def pruned_dir(self, parts: List[str]) -> Optional[str]:
+        """The outermost pruned directory above a file (given as path components), or None."""
+        for depth, part in enumerate(parts[:-1]):
+            rel_dir = '/'.join(parts[:depth + 1])
+            is_pruned = self._dir_pruned.get(rel_dir)
+            if is_pruned is None:
+                parent = rel_dir[:len(rel_dir) - len(part)]
+                is_pruned = (part.startswith('.') or part in self.skip_dirs
+                             or is_ignored(self.chain_for(parent), rel_dir, True)
+                             or self.attributes.prunes(rel_dir))
+                self._dir_pruned[rel_dir] = is_pruned
+            if is_pruned:
+                return rel_dir
+        return None
+
+    def ignores_file(self, rel_path: str, name: str) -> bool:
+        """Whether a .gitignore excludes a file."""
+        return is_ignored(self.chain_for(rel_path[:len(rel_path) - len(name)]), rel_path, False)
+
+
+class RepoScanner:
+    """Walks a repository once and records every file in a FileManifest."""
+
+    # Directories that are never descended into
+    SKIP_DIRS = {'node_modules', '__pycache__', 'venv', 'env'}
+
+    # Directories that are descended into but flagged as build output
+    BUILD_DIRS = {'dist', 'build'}
+
+    # Default number of threads listing directories concurrently
+    DEFAULT_WORKERS = 8
+
+    # Files larger than this are flagged OVERSIZED and never read
+    DEFAULT_MAX_FILE_SIZE = 1 << 20
+
+    # Read size when hashing archive members that are never held in memory
+    ARCHIVE_CHUNK_SIZE = 64 << 10
+
+    def __init__(self, code_extensions: Optional[Set[str]] = None, workers: int = DEFAULT_WORKERS,
+                 max_file_size: int = DEFAULT_MAX_FILE_SIZE, use_ignore_files: bool = True,
+                 manifest_names: Optional[Set[str]] = None):
+        """
+        Initialize repository scanner.
+
+        Args:
+            code_extensions: File extensions flagged as CODE (defaults to
+                CodeAnalyzer.LANGUAGE_EXTENSIONS)
+            workers: Number of threads listing directories concurrently
+                (1 walks the tree sequentially)
+            max_file_size: Size in bytes above which files are flagged OVERSIZED
+            use_ignore_files: Honor the repository's .gitignore files and the
+                linguist-vendored / linguist-generated attributes of its
+                root .gitattributes
+            manifest_names: File names flagged as MANIFEST at any depth
+                (defaults to the names in CodeAnalyzer.DEPENDENCY_FILES)
+        """
+        if code_extensions is None or manifest_names is None:
+            from .code_analyzer import CodeAnalyzer
+            if code_extensions is None:
+                code_extensions = set(CodeAnalyzer.LANGUAGE_EXTENSIONS)
+            if manifest_names is None:
+                manifest_names = {name for names in CodeAnalyzer.DEPENDENCY_FILES.values() for name in names}
+        self.code_extensions = code_extensions
+        self.manifest_names = manifest_names
+        self.workers = max(1, workers)
+        self.max_file_size = max_file_size
+        self.use_ignore_files = use_ignore_files
+
+    def scan(self, repo_path: Path, index: Optional[FileIndex] = None) -> FileManifest:
+        """
+        Walk a repository and build its file manifest.
+
+        Directories are listed with os.scandir, fanned out over a thread pool
+        so that listing latency (e.g. on network-mounted caches) overlaps.
+        Paths excluded by the repository's .gitignore files are skipped and
+        directories vendored via .gitattributes are not descended into.
+
+        Args:
+            repo_path: Path to repository root
+            index: Persistent per-file result index to attach to the manifest
+
+        Returns:
+            FileManifest describing every file outside the pruned directories
+        """
+        repo_path = Path(repo_path)
+        manifest = FileManifest(root=repo_path, index=index)
+        attributes = _AttributeRules()
+        if self.use_ignore_files:
+            attributes = _AttributeRules(_read_text_file(repo_path / '.gitattributes'))
+        root = (str(repo_path), '', False, ())
+
+        if self.workers == 1:
+            stack = [root]
+            while stack:
+                stack.extend(self._merge_listing(manifest, self._list_dir(attributes, *stack.pop())))
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending = {pool.submit(self._list_dir, attributes, *root)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for subdir in self._merge_listing(manifest, future.result()):
+                            pending.add(pool.submit(self._list_dir, attributes, *subdir))
+
+        manifest.directories.sort()
+        manifest.pruned_directories.sort()
+        manifest.files.sort(key=lambda e: e.path)
+        return manifest
+
+    def _list_dir(self, attributes: _AttributeRules, abs_dir: str, prefix: str, in_build: bool,
+                  ignore_chain: Tuple[IgnoreRules, ...]) -> _DirListing:
+        """
+        List one directory, classifying its files and deciding which subdirectories to descend.
+
+        Args:
+            attributes: Vendored / generated rules of the repository
+            abs_dir: Absolute path of the directory
+            prefix: Relative POSIX path of the directory plus '/' ('' for the root)
+            in_build: Whether the directory lies below a build output directory
+            ignore_chain: Rules of the .gitignore files above this directory
+        """
+        listing = _DirListing(prefix)
+        try:
+            with os.scandir(abs_dir) as it:
+                dir_entries = list(it)
+        except OSError:
+            return listing  # Unreadable directories are skipped, as os.walk does
+
+        if self.use_ignore_files and any(de.name == '.gitignore' for de in dir_entries):
+            rules = IgnoreRules.from_gitignore(_read_text_file(os.path.join(abs_dir, '.gitignore')), prefix)
+            if rules is not None:
+                ignore_chain = ignore_chain + (rules,)
+
+        for de in dir_entries:
+            name = de.name
+            rel_path = prefix + name
+            try:
+                is_dir = de.is_dir()
+            except OSError:
+                continue
+
+            if is_dir:
+                if (name.startswith('.') or name in self.SKIP_DIRS
+                        or is_ignored(ignore_chain, rel_path, True) or attributes.prunes(rel_path)):
+                    listing.pruned.append(rel_path)
+                    continue
+                listing.dir_names.append(name)
+                # Like os.walk, symlinked directories are listed but not followed
+                if not de.is_symlink():
+                    listing.subdirs.append((de.path, rel_path + '/', in_build or name in self.BUILD_DIRS,
+                                            ignore_chain))
+                continue
+
+            if ignore_chain and is_ignored(ignore_chain, rel_path, False):
+                continue
+            try:
+                st = de.stat()
+            except OSError:
+                continue
+
+            ext = os.path.splitext(name)[1].lower()
+            listing.files.append(FileEntry(
+                path=rel_path,
+                name=name,
+                ext=ext,
+                size=st.st_size,
+                mtime=st.st_mtime,
+                flags=self._classify(rel_path, name, ext, st.st_size, in_build) | attributes.file_flags(rel_path),
+                inode=st.st_ino,
+            ))
+        return listing
+
+    @staticmethod
+    def _merge_listing(manifest: FileManifest, listing: _DirListing) -> List[Tuple[str, str, bool, tuple]]:
+        """Fold one directory listing into the manifest and return the subdirectories to visit."""
+        manifest.directories.append(listing.prefix.rstrip('/') or '.')
+        manifest.pruned_directories.extend(listing.pruned)
+        manifest.files.extend(listing.files)
+        if not listing.prefix:
+            manifest.top_level_dirs = sorted(listing.dir_names)
+        return listing.subdirs
+
+    def scan_git(self, git_dir: Path, rev: str = 'HEAD',
+                 index: Optional[FileIndex] = None) -> FileManifest:
+        """
+        Build a manifest from the git objects of a (bare) repository.
+
+        Files are enumerated with `git ls-tree` and their contents are
+        streamed on demand through a shared `git cat-file --batch` process,
+        so no working tree is needed. .gitignore and .gitattributes rules
+        are read from the tree itself. In partial clones, blobs that the
+        clone filter left out are flagged OVERSIZED and never fetched.
+        Call manifest.close() when done.
+
+        Args:
+            git_dir: Path to a bare repository (or a .git directory)
+            rev: Revision to analyze
+            index: Persistent per-file result index to attach to the manifest
+
+        Returns:
+            FileManifest describing every blob outside the pruned directories
+        """
+        git_dir = Path(git_dir)
+        manifest = FileManifest(root=git_dir, index=index, blob_reader=GitBlobReader(git_dir))
+        directories = {'.'}
+        pruned = set()
+        blobs = list(list_tree(git_dir, rev))
+
+        tree_filter = _TreeFilter(self.SKIP_DIRS)
+        if self.use_ignore_files:
+            for mode, sha, size, rel_path in blobs:
+                name = posixpath.basename(rel_path)
+                if name == '.gitignore' or rel_path == '.gitattributes':
+                    tree_filter.add_rules(rel_path, manifest.blob_reader.read(sha).decode('utf-8', errors='ignore'))
+        attributes = tree_filter.attributes
+
+        for mode, sha, size, rel_path in blobs:
+            parts = rel_path.split('/')
+            name = parts[-1]
+            pruned_dir = tree_filter.pruned_dir(parts)
+            if pruned_dir is not None:
+                pruned.add(pruned_dir)
+                continue
+            if tree_filter.ignores_file(rel_path, name):
+                continue
+
+            for depth in range(1, len(parts)):
+                directories.add('/'.join(parts[:depth]))
+
+            in_build = any(part in self.BUILD_DIRS for part in parts[:-1])
+            ext = os.path.splitext(name)[1].lower()
+            flags = self._classify(rel_path, name, ext, size or 0, in_build) | attributes.file_flags(rel_path)
+            if size is None:
+                flags |= FileFlag.OVERSIZED  # Left out by a blob:limit clone filter
+            manifest.files.append(FileEntry(
+                path=rel_path,
+                name=name,
+                ext=ext,
+                size=size or 0,
+                mtime=0.0,
+                flags=flags,
+                sha=sha,
+            ))
+
+        manifest.directories = sorted(directories)
+        manifest.pruned_directories = sorted(pruned)
+        manifest.top_level_dirs = sorted(d for d in directories if d != '.' and '/' not in d)
+        manifest.files.sort(key=lambda e: e.path)
+        return manifest
+
+    def scan_tarball(self, stream: BinaryIO, on_file: Optional[Callable[['FileManifest', FileEntry], None]] = None,
+                     root: Path = Path('.'), index: Optional[FileIndex] = None,
+                     blob_cache: Optional[BlobCache] = None, strip_components: int = 1) -> FileManifest:
+        """
+        Build a manifest from a repository archive read as a stream, without extracting it.
+
+        Members are visited once, in archive order. Each file's contents are
+        held in memory only while on_file runs for it, so memory is bounded
+        by the largest file rather than the archive. Files larger than
+        max_file_size are never held: they are hashed as they stream by,
+        except for dependency manifests, which on_file reads straight from
+        the archive instead (their blob id is then unknown, so results for
+        them are not shared through the blob cache). Per-file results on_file computes through
+        manifest.cached() land in the manifest's index (an in-memory one if
+        none is given), where the analysis stages find them afterwards.
+        Compressed archives are inflated in bounded pieces (tarfile's own
+        'r|gz' mode inflates whole input blocks at once, which for highly
+        compressible sources means megabytes per block).
+        .gitignore and .gitattributes rules apply to the members after them,
+        which in git archives (sorted tree order) is every non-hidden path
+        of their directory.
+
+        Args:
+            stream: Binary stream of a tar archive (gzip, bzip2 or xz
+                compressed, or not at all)
+            on_file: Called with (manifest, entry) while each kept file's contents are readable
+            root: Path the manifest reports as its root (nothing is written there)
+            index: Per-file result index to attach to the manifest
+            blob_cache: Content-addressed cache shared with other repositories
+            strip_components: Leading path components to drop (GitHub archives
+                put everything below one '<owner>-<repo>-<sha>/' directory)
+
+        Returns:
+            FileManifest describing every file outside the pruned directories
+        """
+        reader = _ArchiveMemberReader()
+        manifest = FileManifest(root=Path(root), index=index if index is not None else FileIndex(),
+                                blob_reader=reader, blob_cache=blob_cache)
+        directories = {'.'}
+        pruned = set()
+        tree_filter = _TreeFilter(self.SKIP_DIRS)
+
+        with tarfile.open(fileobj=_decompressed(stream), mode='r|') as tar:
+            for member in tar:
+                parts = [part for part in member.name.split('/')[strip_components:] if part not in ('', '.')]
+                if not parts or '..' in parts or not member.isfile():
+                    continue  # Directories are recorded from file paths; links have no contents here
+                rel_path = '/'.join(parts)
+                name = parts[-1]
+                pruned_dir = tree_filter.pruned_dir(parts)
+                if pruned_dir is not None:
+                    pruned.add(pruned_dir)
+                    continue
+                if tree_filter.ignores_file(rel_path, name):
+                    continue
+
+                for depth in range(1, len(parts)):
+                    directories.add('/'.join(parts[:depth]))
+
+                in_build = any(part in self.BUILD_DIRS for part in parts[:-1])
+                ext = os.path.splitext(name)[1].lower()
+                flags = (self._classify(rel_path, name, ext, member.size, in_build)
+                         | tree_filter.attributes.file_flags(rel_path))
+                contents = tar.extractfile(member)
+                data = None
+                streamed = bool(flags & FileFlag.OVERSIZED and flags & FileFlag.MANIFEST and on_file is not None)
+                if streamed:
+                    sha = ''  # Read once, by on_file
+                elif flags & FileFlag.OVERSIZED:
+                    sha = hash_blob(contents, member.size, chunk_size=self.ARCHIVE_CHUNK_SIZE)
+                else:
+                    data = contents.read()
+                    sha = hash_blob(io.BytesIO(data), len(data))
+                entry = FileEntry(path=rel_path, name=name, ext=ext, size=member.size, mtime=0.0,
+                                  flags=flags, sha=sha)
+                manifest.files.append(entry)
+
+                if streamed:
+                    reader.hold_stream(io.BufferedReader(_MemberStream(contents)))
+                    try:
+                        on_file(manifest, entry)
+                    finally:
+                        reader.release()
+                elif data is not None:
+                    if self.use_ignore_files and (name == '.gitignore' or rel_path == '.gitattributes'):
+                        tree_filter.add_rules(rel_path, data.decode('utf-8', errors='ignore'))
+                    if on_file is not None:
+                        reader.hold(sha, data)
+                        try:
+                            on_file(manifest, entry)
+                        finally:
+                            reader.release()
+            manifest.revision = tar.pax_headers.get('comment', '')
+
+        manifest.directories = sorted(directories)
+        manifest.pruned_directories = sorted(pruned)
+        manifest.top_level_dirs = sorted(d for d in directories if d != '.' and '/' not in d)
+        manifest.files.sort(key=lambda e: e.path)
+        return manifest
+
+    def _classify(self, rel_path: str, name: str, ext: str, size: int, in_build: bool) -> FileFlag:
+        """Compute the stat-based classification flags of a single file."""
+        flags = FileFlag.NONE
+        if name.startswith('.'):
+            flags |= FileFlag.HIDDEN
+        if ext in self.code_extensions:
+            flags |= FileFlag.CODE
+        if 'test' in rel_path.lower():
+            flags |= FileFlag.TEST
+        if in_build:
+            flags |= FileFlag.BUILD_OUTPUT
+        if size > self.max_file_size:
+            flags |= FileFlag.OVERSIZED
+        if name in self.manifest_names:
+            flags |= FileFlag.MANIFEST
+        return flags
+
+
+# Magic numbers of the compressions scan_tarball accepts, with incremental decompressing readers
+_COMPRESSED_STREAMS = (
+    (b'\x1f\x8b', lambda f: gzip.GzipFile(fileobj=f, mode='rb')),
+    (b'BZh', lambda f: bz2.BZ2File(f, mode='rb')),
+    (b'\xfd7zXZ\x00', lambda f: lzma.LZMAFile(f, mode='rb')),
+)
+
+
+class _PrefixedReader:
+    """Binary stream that first returns bytes already read from another stream, then the rest of it."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._prefix:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            data, self._prefix = self._prefix + self._stream.read(), b''
+            return data
+        data, self._prefix = self._prefix[:size], self._prefix[size:]
+        return data
+
+
+class _MemberStream(io.RawIOBase):
+    """Forward-only reader of an archive member (tarfile's own asks the streamed archive whether it can seek)."""
+
+    def __init__(self, contents: BinaryIO):
+        self._contents = contents
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._contents.readinto(buffer)
+
+
+def _decompressed(stream: BinaryIO) -> BinaryIO:
+    """Wrap a possibly compressed stream in a reader that decompresses it incrementally."""
+    head = stream.read(6)
+    prefixed = _PrefixedReader(head, stream)
+    for magic, reader in _COMPRESSED_STREAMS:
+        if head.startswith(magic):
+            return reader(prefixed)
+    return prefixed
+
+
+def _read_text_file(path) -> str:
+    """Read a small text file such as .gitignore, returning '' if it cannot be read."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    except OSError:
+        return ''
@@ -0,0 +1,158 @@
+"""
+SQLite table of cached rows bounded by their total size, shared by the persistent caches.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class SQLiteCache:
+    """
+    Base of the SQLite-backed caches: rows keyed by KEY_COLUMNS, least recently used evicted first.
+
+    Subclasses name their TABLE and declare its COLUMNS, which must include
+    the key columns, 'size' (bytes the row counts against max_bytes) and
+    'accessed'; they read through _select() and write through _store()
+    and _update().
+
+    Processes can share the database: every write is committed at once,
+    so the write lock is only held for one statement, and the total size
+    is kept in the database next to the rows. Access times are recorded
+    in memory and written by flush(). A lookup or write that fails (e.g.
+    the database stayed locked) is treated as a miss or skipped, never as
+    an error of the analysis.
+    """
+
+    # Table of the cached rows, its column definitions and the columns identifying a row
+    TABLE = ''
+    COLUMNS = ''
+    KEY_COLUMNS: Tuple[str, ...] = ()
+
+    # Name used in warnings
+    DESCRIPTION = 'Cache'
+
+    def __init__(self, path: Path, max_bytes: int):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite database (':memory:' for a private in-memory cache)
+            max_bytes: Total row size kept before least recently used rows are evicted
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.errors = 0
+        self._last_error = None
+        self._accessed: Dict[Tuple[str, ...], float] = {}
+        self._where = ' AND '.join(f'{column} = ?' for column in self.KEY_COLUMNS)
+        self._lock = threading.Lock()
+        # Autocommit: transactions are opened explicitly and kept short
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} ({self.COLUMNS})')
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {self.TABLE}_accessed ON {self.TABLE} (accessed)')
+        # Total size of the rows, updated in the same transactions as they are
+        self._conn.execute('CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)')
+        self._conn.execute(f'INSERT OR IGNORE INTO usage VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM {self.TABLE}))')
+        self._size = self._total()
+
+    def _select(self, columns: str, key: Tuple[str, ...]) -> Optional[tuple]:
+        """Read columns of a row (None if there is none or the lookup failed); call with the lock held."""
+        try:
+            return self._conn.execute(f'SELECT {columns} FROM {self.TABLE} WHERE {self._where}', key).fetchone()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+
+    def _touch(self, key: Tuple[str, ...]):
+        """Record that a row was used, for flush() to write; call with the lock held."""
+        self._accessed[key] = time.time()
+
+    def _store(self, key: Tuple[str, ...], values: Dict[str, Any], size: int):
+        """Insert or replace a row, evicting old rows if the cache grows too large; call with the lock held."""
+        columns = (*self.KEY_COLUMNS, *values, 'size', 'accessed')
+        try:
+            with self._conn:
+                self._conn.execute('BEGIN IMMEDIATE')
+                old = self._conn.execute(f'SELECT size FROM {self.TABLE} WHERE {self._where}', key).fetchone()
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO {self.TABLE} ({", ".join(columns)})'
+                    f' VALUES ({", ".join("?" * len(columns))})',
+                    (*key, *values.values(), size, time.time())
+                )
+                self._conn.execute('UPDATE usage SET size = size + ?', (size - (old[0] if old else 0),))
+                if self._total() > self.max_bytes:
+                    self._write_accessed()  # Evict by up-to-date access times
+                    self._evict()
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def _update(self, key: Tuple[str, ...], values: Dict[str, Any]):
+        """Set columns of a row (other than its key and size); call with the lock held."""
+        assignments = ', '.join(f'{column} = ?' for column in values)
+        try:
+            self._conn.execute(f'UPDATE {self.TABLE} SET {assignments} WHERE {self._where}', (*values.values(), *key))
+        except sqlite3.Error as e:
+            self._failed(e)
+
+    def _evict(self):
+        """Delete least recently used rows until the cache is back under 90% of max_bytes."""
+        target = self.max_bytes * 0.9
+        size = self._total()
+        doomed = []
+        for rowid, row_size in self._conn.execute(f'SELECT rowid, size FROM {self.TABLE} ORDER BY accessed'):
+            if size <= target:
+                break
+            doomed.append((rowid,))
+            size -= row_size
+        self._conn.executemany(f'DELETE FROM {self.TABLE} WHERE rowid = ?', doomed)
+        self._conn.execute('UPDATE usage SET size = ?', (size,))
+
+    def _total(self) -> int:
+        """Total size of the stored rows, as recorded by every process."""
+        self._size = self._conn.execute('SELECT size FROM usage').fetchone()[0]
+        return self._size
+
+    def _write_accessed(self):
+        """Write the access times recorded by _touch() (inside a transaction)."""
+        self._conn.executemany(f'UPDATE {self.TABLE} SET accessed = ? WHERE {self._where}',
+                               [(accessed, *key) for key, accessed in self._accessed.items()])
+        self._accessed.clear()
+
+    def _failed(self, error: sqlite3.Error):
+        """Count a lookup or write that failed; flush() reports them."""
+        self.errors += 1
+        self._last_error = error
+
+    @property
+    def size(self) -> int:
+        """Total size of the stored rows in bytes (as last read once the cache is closed)."""
+        with self._lock:
+            try:
+                return self._total()
+            except sqlite3.Error:
+                return self._size
+
+    def flush(self):
+        """Write the recorded access times and report lookups and writes that failed."""
+        with self._lock:
+            try:
+                if self._accessed:
+                    with self._conn:
+                        self._conn.execute('BEGIN IMMEDIATE')
+                        self._write_accessed()
+            except sqlite3.Error as e:
+                self._failed(e)
+            if self.errors:
+                print(f"⚠️  {self.DESCRIPTION} unavailable for {self.errors} lookup(s) or write(s): {self._last_error}")
+                self.errors = 0
+
+    def close(self):
+        """Write the recorded access times and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -22,6 +22,9 @@ setup(
     install_requires=[
         "requests>=2.31.0",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+    },
     python_requires=">=3.8",
     entry_points={
         "console_scripts": [
@@ -0,0 +1,65 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from github_repo_agent.ai_enhancer import AIEnhancer
+from github_repo_agent.scanner import RepoScanner
+
+from test_git_objects import _git
+from test_tarball import _tarball
+
+
+def _make_sources(root, count=40):
+    for i in range(count):
+        pkg = root / f'pkg{i % 5}'
+        pkg.mkdir(parents=True, exist_ok=True)
+        body = 'def f(x) -> int:\n    """doc"""\n    return x\n'
+        if i % 3 == 0:
+            body += 'password = "hunter2"\n'
+        if i % 4 == 0:
+            body += 'for i in range(len(items)):\n    pass\n'
+        (pkg / f'mod{i}.py').write_text(body)
+    return root
+
+
+def _parallel_enhancer(**kwargs):
+    enhancer = AIEnhancer(**kwargs)
+    enhancer.PARALLEL_MIN_FILES = 1
+    enhancer.MAX_BATCH_SIZE = 3
+    return enhancer
+
+
+def test_parallel_scan_matches_sequential(tmp_path):
+    repo = _make_sources(tmp_path)
+    manifest = RepoScanner().scan(repo)
+
+    sequential = AIEnhancer().analyze_code_quality(repo, manifest)
+    threaded = _parallel_enhancer(workers=4, executor_factory=ThreadPoolExecutor)
+    processes = _parallel_enhancer(workers=2)
+
+    assert threaded.analyze_code_quality(repo, manifest) == sequential
+    assert processes.analyze_code_quality(repo, manifest) == sequential
+    assert len(sequential['security_concerns']) == 14
+
+
+def test_only_worktrees_and_git_objects_are_scanned_in_workers(tmp_path, capsys):
+    repo = _make_sources(tmp_path / 'repo')
+    for args in (['init', '-q'], ['add', '-A'], ['commit', '-q', '-m', 'init']):
+        _git(*args, cwd=repo)
+    pools = []
+
+    def executor_factory(**kwargs):
+        pools.append(kwargs)
+        return ThreadPoolExecutor(**kwargs)
+    enhancer = _parallel_enhancer(workers=2, executor_factory=executor_factory)
+
+    manifest = RepoScanner().scan_git(repo / '.git')
+    in_git = dict(enhancer._scan_entries(manifest, manifest.files))
+    manifest.close()
+    assert len(pools) == 1
+
+    # Archive members are only readable while the stream passes them, in this process
+    in_archive = {}
+    RepoScanner().scan_tarball(io.BytesIO(_tarball(repo)),
+                               on_file=lambda manifest, entry: in_archive.update(enhancer._scan_entries(manifest, [entry])))
+    assert len(pools) == 1 and 'Parallel code scan failed' not in capsys.readouterr().out
+    assert in_archive == in_git
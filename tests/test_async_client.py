@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import time
+
+import pytest
+
+from github_repo_agent import async_client
+from github_repo_agent.async_client import AsyncGitHubClient
+from github_repo_agent.github_client import GitHubClient
+from github_repo_agent.response_cache import ResponseCache
+
+from test_github_client import GRAPHQL_REPOSITORY, _batch_reply, _client, api  # noqa: F401
+
+
+@pytest.fixture(params=['aiohttp', 'executor'])
+def transport(request, monkeypatch):
+    """Run a test with aiohttp, then with the GitHubClient in executor threads as when aiohttp is missing."""
+    if request.param == 'aiohttp':
+        pytest.importorskip('aiohttp')
+    else:
+        monkeypatch.setattr(async_client, 'aiohttp', None)
+    return request.param
+
+
+def _run(client, coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+def test_async_calls_match_the_client(api, transport):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r'] = [(200, {}, {'full_name': 'o/r'})]
+    routes['/repos/o/r/languages'] = [(200, {}, {'Python': 100})]
+    routes['/repos/o/r/topics'] = [(200, {}, {'names': ['cli']})]
+    routes['/repos/o/r/readme'] = [(200, {}, {'content': base64.b64encode(b'# r\n').decode()})]
+    sync = _client(base_url)
+    client = AsyncGitHubClient(_client(base_url))
+
+    async def calls():
+        return await asyncio.gather(client.get_repo_info('o', 'r'), client.get_repo_languages('o', 'r'),
+                                    client.get_repo_topics('o', 'r'), client.get_repo_readme('o', 'r'),
+                                    client.get_repo_info('o', 'missing'), client.get_repo_topics('o', 'missing'))
+
+    assert _run(client, calls()) == [sync.get_repo_info('o', 'r'), sync.get_repo_languages('o', 'r'),
+                                     sync.get_repo_topics('o', 'r'), sync.get_repo_readme('o', 'r'),
+                                     sync.get_repo_info('o', 'missing'), sync.get_repo_topics('o', 'missing')]
+
+
+def test_requests_are_in_flight_together(api, transport):
+    base_url, routes, seen, _ = api
+    for i in range(20):
+        routes[f'/repos/o/r{i}'] = [(200, {}, lambda i=i: time.sleep(0.2) or {'full_name': f'o/r{i}'})]
+    client = AsyncGitHubClient(_client(base_url))
+
+    async def calls():
+        return await asyncio.gather(*(client.get_repo_info('o', f'r{i}') for i in range(20)))
+
+    start = time.perf_counter()
+    infos = _run(client, calls())
+    elapsed = time.perf_counter() - start
+
+    assert [info['full_name'] for info in infos] == [f'o/r{i}' for i in range(20)]
+    # 20 sequential requests take 4 s
+    assert elapsed < 2.0, elapsed
+
+
+def test_retries_and_cache_match_the_client(api, tmp_path):
+    pytest.importorskip('aiohttp')
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r'] = [
+        (502, {}, {'message': 'Bad Gateway'}),
+        (429, {'Retry-After': '0'}, {'message': 'Too Many Requests'}),
+        (200, {}, {'full_name': 'o/r'}),
+    ]
+    routes['/repos/o/limited'] = [(403, {'X-RateLimit-Remaining': '0'}, {'message': 'API rate limit exceeded'})]
+    routes['/repos/o/r/topics'] = [(200, {'ETag': '"v1"'}, {'names': ['cli']})]
+    cache = ResponseCache(tmp_path / 'api.sqlite', ttl=0)
+    client = AsyncGitHubClient(_client(base_url, cache=cache))
+
+    async def calls():
+        return [await client.get_repo_info('o', 'r'), await client.get_repo_info('o', 'limited'),
+                await client.get_repo_topics('o', 'r'), await client.get_repo_topics('o', 'r')]
+
+    info, limited, topics, again = _run(client, calls())
+    assert info == {'full_name': 'o/r'} and limited == GitHubClient._placeholder_info('o', 'limited')
+    assert topics == again == ['cli'] and cache.stats == {'hits': 0, 'revalidations': 1, 'misses': 2}
+    assert [path for path, _ in seen] == ['/repos/o/r'] * 3 + ['/repos/o/limited'] + ['/repos/o/r/topics'] * 2
+
+    # The synchronous client revalidates the same cached response
+    assert client.client.get_repo_topics('o', 'r') == ['cli'] and cache.stats['revalidations'] == 2
+
+
+def test_many_repositories_are_fetched_in_concurrent_batches(api, transport):
+    base_url, routes, seen, posted = api
+    routes['/graphql'] = [(200, {}, _batch_reply(posted, missing={'gone'}))]
+    client = AsyncGitHubClient(_client(base_url))
+
+    infos = _run(client, client.get_many_repo_info(['o/a', 'o/b', 'o/gone', 'o/d', 'o/e', 'o/a'], batch_size=2))
+
+    assert list(infos) == ['o/a', 'o/b', 'o/gone', 'o/d', 'o/e']
+    assert infos['o/d']['stargazers_count'] == 1520 and infos['o/gone'] == GitHubClient._placeholder_info('o', 'gone')
+    assert [path for path, _ in seen] == ['/graphql'] * 3
+
+    routes['/graphql'] = [(401, {}, {'message': 'Bad credentials'})]
+    routes['/repos/o/x'] = [(200, {}, {'full_name': 'o/x'})]
+    infos = _run(client, client.get_many_repo_info(['o/x', 'o/y']))
+    assert infos['o/x'] == {'full_name': 'o/x'} and infos['o/y']['full_name'] == 'o/y'
+
+
+def test_graphql_mode_shares_bundles_with_the_client(api):
+    pytest.importorskip('aiohttp')
+    base_url, routes, seen, _ = api
+    routes['/graphql'] = [(200, {}, GRAPHQL_REPOSITORY)]
+    client = AsyncGitHubClient(_client(base_url, graphql=True))
+
+    async def calls():
+        return [await client.get_repo_info('octo-org', 'octo-app'),
+                await client.get_repo_topics('octo-org', 'octo-app')]
+
+    info, topics = _run(client, calls())
+    assert info['full_name'] == 'octo-org/octo-app' and topics == ['express', 'example']
+    assert client.client.get_repo_languages('octo-org', 'octo-app')['JavaScript'] == 48213
+    assert [path for path, _ in seen] == ['/graphql']
@@ -0,0 +1,143 @@
+import io
+import sqlite3
+
+from github_repo_agent.ai_enhancer import AIEnhancer
+from github_repo_agent.blob_cache import BlobCache
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.file_index import FileIndex
+from github_repo_agent.git_objects import hash_blob, worktree_blob_ids
+from github_repo_agent.scanner import RepoScanner
+
+from test_git_objects import _git, _make_bare_repo
+from test_scanner import _make_repo
+
+
+def test_hash_blob_matches_git(tmp_path):
+    work, _ = _make_bare_repo(tmp_path)
+    (work / 'app.py').write_text('changed\n')
+    ids = worktree_blob_ids(work)
+
+    assert 'app.py' not in ids  # Modified since checkout
+    for path, sha in ids.items():
+        data = (work / path).read_bytes()
+        assert hash_blob(io.BytesIO(data), len(data)) == sha
+    assert worktree_blob_ids(tmp_path / 'missing') == {}
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = BlobCache(tmp_path / 'blobs.sqlite', max_bytes=1000)
+    for i in range(10):
+        cache.put(f'sha{i}', 'k', 'x' * 90)
+    cache.get('sha0', 'k')
+    cache.put('sha10', 'k', 'x' * 90)
+
+    assert cache.size <= 1000
+    assert cache.get('sha0', 'k') is not None
+    assert cache.get('sha1', 'k') is None
+    cache.close()
+
+    reopened = BlobCache(tmp_path / 'blobs.sqlite', max_bytes=1000)
+    assert reopened.size == cache.size and reopened.get('sha10', 'k') == 'x' * 90
+
+
+def test_processes_share_one_database(tmp_path):
+    first = BlobCache(tmp_path / 'blobs.sqlite', max_bytes=1000)
+    second = BlobCache(tmp_path / 'blobs.sqlite', max_bytes=1000)
+    second._conn.execute('PRAGMA busy_timeout = 100')  # Fail fast instead of waiting 30 s
+
+    # Writes are visible at once, and no write holds the lock until a flush
+    first.put('sha0', 'k', 'x' * 90)
+    assert second.get('sha0', 'k') == 'x' * 90
+    for i in range(1, 20):
+        (first if i % 2 else second).put(f'sha{i}', 'k', 'x' * 90)
+    assert second.errors == 0
+
+    # Both writers count against one bound
+    stored = first._conn.execute('SELECT SUM(size) FROM results').fetchone()[0]
+    assert first.size == second.size == stored <= 1000
+
+    # A database that stays locked means misses and skipped writes
+    blocker = sqlite3.connect(str(tmp_path / 'blobs.sqlite'))
+    blocker.execute('BEGIN EXCLUSIVE')
+    second.put('sha20', 'k', 'x')
+    assert second.errors == 1
+    blocker.rollback()
+    blocker.close()
+    assert second.get('sha20', 'k') is None
+    first.close()
+    second.close()
+
+
+def test_fork_only_recomputes_changed_contents(tmp_path):
+    cache = BlobCache(tmp_path / 'blobs.sqlite')
+    analyzer = CodeAnalyzer()
+    enhancer = AIEnhancer()
+
+    def analyze(repo):
+        manifest = RepoScanner().scan(repo)
+        manifest.blob_cache = cache
+        hits, misses = cache.hits, cache.misses
+        metrics = analyzer.calculate_metrics(repo, manifest)
+        quality = enhancer.analyze_code_quality(repo, manifest)
+        return metrics, quality, cache.hits - hits, cache.misses - misses
+
+    upstream = _make_repo(tmp_path / 'upstream')
+    metrics, quality, hits, misses = analyze(upstream)
+    assert hits == 0 and misses > 0
+
+    fork = tmp_path / 'fork'
+    _git('init', '-q', cwd=upstream)
+    _git('add', '-A', cwd=upstream)
+    _git('commit', '-q', '-m', 'init', cwd=upstream)
+    _git('clone', '-q', str(upstream), str(fork))
+    (fork / 'src' / 'api' / 'routes.js').write_text('const y = 2;\nconst z = 3;\n')
+
+    fork_metrics, fork_quality, hits, misses = analyze(fork)
+    assert misses == 2  # Line counts and findings of routes.js only
+    assert fork_quality == quality
+    assert fork_metrics['total_lines'] == metrics['total_lines'] + 1
+
+
+def test_unreadable_files_are_not_cached(tmp_path, monkeypatch):
+    cache = BlobCache(tmp_path / 'blobs.sqlite')
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    (repo / 'app.py').write_text('password = "hunter2"\n')
+    enhancer = AIEnhancer()
+
+    def analyze(fail):
+        manifest = RepoScanner().scan(repo)
+        manifest.blob_cache = cache
+        if fail:
+            monkeypatch.setattr(manifest, 'read_bytes', lambda entry: 1 / 0)
+        return enhancer.analyze_code_quality(repo, manifest)
+
+    failed = analyze(fail=True)
+    assert failed['skipped_files'] == [{'file': 'app.py', 'reason': 'unreadable'}]
+    assert failed['security_concerns'] == [] and cache.size == 0
+
+    assert analyze(fail=False)['security_concerns'] != []
+
+
+def test_unreadable_files_do_not_cache_empty_line_counts(tmp_path, monkeypatch):
+    cache = BlobCache(tmp_path / 'blobs.sqlite')
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    (repo / 'app.py').write_text('import os\n\n# entry point\nprint(os.name)\n')
+    for args in (['init', '-q'], ['add', '-A'], ['commit', '-q', '-m', 'init']):
+        _git(*args, cwd=repo)  # Blob ids then come from the git index, without reading the file
+    analyzer = CodeAnalyzer()
+
+    def metrics(fail):
+        manifest = RepoScanner().scan(repo, index=FileIndex.load(tmp_path / 'index.json'))
+        manifest.blob_cache = cache
+        if fail:
+            monkeypatch.setattr(manifest, 'open_binary', lambda entry: open(tmp_path / 'missing', 'rb'))
+        result = analyzer.calculate_metrics(repo, manifest)
+        manifest.index.save()
+        return result
+
+    assert metrics(fail=True)['total_lines'] == 0
+    assert cache.size == 0 and 'line_counts' not in str(FileIndex.load(tmp_path / 'index.json').files)
+
+    assert metrics(fail=False)['total_lines'] == 4
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from github_repo_agent import repo_cache
+from github_repo_agent.agent import GitHubRepoAgent
+from github_repo_agent.git_objects import missing_blobs
+from github_repo_agent.scanner import FileFlag
+
+from test_git_objects import _git, _make_bare_repo
+
+BIG_SIZE = 200_000
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    work, bare = _make_bare_repo(tmp_path)
+    (work / 'assets').mkdir()
+    (work / 'assets' / 'big.dat').write_bytes(b'x' * BIG_SIZE)
+    _git('add', '-A', cwd=work)
+    _git('commit', '-q', '-m', 'big', cwd=work)
+    _git('config', 'uploadpack.allowFilter', 'true', cwd=work)
+    _git('config', 'uploadpack.allowAnySHA1InWant', 'true', cwd=work)
+    return work
+
+
+@pytest.fixture
+def agent(tmp_path, upstream, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: {})
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: f'file://{upstream}')
+    return agent
+
+
+def _commit_count(repo):
+    out = subprocess.run(['git', '-C', str(repo), 'rev-list', '--count', 'HEAD'],
+                         check=True, capture_output=True, text=True).stdout
+    return int(out)
+
+
+def test_shallow_clone_fetches_one_commit(agent):
+    analysis = agent.analyze_repo('owner/repo', clone_strategy='shallow')
+
+    assert analysis.clone_info['strategy'] == 'shallow'
+    assert analysis.clone_info['disk_bytes'] > 0 and analysis.clone_info['source'] == 'clone'
+    assert _commit_count(agent.repo_cache.path_for('owner', 'repo')) == 1
+    assert analysis.metrics['total_files'] > 0
+
+    again = agent.analyze_repo('owner/repo', clone_strategy='shallow')
+    assert again.clone_info['source'] == 'hit' and again.metrics == analysis.metrics
+
+
+def test_clones_keep_their_history_by_default(agent):
+    analysis = agent.analyze_repo('owner/repo')
+
+    assert analysis.clone_info['strategy'] == 'full'
+    assert _commit_count(agent.repo_cache.path_for('owner', 'repo')) == 2
+
+
+def test_blob_limit_clone_leaves_large_blobs_unread(agent):
+    analysis = agent.analyze_repo('owner/repo', backend='git', clone_strategy='blob-limit', blob_limit=BIG_SIZE // 2)
+
+    repo = agent.repo_cache.path_for('owner', 'repo', bare=True)
+    assert len(missing_blobs(repo)) == 1
+    manifest = agent.scanner.scan_git(repo)
+    try:
+        big = next(e for e in manifest.files if e.name == 'big.dat')
+        assert big.flags & FileFlag.OVERSIZED
+    finally:
+        manifest.close()
+    # Analysis never fetched it
+    assert len(missing_blobs(repo)) == 1
+    assert analysis.clone_info['disk_bytes'] < BIG_SIZE
+    assert sorted(analysis.dependencies['python']) == ['flask', 'requests']
+
+
+
+def test_a_failing_stage_still_closes_the_manifest_and_saves_the_index(agent, monkeypatch):
+    scanned = []
+    scan_git = agent.scanner.scan_git
+    monkeypatch.setattr(agent.scanner, 'scan_git', lambda *args, **kwargs: scanned.append(scan_git(*args, **kwargs))
+                        or scanned[-1])
+
+    def fail(repo_path, manifest):
+        raise RuntimeError('stage failed')
+    monkeypatch.setattr(agent.code_analyzer, 'identify_patterns', fail)
+
+    with pytest.raises(RuntimeError):
+        agent.analyze_repo('owner/repo', backend='git')
+
+    # The stages before the failing one read blobs through cat-file, which is stopped again
+    assert scanned[0].blob_reader._proc is None
+    index = agent._index_path(agent.repo_cache.path_for('owner', 'repo', bare=True))
+    assert 'line_counts' not in index.read_text() and 'dependencies' in index.read_text()
+
+def test_blobless_git_clone_prefetches_head_in_one_batch(agent):
+    analysis = agent.analyze_repo('owner/repo', backend='git', clone_strategy='blobless')
+
+    repo = agent.repo_cache.path_for('owner', 'repo', bare=True)
+    assert missing_blobs(repo) == []
+    assert analysis.metrics['total_files'] > 0
+    assert sorted(analysis.dependencies['python']) == ['flask', 'requests']
+
+
+def test_unknown_clone_strategy_is_rejected(agent):
+    with pytest.raises(ValueError):
+        agent.analyze_repo('owner/repo', clone_strategy='sparse')
+
+
+def test_forks_share_the_objects_of_their_upstream(tmp_path, upstream, monkeypatch):
+    (upstream / 'assets' / 'noise.dat').write_bytes(os.urandom(BIG_SIZE))  # Incompressible
+    _git('add', '-A', cwd=upstream)
+    _git('commit', '-q', '-m', 'noise', cwd=upstream)
+    fork = tmp_path / 'fork'
+    _git('clone', '-q', str(upstream), str(fork))
+    (fork / 'fork.txt').write_text('fork\n')
+    _git('add', '-A', cwd=fork)
+    _git('commit', '-q', '-m', 'fork', cwd=fork)
+    urls = {'upstream': f'file://{upstream}', 'alice': f'file://{fork}', 'bob': f'file://{fork}'}
+    fork_info = {'fork': True, 'source': {'full_name': 'upstream/repo'}}
+
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'), fork_mirrors=True)
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: fork_info)
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: urls[owner])
+    alone = GitHubRepoAgent(cache_dir=str(tmp_path / 'alone'))
+    monkeypatch.setattr(alone.github_client, 'get_repo_info', lambda owner, name: fork_info)
+    monkeypatch.setattr(alone, '_clone_url', lambda owner, name: urls[owner])
+
+    for strategy in ('full', 'shallow'):
+        owner = 'alice' if strategy == 'full' else 'bob'
+        shared = agent.analyze_repo(f'{owner}/repo', clone_strategy=strategy)
+        separate = alone.analyze_repo(f'{owner}/repo', clone_strategy=strategy)
+        assert shared.clone_info['reference'] == 'upstream/repo' and 'reference' not in separate.clone_info
+        assert shared.clone_info['disk_bytes'] < BIG_SIZE < separate.clone_info['disk_bytes']
+        assert shared.metrics == separate.metrics and shared.metrics['total_files'] > 0
+
+
+def test_async_analysis_matches_the_synchronous_one(tmp_path, upstream, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: f'file://{upstream}')
+
+    async def repo_info(owner, name):
+        return {}
+
+    monkeypatch.setattr(agent.async_github_client, 'get_repo_info', repo_info)
+
+    async def analyses():
+        try:
+            shallow, again = await asyncio.gather(agent.analyze_repo_async('owner/repo', clone_strategy='shallow'),
+                                                  agent.analyze_repo_async('owner/repo', clone_strategy='shallow'))
+            assert shallow is again  # One run for both
+            blobless = await agent.analyze_repo_async('owner/repo', backend='git', clone_strategy='blobless')
+            (upstream / 'extra.py').write_text('import os\n')
+            _git('add', '-A', cwd=upstream)
+            _git('commit', '-q', '-m', 'extra', cwd=upstream)
+            refreshed = await agent.analyze_repo_async('owner/repo', clone_strategy='shallow', max_age=0)
+            return shallow, blobless, refreshed
+        finally:
+            await agent.close_async()
+
+    shallow, blobless, refreshed = asyncio.run(analyses())
+
+    assert shallow.clone_info['source'] == 'clone' and _commit_count(agent.repo_cache.path_for('owner', 'repo')) == 1
+    assert missing_blobs(agent.repo_cache.path_for('owner', 'repo', bare=True)) == []
+    assert refreshed.clone_info['source'] == 'refresh'
+    assert refreshed.metrics['code_files'] == shallow.metrics['code_files'] + 1
+
+    separate = GitHubRepoAgent(cache_dir=str(tmp_path / 'separate'))
+    monkeypatch.setattr(separate.github_client, 'get_repo_info', lambda owner, name: {})
+    monkeypatch.setattr(separate, '_clone_url', lambda owner, name: f'file://{upstream}')
+    expected = separate.analyze_repo('owner/repo')
+    for analysis in (refreshed, separate.analyze_repo('owner/repo', backend='git', clone_strategy='blobless')):
+        assert analysis.metrics == expected.metrics and analysis.dependencies == expected.dependencies
+        assert analysis.recommendations == expected.recommendations
+    assert blobless.clone_info['disk_bytes'] > 0
+
+
+def test_many_async_analyses_are_in_flight_together(tmp_path, upstream, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: f'file://{upstream}')
+
+    async def many_repo_info(repos, batch_size):
+        return {full_name: {'full_name': full_name} for full_name in repos}
+
+    monkeypatch.setattr(agent.async_github_client, 'get_many_repo_info', many_repo_info)
+    clones, peak = [], []
+    run_git_async = repo_cache.run_git_async
+
+    async def counting_git(*args):
+        if args[0] == 'clone':
+            clones.append(1)
+            peak.append(len(clones))
+            await asyncio.sleep(0.1)
+        try:
+            return await run_git_async(*args)
+        finally:
+            if args[0] == 'clone':
+                clones.pop()
+
+    monkeypatch.setattr(repo_cache, 'run_git_async', counting_git)
+    urls = [f'owner{i}/repo' for i in range(8)] + ['not a repo']
+
+    async def analyses():
+        try:
+            return await agent.analyze_repos_async(urls, concurrency=4)
+        finally:
+            await agent.close_async()
+
+    analyses = asyncio.run(analyses())
+
+    assert sorted(analyses) == urls[:8]
+    assert all(analysis.clone_info['source'] == 'clone' and analysis.metrics['total_files'] > 0
+               for analysis in analyses.values())
+    # Four analyses at a time, whose clones overlap
+    assert len(peak) == 8 and max(peak) == 4
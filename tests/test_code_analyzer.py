@@ -0,0 +1,58 @@
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.scanner import RepoScanner
+
+
+def _write(root, files):
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+def test_patterns_match_whole_names_not_substrings(tmp_path):
+    repo = _write(tmp_path / 'repo', {
+        'rapid.py': '',
+        'protest/contest.txt': '',
+        'docs/reactor.md': '',
+    })
+    assert CodeAnalyzer().identify_patterns(repo, RepoScanner().scan(repo)) == []
+
+
+def test_patterns_are_detected_from_names_extensions_and_paths(tmp_path):
+    repo = _write(tmp_path / 'repo', {
+        'src/api/__init__.py': '',
+        'lib/user_service.test.js': '',
+        'docker-compose.yml': '',
+        'web/App.tsx': '',
+        '.github/workflows/ci.yml': '',
+        'server.js': '',
+    })
+    manifest = RepoScanner().scan(repo)
+    patterns = CodeAnalyzer().identify_patterns(repo, manifest)
+    assert patterns == ['REST API', 'Docker', 'Testing', 'CI/CD', 'React', 'Express']
+
+
+def test_dependencies_are_found_in_every_subproject(tmp_path):
+    import json
+    import time
+
+    files = {'package.json': json.dumps({'devDependencies': {'lerna': '^8'}})}
+    for i in range(500):
+        files[f'packages/pkg{i}/package.json'] = json.dumps({'dependencies': {'react': '^18', f'lib{i % 10}': '1'}})
+    files['services/api/go.mod'] = 'module api\n\nrequire github.com/gin-gonic/gin v1.9.0\n'
+    files['node_modules/x/package.json'] = json.dumps({'dependencies': {'hidden': '1'}})
+    repo = _write(tmp_path / 'repo', files)
+
+    manifest = RepoScanner().scan(repo)
+    analyzer = CodeAnalyzer()
+    start = time.perf_counter()
+    subprojects = analyzer.extract_dependencies_by_subproject(repo, manifest)
+    elapsed = time.perf_counter() - start
+
+    assert len(subprojects) == 502
+    assert subprojects['packages/pkg3'] == {'javascript': ['react', 'lib3'], 'typescript': ['react', 'lib3']}
+    assert subprojects['services/api'] == {'go': ['github.com/gin-gonic/gin']}
+    merged = analyzer.merge_dependencies(subprojects)
+    assert merged['javascript'] == ['lerna', 'react'] + [f'lib{i}' for i in range(10)]
+    assert elapsed < 1.0
@@ -0,0 +1,53 @@
+import subprocess
+
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.git_objects import GitBlobReader, list_tree
+from github_repo_agent.scanner import RepoScanner
+
+from test_scanner import _make_repo
+
+
+def _git(*args, cwd=None):
+    subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+        cwd=cwd, check=True, capture_output=True
+    )
+
+
+def _make_bare_repo(tmp_path):
+    work = _make_repo(tmp_path / 'work')
+    (work / 'requirements.txt').write_text('requests>=2\nflask\n')
+    _git('init', '-q', cwd=work)
+    _git('add', '-A', cwd=work)
+    _git('commit', '-q', '-m', 'init', cwd=work)
+    bare = tmp_path / 'repo.git'
+    _git('clone', '-q', '--bare', str(work), str(bare))
+    return work, bare
+
+
+def test_blob_reader_streams_many_objects(tmp_path):
+    work, bare = _make_bare_repo(tmp_path)
+    blobs = list(list_tree(bare))
+    with GitBlobReader(bare) as reader:
+        for _, sha, size, path in blobs * 3:
+            data = reader.read(sha)
+            assert len(data) == size
+            assert data == (work / path).read_bytes()
+
+
+def test_git_manifest_matches_worktree(tmp_path):
+    work, bare = _make_bare_repo(tmp_path)
+    scanner = RepoScanner()
+    analyzer = CodeAnalyzer()
+
+    tree = scanner.scan(work)
+    objects = scanner.scan_git(bare)
+    try:
+        assert [e.path for e in objects.files] == [e.path for e in tree.files]
+        assert sorted(objects.top_level_dirs) == sorted(tree.top_level_dirs)
+        for stage in ('analyze_structure', 'detect_languages', 'identify_patterns', 'calculate_metrics'):
+            assert getattr(analyzer, stage)(bare, objects) == getattr(analyzer, stage)(work, tree)
+        deps = analyzer.extract_dependencies(bare, objects)
+        assert sorted(deps['python']) == ['flask', 'requests']
+    finally:
+        objects.close()
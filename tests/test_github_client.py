@@ -0,0 +1,298 @@
+import base64
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from github_repo_agent.agent import GitHubRepoAgent
+from github_repo_agent.github_client import GitHubClient
+from github_repo_agent.response_cache import ResponseCache
+
+
+@pytest.fixture
+def api():
+    """
+    Stub API: routes map a path to a list of (status, headers, body) replies, the last one repeating.
+
+    Yields the base URL, the routes, the (path, client port) of every request and the POSTed JSON bodies.
+    """
+    routes = {}
+    requests_seen = []
+    posted = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive
+        wbufsize = 1 << 16  # One write per response, so Nagle's algorithm never delays it
+
+        def do_POST(self):
+            posted.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            self.do_GET()
+
+        def do_GET(self):
+            requests_seen.append((self.path, self.client_address[1]))
+            replies = routes.get(self.path, [(404, {}, {'message': 'Not Found'})])
+            status, headers, body = replies.pop(0) if len(replies) > 1 else replies[0]
+            if 'ETag' in headers and self.headers.get('If-None-Match') == headers['ETag']:
+                self.send_response(304)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if callable(body):
+                body = body()
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', routes, requests_seen, posted
+    server.shutdown()
+    server.server_close()
+
+
+def _client(base_url, **kwargs):
+    client = GitHubClient(token='t', backoff=0.001, **kwargs)
+    client.BASE_URL = base_url
+    return client
+
+
+def test_calls_share_one_keep_alive_connection(api):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r'] = [(200, {}, {'full_name': 'o/r'})]
+    routes['/repos/o/r/languages'] = [(200, {}, {'Python': 100})]
+    routes['/repos/o/r/topics'] = [(200, {}, {'names': ['cli']})]
+    routes['/repos/o/r/readme'] = [(200, {}, {'content': base64.b64encode(b'# r\n').decode()})]
+    client = _client(base_url)
+
+    for _ in range(5):
+        assert client.get_repo_info('o', 'r')['full_name'] == 'o/r'
+        assert client.get_repo_languages('o', 'r') == {'Python': 100}
+        assert client.get_repo_topics('o', 'r') == ['cli']
+        assert client.get_repo_readme('o', 'r') == '# r\n'
+    client.close()
+
+    assert len(seen) == 20 and len({port for _, port in seen}) == 1
+
+
+def test_server_errors_and_secondary_rate_limits_are_retried(api):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r'] = [
+        (502, {}, {'message': 'Bad Gateway'}),
+        (403, {}, {'message': 'You have exceeded a secondary rate limit.'}),
+        (429, {'Retry-After': '0'}, {'message': 'Too Many Requests'}),
+        (200, {}, {'full_name': 'o/r'}),
+    ]
+    assert _client(base_url).get_repo_info('o', 'r')['full_name'] == 'o/r'
+    assert len(seen) == 4
+
+    # Retries are bounded
+    routes['/repos/o/flaky/languages'] = [(503, {}, {'message': 'Unavailable'})]
+    assert _client(base_url, max_retries=2).get_repo_languages('o', 'flaky') == {}
+    assert len(seen) == 4 + 3
+
+
+def test_primary_rate_limit_and_missing_repos_are_not_retried(api):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r'] = [(403, {'X-RateLimit-Remaining': '0'}, {'message': 'API rate limit exceeded'})]
+    client = _client(base_url)
+
+    assert client.get_repo_info('o', 'r')['full_name'] == 'o/r'  # Fallback record
+    assert client.get_repo_topics('o', 'missing') == []
+    assert len(seen) == 2
+
+
+def test_slow_responses_time_out(api):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/slow/languages'] = [(200, {}, lambda: time.sleep(2) or {'full_name': 'o/slow'})]
+    client = _client(base_url, timeout=(1.0, 0.2), max_retries=1)
+
+    start = time.perf_counter()
+    assert client.get_repo_languages('o', 'slow') == {}
+    assert time.perf_counter() - start < 1.5 and len(seen) == 2
+
+
+def test_responses_are_cached_and_revalidated_with_etags(api, tmp_path):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r/topics'] = [(200, {'ETag': '"v1"'}, {'names': ['cli']})]
+    cache = ResponseCache(tmp_path / 'api.sqlite', ttl=3600)
+    client = _client(base_url, cache=cache)
+
+    assert client.get_repo_topics('o', 'r') == ['cli']
+    assert client.get_repo_topics('o', 'r') == ['cli']  # Fresh: no request
+    assert len(seen) == 1 and cache.stats == {'hits': 1, 'revalidations': 0, 'misses': 1}
+
+    # Past the TTL (here in another process's cache), a 304 reuses the stored body
+    cache = ResponseCache(tmp_path / 'api.sqlite', ttl=0)
+    client = _client(base_url, cache=cache)
+    assert client.get_repo_topics('o', 'r') == ['cli']
+    assert len(seen) == 2 and cache.stats == {'hits': 0, 'revalidations': 1, 'misses': 0}
+
+    routes['/repos/o/r/topics'] = [(200, {'ETag': '"v2"'}, {'names': ['cli', 'api']})]
+    assert client.get_repo_topics('o', 'r') == ['cli', 'api']
+    assert client.get_repo_topics('o', 'r') == ['cli', 'api']
+    assert len(seen) == 4 and cache.stats == {'hits': 0, 'revalidations': 2, 'misses': 1}
+
+    # Other credentials may see other data
+    other = GitHubClient(token='other', cache=cache)
+    other.BASE_URL = base_url
+    assert other.get_repo_topics('o', 'r') == ['cli', 'api']
+    assert cache.stats['misses'] == 2
+
+
+def test_errors_are_not_cached(api, tmp_path):
+    base_url, routes, seen, _ = api
+    cache = ResponseCache(tmp_path / 'api.sqlite', ttl=3600)
+    client = _client(base_url, cache=cache)
+
+    assert client.get_repo_languages('o', 'missing') == {}
+    routes['/repos/o/missing/languages'] = [(200, {'ETag': '"v1"'}, {'Go': 10})]
+    assert client.get_repo_languages('o', 'missing') == {'Go': 10}
+    assert len(seen) == 2 and cache.stats['misses'] == 1
+
+
+
+def test_a_locked_cache_database_only_skips_caching(api, tmp_path, capsys):
+    base_url, routes, seen, _ = api
+    routes['/repos/o/r/topics'] = [(200, {'ETag': '"v1"'}, {'names': ['cli']})]
+    cache = ResponseCache(tmp_path / 'api.sqlite', ttl=3600)
+    cache._conn.execute('PRAGMA busy_timeout = 100')  # Fail fast instead of waiting 30 s
+    client = _client(base_url, cache=cache)
+
+    blocker = sqlite3.connect(str(tmp_path / 'api.sqlite'))
+    blocker.execute('BEGIN EXCLUSIVE')
+    assert client.get_repo_topics('o', 'r') == ['cli']
+    blocker.rollback()
+    blocker.close()
+    assert client.get_repo_topics('o', 'r') == ['cli']
+    assert len(seen) == 2 and cache.size > 0
+
+    cache.flush()
+    assert 'API response cache unavailable for 1 lookup(s) or write(s)' in capsys.readouterr().out
+    assert client.get_repo_topics('o', 'r') == ['cli'] and len(seen) == 2
+
+GRAPHQL_REPOSITORY = json.loads((Path(__file__).parent / 'fixtures' / 'graphql_repository.json').read_text())
+
+
+def test_graphql_mode_answers_every_call_from_one_query(api):
+    base_url, routes, seen, posted = api
+    routes['/graphql'] = [(200, {}, GRAPHQL_REPOSITORY)]
+    client = _client(base_url, graphql=True)
+
+    bundle = client.get_repo_bundle('octo-org', 'octo-app')
+    info = client.get_repo_info('octo-org', 'octo-app')
+    assert client.get_repo_languages('octo-org', 'octo-app') == {'JavaScript': 48213, 'CSS': 5120, 'Dockerfile': 880}
+    assert client.get_repo_topics('octo-org', 'octo-app') == ['express', 'example']
+    assert client.get_repo_readme('octo-org', 'octo-app').startswith('# octo-app')
+    assert [path for path, _ in seen] == ['/graphql', '/graphql']  # Explicit bundle, then one for all four calls
+
+    assert info['full_name'] == 'octo-org/octo-app' and info['html_url'] == 'https://github.com/octo-org/octo-app'
+    assert info['stargazers_count'] == 1520 and info['open_issues_count'] == 15
+    assert info['license']['spdx_id'] == 'MIT' and info['parent'] == {'full_name': 'upstream-org/octo-app'}
+    assert [entry['path'] for entry in bundle['tree'] if entry['type'] == 'blob'] == ['README.md', 'package.json']
+    assert json.loads(bundle['files']['package.json'])['dependencies']['express'] == '^4.18.2'
+
+    query = posted[0]['query']
+    assert posted[0]['variables'] == {'owner': 'octo-org', 'name': 'octo-app'}
+    assert query.count('{') == query.count('}') and 'file12: object(expression: "HEAD:composer.json")' in query
+
+
+def test_graphql_mode_falls_back_to_rest(api):
+    base_url, routes, seen, _ = api
+    routes['/graphql'] = [(200, {}, {'data': {'repository': None},
+                                     'errors': [{'type': 'NOT_FOUND', 'message': 'Could not resolve'}]})]
+    routes['/repos/o/r/topics'] = [(200, {}, {'names': ['cli']})]
+    client = _client(base_url, graphql=True)
+
+    assert client.get_repo_topics('o', 'r') == ['cli']
+    assert client.get_repo_languages('o', 'r') == {}
+    assert [path for path, _ in seen] == ['/graphql', '/repos/o/r/topics', '/repos/o/r/languages']
+
+    anonymous = GitHubClient(graphql=True)
+    anonymous.token = None
+    anonymous.BASE_URL = base_url
+    assert anonymous.get_repo_bundle('o', 'r') is None and anonymous.get_repo_topics('o', 'r') == ['cli']
+
+
+def test_agent_with_a_token_analyzes_a_repository_in_one_request(api, tmp_path):
+    base_url, routes, seen, _ = api
+    routes['/graphql'] = [(200, {}, GRAPHQL_REPOSITORY)]
+    agent = GitHubRepoAgent(github_token='t', cache_dir=str(tmp_path / 'cache'))
+    agent.github_client.BASE_URL = base_url
+
+    analysis = agent.analyze_repo('octo-org/octo-app', clone=False)
+
+    assert analysis.repo_url == 'https://github.com/octo-org/octo-app'
+    # The same query also answered everything else the entry points ask the API for
+    assert agent.github_client.get_repo_topics('octo-org', 'octo-app') == ['express', 'example']
+    assert agent.github_client.get_repo_readme('octo-org', 'octo-app').startswith('# octo-app')
+    assert [path for path, _ in seen] == ['/graphql']
+    assert GitHubRepoAgent(github_token='t', cache_dir=str(tmp_path / 'cache'), graphql=False).github_client.graphql is False
+
+def _batch_reply(posted, missing=()):
+    """GraphQL reply to the last posted batch query, leaving out the missing repositories."""
+    def reply():
+        variables = posted[-1]['variables']
+        data, errors = {}, []
+        for key, owner in variables.items():
+            if not key.startswith('owner'):
+                continue
+            i = key[len('owner'):]
+            name = variables[f'name{i}']
+            if name in missing:
+                data[f'repo{i}'] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [f'repo{i}'], 'message': f'Could not resolve {name}'})
+            else:
+                data[f'repo{i}'] = dict(GRAPHQL_REPOSITORY['data']['repository'], name=name,
+                                        nameWithOwner=f'{owner}/{name}', url=f'https://github.com/{owner}/{name}')
+        return {'data': data, 'errors': errors} if errors else {'data': data}
+    return reply
+
+
+def test_many_repositories_are_fetched_in_batches(api):
+    base_url, routes, seen, posted = api
+    routes['/graphql'] = [(200, {}, _batch_reply(posted, missing={'gone'}))]
+    client = _client(base_url)
+    repos = ['o/a', 'o/b', 'o/gone', 'o/d', 'o/e', 'o/a']
+
+    infos = client.get_many_repo_info(repos, batch_size=2)
+
+    assert [path for path, _ in seen] == ['/graphql'] * 3
+    assert posted[1]['variables'] == {'owner0': 'o', 'name0': 'gone', 'owner1': 'o', 'name1': 'd'}
+    assert list(infos) == ['o/a', 'o/b', 'o/gone', 'o/d', 'o/e']
+    assert infos['o/d']['full_name'] == 'o/d' and infos['o/d']['stargazers_count'] == 1520
+    assert infos['o/gone'] == GitHubClient._placeholder_info('o', 'gone')
+
+
+def test_failed_batches_fall_back_to_rest(api):
+    base_url, routes, seen, _ = api
+    routes['/graphql'] = [(401, {}, {'message': 'Bad credentials'})]
+    routes['/repos/o/a'] = [(200, {}, {'full_name': 'o/a'})]
+    infos = _client(base_url).get_many_repo_info(['o/a', 'o/b'])
+
+    assert infos['o/a'] == {'full_name': 'o/a'} and infos['o/b']['full_name'] == 'o/b'
+    assert [path for path, _ in seen] == ['/graphql', '/repos/o/a', '/repos/o/b']
+
+
+def test_batch_analysis_uses_batched_metadata(api, tmp_path):
+    base_url, routes, seen, posted = api
+    routes['/graphql'] = [(200, {}, _batch_reply(posted))]
+    agent = GitHubRepoAgent(github_token='t', cache_dir=str(tmp_path / 'cache'))
+    agent.github_client.BASE_URL = base_url
+
+    analyses = agent.analyze_repos(['o/a', 'https://github.com/o/b', 'not a repo'], workers=2, clone=False)
+
+    assert sorted(analyses) == ['https://github.com/o/b', 'o/a']
+    assert analyses['o/a'].repo_url == 'https://github.com/o/a'
+    assert [path for path, _ in seen] == ['/graphql']
@@ -0,0 +1,83 @@
+import pytest
+
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.ignore_rules import IgnoreRules, is_ignored
+from github_repo_agent.scanner import FileFlag, RepoScanner
+
+from test_code_analyzer import _write
+from test_git_objects import _git
+
+
+@pytest.mark.parametrize('pattern, path, is_dir, expected', [
+    ('*.log', 'a/b/debug.log', False, True),
+    ('/build', 'build', True, True),
+    ('/build', 'src/build', True, None),
+    ('build/', 'src/build', False, None),
+    ('docs/*.md', 'docs/a.md', False, True),
+    ('docs/*.md', 'docs/sub/a.md', False, None),
+    ('**/tmp', 'x/y/tmp', True, True),
+    ('a/**/b', 'a/b', False, True),
+    ('a/**/b', 'a/x/y/b', False, True),
+    ('vendor/**', 'vendor/lib/x.js', False, True),
+    ('[!a]x', 'bx', False, True),
+    ('[!a]x', 'ax', False, None),
+    ('\\#hash', '#hash', False, True),
+])
+def test_patterns_follow_gitignore_semantics(pattern, path, is_dir, expected):
+    assert IgnoreRules.from_gitignore(pattern).match(path, is_dir) is expected
+
+
+def test_last_matching_rule_and_deepest_file_win():
+    root = IgnoreRules.from_gitignore('*.log\n!keep.log\n')
+    sub = IgnoreRules.from_gitignore('keep.log\n', 'sub/')
+    assert is_ignored((root,), 'a.log', False)
+    assert not is_ignored((root,), 'keep.log', False)
+    assert is_ignored((root, sub), 'sub/keep.log', False)
+    assert not is_ignored((root, sub), 'sub/main.py', False)
+
+
+def _ignore_repo(root):
+    return _write(root, {
+        '.gitignore': 'generated_out/\n*.log\n',
+        '.gitattributes': 'third_party/** linguist-vendored\nsrc/schema.py linguist-generated\n',
+        'src/app.py': 'x = 1\n',
+        'src/schema.py': 'y = 2\n',
+        'src/debug.log': 'noise\n',
+        'src/.gitignore': '!debug.log\nlocal.py\n',
+        'src/local.py': 'z = 3\n',
+        'generated_out/big.js': 'var a;\n',
+        'third_party/lib/vendor.js': 'var b;\n',
+        'app.log': 'noise\n',
+    })
+
+
+def test_walk_prunes_ignored_and_vendored_subtrees(tmp_path):
+    repo = _ignore_repo(tmp_path / 'repo')
+    manifest = RepoScanner().scan(repo)
+    paths = {e.path: e for e in manifest.files}
+
+    assert sorted(paths) == ['.gitattributes', '.gitignore', 'src/.gitignore', 'src/app.py',
+                             'src/debug.log', 'src/schema.py']
+    assert {'generated_out', 'third_party'} <= set(manifest.pruned_directories)
+    assert paths['src/schema.py'].has(FileFlag.GENERATED)
+    assert CodeAnalyzer().detect_languages(repo, manifest) == {'python': 100.0}
+
+    unfiltered = RepoScanner(use_ignore_files=False).scan(repo)
+    assert 'third_party/lib/vendor.js' in {e.path for e in unfiltered.files}
+
+
+def test_git_backend_applies_the_same_rules(tmp_path):
+    work = _ignore_repo(tmp_path / 'work')
+    _git('init', '-q', cwd=work)
+    _git('add', '-A', '-f', cwd=work)  # Commit the ignored files too
+    _git('commit', '-q', '-m', 'init', cwd=work)
+    bare = tmp_path / 'repo.git'
+    _git('clone', '-q', '--bare', str(work), str(bare))
+
+    scanner = RepoScanner()
+    git_manifest = scanner.scan_git(bare)
+    worktree_manifest = scanner.scan(work)
+    git_manifest.close()
+
+    assert [(e.path, e.flags) for e in git_manifest.files] == [(e.path, e.flags) for e in worktree_manifest.files]
+    assert git_manifest.pruned_directories == ['generated_out', 'third_party']
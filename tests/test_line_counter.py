@@ -0,0 +1,61 @@
+import io
+import random
+import tracemalloc
+
+from github_repo_agent import line_counter
+from github_repo_agent.line_counter import count_lines
+
+
+def _naive(data, prefixes):
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding='latin-1', newline='\n').readlines()
+    stripped = [line.strip(' \t\r\f\v\n') for line in lines]
+    return {
+        'lines': len(lines),
+        'bytes': len(data),
+        'blank': sum(1 for line in stripped if not line),
+        'comment': sum(1 for line in stripped if line.startswith(tuple(p.decode() for p in prefixes))),
+    }
+
+
+def test_counts_match_naive_across_chunk_boundaries(monkeypatch):
+    rng = random.Random(7)
+    pieces = [b'', b'   ', b'# note', b'  // c', b'code()', b'\t', b'x' * 50, b'  /', b'/ split']
+    for chunk_size in (1, 2, 3, 7, 64):
+        monkeypatch.setattr(line_counter, 'CHUNK_SIZE', chunk_size)
+        for _ in range(50):
+            data = b'\n'.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+            if rng.random() < 0.5:
+                data += b'\n'
+            data = data.replace(b'\n', b'\r\n') if rng.random() < 0.3 else data
+            prefixes = (b'#', b'//')
+            assert count_lines(io.BytesIO(data), prefixes) == _naive(data, prefixes), data
+
+
+class _Repeating(io.RawIOBase):
+    """Stream of `total` bytes built from a repeated block, never held in memory."""
+
+    def __init__(self, block, total):
+        self.buffer = block * (line_counter.CHUNK_SIZE // len(block) + 1)
+        self.remaining = total
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        size = min(size, self.remaining)
+        self.remaining -= size
+        return self.buffer[:size]
+
+
+def test_peak_memory_is_independent_of_file_size():
+    for block in (b'x = 1  # c\n', b'x' * 4096):  # short lines, then one giant line
+        peaks = []
+        for total in (8 << 20, 64 << 20):
+            stream = _Repeating(block, total)
+            tracemalloc.start()
+            counts = count_lines(stream, (b'#',))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            assert counts['bytes'] == total
+        assert max(peaks) < 3 * line_counter.CHUNK_SIZE
+        assert abs(peaks[1] - peaks[0]) < line_counter.CHUNK_SIZE // 4
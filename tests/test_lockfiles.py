@@ -0,0 +1,191 @@
+import io
+import json
+import time
+import tracemalloc
+
+import pytest
+
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.lockfiles import parse_lockfile
+from github_repo_agent.scanner import RepoScanner
+
+from test_code_analyzer import _write
+from test_git_objects import _git
+from test_tarball import _tarball
+
+# Enough packages to make every fixture several MB, as in large monorepos
+PACKAGES = 12000
+
+
+def _names(n):
+    return [(f'@scope{i % 50}/pkg-{i}' if i % 3 == 0 else f'pkg-{i}', f'{i % 7}.{i % 13}.{i}') for i in range(n)]
+
+
+def _package_lock_v3(packages):
+    lock = {'name': 'app', 'version': '1.0.0', 'lockfileVersion': 3, 'requires': True, 'packages': {
+        '': {'name': 'app', 'version': '1.0.0', 'dependencies': {name: f'^{version}' for name, version in packages[:20]}},
+    }}
+    for name, version in packages:
+        lock['packages'][f'node_modules/{name}'] = {
+            'version': version,
+            'resolved': f'https://registry.npmjs.org/{name}/-/{name.split("/")[-1]}-{version}.tgz',
+            'integrity': 'sha512-' + 'A' * 86 + '==',
+            'dependencies': {'version': '^1.0.0', 'dep-a': '^2.0.0'},
+            'engines': {'node': '>=14'},
+            'bin': {'tool': 'bin/tool.js'},
+            'funding': [{'type': 'github', 'url': 'https://github.com/sponsors/x'}],
+        }
+    return json.dumps(lock, indent=2) + '\n'
+
+
+def _package_lock_v1(packages):
+    deps = {}
+    for name, version in packages:
+        deps[name] = {'version': version, 'resolved': 'https://registry.npmjs.org/x.tgz',
+                      'requires': {'dep-a': '^2.0.0'},
+                      'dependencies': {'nested-' + name.split('/')[-1]: {'version': '0.0.1'}}}
+    return json.dumps({'name': 'app', 'version': '1.0.0', 'lockfileVersion': 1, 'dependencies': deps}, indent=2)
+
+
+def _yarn_lock(packages):
+    out = ['# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.', '# yarn lockfile v1', '']
+    for name, version in packages:
+        out += [f'"{name}@^{version}", "{name}@~{version}":', f'  version "{version}"',
+                f'  resolved "https://registry.yarnpkg.com/{name}/-/x-{version}.tgz#abc"',
+                '  integrity sha512-' + 'B' * 86 + '==', '  dependencies:', '    version "^1.0.0"', '']
+    return '\n'.join(out)
+
+
+def _yarn_berry_lock(packages):
+    out = ['__metadata:', '  version: 6', '  cacheKey: 8', '']
+    for name, version in packages:
+        out += [f'"{name}@npm:^{version}":', f'  version: {version}', f'  resolution: "{name}@npm:{version}"',
+                '  checksum: ' + 'c' * 128, '  languageName: node', '  linkType: hard', '']
+    return '\n'.join(out)
+
+
+def _pnpm_lock(packages, major):
+    out = [f"lockfileVersion: '{major}.0'" if major >= 6 else f'lockfileVersion: {major}.4', '', 'packages:', '']
+    for name, version in packages:
+        key = f'/{name}/{version}_peer@1.0.0' if major < 6 else f'/{name}@{version}(peer@1.0.0)'
+        out += [f'  {key}:', '    resolution: {integrity: sha512-xyz}', '    dependencies:',
+                '      dep-a: 2.0.0', '    dev: false', '']
+    return '\n'.join(out)
+
+
+def _toml_lock(packages):
+    out = ['# This file is automatically @generated by Cargo.', 'version = 3', '']
+    for name, version in packages:
+        out += ['[[package]]', f'name = "{name}"', f'version = "{version}"',
+                'source = "registry+https://github.com/rust-lang/crates.io-index"',
+                'checksum = "' + 'd' * 64 + '"', 'dependencies = [', ' "dep-a",', ']', '',
+                '[package.extras]', 'version = "not-a-package"', '']
+    return '\n'.join(out)
+
+
+def _go_sum(packages):
+    out = []
+    for name, version in packages:
+        out.append(f'github.com/{name} v{version} h1:' + 'e' * 43 + '=')
+        out.append(f'github.com/{name} v{version}/go.mod h1:' + 'f' * 43 + '=')
+    return '\n'.join(out) + '\n'
+
+
+def _gemfile_lock(packages):
+    out = ['GEM', '  remote: https://rubygems.org/', '  specs:']
+    for name, version in packages:
+        out += [f'    {name} ({version})', '      dep-a (>= 1.0)', '      dep-b (~> 2.0, >= 2.0.1)',
+                '      dep-c (>= 0.9.0, < 2.0)']
+    out += ['', 'PLATFORMS', '  ruby', '', 'DEPENDENCIES', '  pkg-1 (~> 1.0)', '']
+    return '\n'.join(out)
+
+
+def _composer_lock(packages):
+    return json.dumps({'content-hash': 'abc', 'packages': [
+        {'name': name, 'version': 'v' + version, 'require': {'php': '>=7.4', 'name': '1.0'}, 'type': 'library'}
+        for name, version in packages
+    ], 'packages-dev': []}, indent=4)
+
+
+FIXTURES = [
+    ('package-lock.json', _package_lock_v3, ''),
+    ('package-lock.json', _package_lock_v1, ''),
+    ('yarn.lock', _yarn_lock, ''),
+    ('yarn.lock', _yarn_berry_lock, ''),
+    ('pnpm-lock.yaml', lambda p: _pnpm_lock(p, 5), ''),
+    ('pnpm-lock.yaml', lambda p: _pnpm_lock(p, 9), ''),
+    ('poetry.lock', _toml_lock, ''),
+    ('Cargo.lock', _toml_lock, ''),
+    ('go.sum', _go_sum, 'v'),
+    ('Gemfile.lock', _gemfile_lock, ''),
+    ('composer.lock', _composer_lock, 'v'),
+]
+
+
+@pytest.mark.parametrize('name, build, version_prefix', FIXTURES)
+def test_lockfile_parsers_stream_multi_mb_fixtures(name, build, version_prefix):
+    packages = [(n.replace('@', '').replace('/', '-'), v) if name in ('Gemfile.lock', 'go.sum') else (n, v)
+                for n, v in _names(PACKAGES)]
+    data = build(packages).encode()
+    assert len(data) > 1 << 20
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    parsed = parse_lockfile(name, io.BytesIO(data))
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    prefix = 'github.com/' if name == 'go.sum' else ''
+    expected = {prefix + package: [version_prefix + version] for package, version in packages}
+    if build is _package_lock_v1:
+        expected.update({'nested-' + package.split('/')[-1]: ['0.0.1'] for package, _ in packages})
+    assert parsed == expected
+    # Memory follows the number of packages (the result), not the size of the file
+    assert peak < 400 * len(expected) + (256 << 10), f'{name}: peak {peak} for {len(data)} bytes'
+    assert elapsed < 10, f'{name}: {len(data) / elapsed / 1e6:.1f} MB/s'
+
+
+def test_locked_dependencies_are_merged_by_language_across_subprojects(tmp_path):
+    repo = _write(tmp_path, {
+        'package.json': json.dumps({'dependencies': {'left-pad': '^1.0.0'}}),
+        'package-lock.json': _package_lock_v3([('left-pad', '1.3.0'), ('@types/node', '20.1.0')]),
+        'yarn.lock': _yarn_lock([('left-pad', '1.2.0')]),
+        'sub/Cargo.lock': _toml_lock([('serde', '1.0.0')]),
+    })
+    manifest = RepoScanner(max_file_size=100).scan(repo)
+    analyzer = CodeAnalyzer()
+
+    assert analyzer.extract_locked_dependencies(repo, manifest) == {
+        'javascript': {'left-pad': ['1.3.0', '1.2.0'], '@types/node': ['20.1.0']},
+        'rust': {'serde': ['1.0.0']},
+    }
+    assert analyzer.extract_dependencies(repo, manifest) == {'javascript': ['left-pad'], 'typescript': ['left-pad']}
+
+
+@pytest.mark.parametrize('backend', ['git', 'tarball'])
+def test_large_lockfiles_are_streamed_from_git_objects_and_archives(tmp_path, backend):
+    packages = _names(PACKAGES)
+    repo = _write(tmp_path / 'repo', {'package.json': '{}', 'package-lock.json': _package_lock_v3(packages)})
+    size = (repo / 'package-lock.json').stat().st_size
+    analyzer = CodeAnalyzer()
+    if backend == 'git':
+        _git('init', '-q', cwd=repo)
+        _git('add', '-A', cwd=repo)
+        _git('commit', '-q', '-m', 'init', cwd=repo)
+    else:
+        data = _tarball(repo)
+
+    tracemalloc.start()
+    if backend == 'git':
+        manifest = RepoScanner().scan_git(repo / '.git')
+    else:
+        manifest = RepoScanner().scan_tarball(io.BytesIO(data), on_file=analyzer.prepare_file)
+    locked = analyzer.extract_locked_dependencies(None, manifest)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    manifest.close()
+
+    assert locked['javascript'] == {package: [version] for package, version in packages}
+    # The lockfile is over the size cap and never held whole: memory follows the packages, as in the parser alone
+    assert peak < 400 * len(packages) + (256 << 10) < size, f'peak {peak} for {size} bytes'
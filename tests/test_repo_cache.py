@@ -0,0 +1,155 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from github_repo_agent.repo_cache import RepoCache
+
+from test_git_objects import _git, _make_bare_repo
+
+
+def _head(repo):
+    return subprocess.run(['git', '-C', str(repo), 'rev-parse', 'HEAD'],
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(work, path, text):
+    (work / path).write_text(text)
+    _git('add', '-A', cwd=work)
+    _git('commit', '-q', '-m', f'update {path}', cwd=work)
+    return _head(work)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    work, _ = _make_bare_repo(tmp_path)
+    return work
+
+
+@pytest.mark.parametrize('bare', [False, True])
+def test_stale_clone_is_refreshed_with_a_fetch(tmp_path, upstream, bare):
+    cache = RepoCache(tmp_path / 'cache', max_age=3600)
+    url = f'file://{upstream}'
+
+    path, info = cache.checkout('owner', 'repo', url, bare=bare, clone_args=['--depth', '1'])
+    assert info['source'] == 'clone' and info['head'] == _head(upstream)
+
+    new_head = _commit(upstream, 'app.py', 'print("v2")\n')
+    assert cache.checkout('owner', 'repo', url, bare=bare)[1]['source'] == 'hit'  # Still fresh
+
+    path, info = cache.checkout('owner', 'repo', url, bare=bare, max_age=0)
+    assert info['source'] == 'refresh' and info['head'] == new_head == _head(path)
+    assert cache.load_meta(path)['head'] == new_head
+    if not bare:
+        assert (path / 'app.py').read_text() == 'print("v2")\n'
+    assert subprocess.run(['git', '-C', str(path), 'rev-list', '--count', 'HEAD'],
+                          check=True, capture_output=True, text=True).stdout.strip() == '1'
+
+    # Revalidating an up-to-date clone fetches nothing
+    assert cache.checkout('owner', 'repo', url, bare=bare, max_age=0)[1]['source'] == 'hit'
+
+
+def test_repositories_with_the_same_name_do_not_collide(tmp_path, upstream):
+    other = tmp_path / 'other'
+    _git('clone', '-q', str(upstream), str(other))
+    other_head = _commit(other, 'other.txt', 'other\n')
+    cache = RepoCache(tmp_path / 'cache')
+
+    alice, _ = cache.checkout('alice', 'utils', f'file://{upstream}')
+    bob, info = cache.checkout('bob', 'utils', f'file://{other}')
+
+    assert alice != bob and info['source'] == 'clone'
+    assert _head(bob) == other_head and _head(alice) == _head(upstream)
+
+
+
+def test_names_differing_only_in_case_share_one_clone(tmp_path, upstream):
+    cache = RepoCache(tmp_path / 'cache')
+
+    path, _ = cache.checkout('Owner', 'Repo', f'file://{upstream}')
+    again, info = cache.checkout('owner', 'REPO', f'file://{upstream}')
+
+    assert again == path == cache.path_for('owner', 'repo') and info['source'] == 'hit'
+    assert cache.mirror_path('Owner', 'Repo') == cache.mirror_path('owner', 'repo')
+
+def test_unreachable_remote_falls_back_to_the_cached_clone(tmp_path, upstream):
+    cache = RepoCache(tmp_path / 'cache', max_age=0)
+    path, _ = cache.checkout('owner', 'repo', f'file://{upstream}')
+    _git('remote', 'set-url', 'origin', str(tmp_path / 'gone'), cwd=path)
+
+    again, info = cache.checkout('owner', 'repo', f'file://{upstream}')
+    assert again == path and info['source'] == 'hit' and info['stale']
+
+
+def test_least_recently_used_clones_are_evicted_over_quota(tmp_path, upstream, monkeypatch):
+    cache = RepoCache(tmp_path / 'cache', max_bytes=None)
+    url = f'file://{upstream}'
+    for owner in ('a', 'b', 'c'):
+        cache.checkout(owner, 'repo', url)
+    cache.index_path(cache.path_for('a', 'repo')).write_text('{}')
+    size = cache.entries()[0]['size']
+    assert size > 0 and cache.usage == 3 * size
+
+    # Sizes come from the metadata records, not from walking the clones
+    walks = []
+    monkeypatch.setattr(RepoCache, 'disk_usage', staticmethod(lambda path: walks.append(path) or size))
+    cache.checkout('a', 'repo', url)  # Most recently used now
+    cache.max_bytes = int(2.5 * size)
+    cache.checkout('d', 'repo', url)
+
+    assert walks == [cache.path_for('d', 'repo')]
+    assert [meta['owner'] for meta in cache.entries()] == ['a', 'd']
+    assert not (tmp_path / 'cache' / 'b').exists() and not (tmp_path / 'cache' / 'c').exists()
+    assert cache.usage == 2 * size
+
+    evicted = cache.prune(max_bytes=0)
+    assert [meta['owner'] for meta in evicted] == ['a', 'd'] and cache.entries() == []
+    assert [path.name for path in (tmp_path / 'cache').iterdir()] == ['.locks']
+
+
+def test_cache_command_lists_and_prunes(tmp_path, upstream):
+    cache = RepoCache(tmp_path / '.repo_cache' / 'repos')
+    cache.checkout('owner', 'repo', f'file://{upstream}')
+    cli = [sys.executable, str(Path(__file__).resolve().parents[1] / 'cli.py'), 'cache']
+
+    listed = subprocess.run(cli, cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+    assert '1 clone(s)' in listed and 'owner/repo' in listed
+
+    pruned = subprocess.run(cli + ['prune', '--all'], cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+    assert 'Evicted 1 cached repository' in pruned and cache.entries() == []
+
+
+def test_locked_clones_are_not_evicted(tmp_path, upstream):
+    cache = RepoCache(tmp_path / 'cache')
+    busy, _ = cache.checkout('busy', 'repo', f'file://{upstream}')
+    idle, _ = cache.checkout('idle', 'repo', f'file://{upstream}')
+
+    with cache.lock(busy):
+        with cache.lock(busy, blocking=False) as acquired:
+            assert not acquired
+        evicted = cache.prune(max_bytes=0)
+
+    assert [meta['owner'] for meta in evicted] == ['idle']
+    assert busy.exists() and not idle.exists()
+
+
+def test_mirrors_outlive_the_clones_borrowing_from_them(tmp_path, upstream):
+    fork = tmp_path / 'fork'
+    _git('clone', '-q', str(upstream), str(fork))
+    fork_head = _commit(fork, 'fork.txt', 'fork\n')
+    cache = RepoCache(tmp_path / 'cache')
+
+    mirror = cache.mirror('owner', 'repo', f'file://{upstream}')
+    assert mirror == cache.mirror_path('owner', 'repo') and cache.load_meta(mirror)['strategy'] == 'mirror'
+    path, info = cache.checkout('alice', 'repo', f'file://{fork}', reference=mirror)
+    assert info['head'] == fork_head and cache.load_meta(path)['reference'] == str(mirror)
+    assert (path / '.git' / 'objects' / 'info' / 'alternates').read_text().strip() == str(mirror / 'objects')
+    subprocess.run(['git', '-C', str(path), 'fsck', '--connectivity-only'], check=True, capture_output=True)
+
+    # Least recently used, but borrowed from
+    assert cache.entries()[0]['path'] == mirror
+    assert cache.prune(max_bytes=0, keep=path) == [] and mirror.exists()
+
+    evicted = cache.prune(max_bytes=0)
+    assert [meta['path'] for meta in evicted] == [path, mirror] and cache.entries() == []
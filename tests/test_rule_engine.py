@@ -0,0 +1,83 @@
+import re
+
+from github_repo_agent.ai_enhancer import AIEnhancer
+from github_repo_agent.rule_engine import RuleMatcher, required_literal
+
+
+def test_required_literal():
+    assert required_literal(r'eval\s*\(') == 'eval'
+    assert required_literal(r'api[_-]?key\s*=') == 'api'
+    assert required_literal(r'\.innerHTML\s*=') == 'innerhtml'
+    assert required_literal(r'colou?r') == 'colo'
+    assert required_literal(r'foo|barbaz') is None
+    assert required_literal(r'(?:abc)+x') is None
+
+
+def test_matcher_agrees_with_individual_searches():
+    rules = AIEnhancer().code_patterns
+    rules['extra'] = [r'(\w+)=\1', r'ab', r'abc']
+    matcher = RuleMatcher(rules)
+    samples = [
+        'password = "x"\neval(foo)\nexec (bar)\n',
+        'query = "SELECT * FROM t WHERE id=" + sql_id + "\'"',
+        'el.innerHTML = html; for i in range(len(xs)): ys.append(x)',
+        'if a: if b: if c: pass\nx=x\nabc',
+        'Ünïcode pässword = \'ſecret\'',
+        '',
+    ]
+    for content in samples:
+        expected = {}
+        for category, patterns in rules.items():
+            for pattern in patterns:
+                if re.search(pattern, content, re.IGNORECASE):
+                    expected.setdefault(category, []).append(pattern)
+        assert matcher.match(content) == expected
+
+
+# Inputs that made the original rules backtrack for minutes
+ADVERSARIAL_CORPUS = {
+    'sql_concat': 'sql+' * 50000,
+    'class_without_brace': 'class a ' * 50000,
+    'nested_if_chain': 'if a: ' * 50000,
+    'for_without_range': 'for x ' * 50000,
+    'unclosed_append': '.append(' * 50000 + '\nx',
+    'unterminated_password': 'password = "' + 'a' * 400000,
+    'long_param_list': 'function f(' + 'a,' * 200000,
+    'minified_bundle': ('var a=function(b){return b+"sql"};' * 20000),
+}
+
+
+def test_adversarial_corpus_is_bounded():
+    import time
+
+    matcher = AIEnhancer().matcher
+    for name, content in ADVERSARIAL_CORPUS.items():
+        start = time.perf_counter()
+        matcher.match_with_budget(content, AIEnhancer.DEFAULT_TIME_BUDGET)
+        elapsed = time.perf_counter() - start
+        assert elapsed < 2.0, f'{name} took {elapsed:.2f}s'
+
+
+def test_budget_exhaustion_skips_and_reports_rules(tmp_path):
+    from github_repo_agent.scanner import RepoScanner
+
+    (tmp_path / 'slow.py').write_text(('zzz ' * 20 + '\n') * 10000)
+    (tmp_path / 'ok.py').write_text('eval(x)\n')
+    enhancer = AIEnhancer(code_patterns={'code_smells': [r'zzz[^\n]*q'], 'security_issues': [r'eval\s*\(']},
+                          time_budget=0.001)
+
+    insights = enhancer.analyze_code_quality(tmp_path, RepoScanner().scan(tmp_path))
+
+    assert insights['skipped_rules'] == [
+        {'file': 'slow.py', 'rules': [r'zzz[^\n]*q'], 'reason': 'time budget exceeded'}
+    ]
+    assert insights['security_concerns'][0]['file'] == 'ok.py'
+
+
+def test_windowed_scan_finds_matches_across_windows():
+    matcher = RuleMatcher(AIEnhancer().code_patterns)
+    content = 'x = 1\n' * 2000 + 'class Big {\n' + 'y\n' * 600 + '}\nel.innerHTML = v\n'
+    matched, skipped = matcher.match_with_budget(content, 10.0)
+    assert skipped == []
+    assert matched == matcher.match(content)
+    assert len(matched['code_smells']) == 1
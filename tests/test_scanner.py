@@ -0,0 +1,128 @@
+import os
+
+from github_repo_agent.ai_enhancer import AIEnhancer
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.scanner import FileFlag, RepoScanner
+
+
+def _make_repo(root):
+    files = {
+        'README.md': '# demo\n',
+        'app.py': 'import logging\n\ndef main() -> None:\n    eval("1")\n',
+        'src/api/routes.js': 'const x = 1;\n',
+        'tests/test_app.py': 'def test_it():\n    assert True\n',
+        'dist/bundle.js': 'var a=1;\n',
+        'node_modules/pkg/index.js': 'module.exports = 1;\n',
+        '.hidden/secret.py': 'password = "x"\n',
+    }
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
+
+
+def test_scan_records_flags_and_prunes(tmp_path):
+    manifest = RepoScanner().scan(_make_repo(tmp_path))
+    paths = {e.path: e for e in manifest.files}
+
+    assert 'node_modules/pkg/index.js' not in paths
+    assert '.hidden/secret.py' not in paths
+    assert 'node_modules' in manifest.pruned_directories
+    assert paths['dist/bundle.js'].has(FileFlag.BUILD_OUTPUT)
+    assert paths['tests/test_app.py'].has(FileFlag.TEST | FileFlag.CODE)
+    assert paths['app.py'].size == os.path.getsize(tmp_path / 'app.py')
+    assert sorted(manifest.top_level_dirs) == ['dist', 'src', 'tests']
+
+
+def test_stages_share_one_walk(tmp_path, monkeypatch):
+    repo = _make_repo(tmp_path)
+    manifest = RepoScanner().scan(repo)
+
+    def fail_walk(*args, **kwargs):
+        raise AssertionError('stage walked the tree again')
+
+    monkeypatch.setattr(os, 'walk', fail_walk)
+    analyzer = CodeAnalyzer()
+
+    assert analyzer.analyze_structure(repo, manifest)['has_readme']
+    assert sorted(analyzer.detect_languages(repo, manifest)) == ['javascript', 'python']
+    assert 'Testing' in analyzer.identify_patterns(repo, manifest)
+    metrics = analyzer.calculate_metrics(repo, manifest)
+    assert metrics['code_files'] == 3 and metrics['test_files'] == 1
+    quality = AIEnhancer().analyze_code_quality(repo, manifest)
+    assert [c['file'] for c in quality['security_concerns']] == ['app.py']
+
+
+def test_index_reprocesses_only_changed_files(tmp_path):
+    from github_repo_agent.file_index import FileIndex
+
+    repo = _make_repo(tmp_path / 'repo')
+    index_path = tmp_path / 'repo.index.json'
+    analyzer = CodeAnalyzer()
+    enhancer = AIEnhancer()
+
+    def run():
+        index = FileIndex.load(index_path)
+        manifest = RepoScanner().scan(repo, index=index)
+        metrics = analyzer.calculate_metrics(repo, manifest)
+        enhancer.analyze_code_quality(repo, manifest)
+        index.save()
+        return index, metrics
+
+    first, metrics = run()
+    assert first.hits == 0 and first.misses > 0
+
+    second, cached_metrics = run()
+    assert second.misses == 0 and cached_metrics == metrics
+
+    (repo / 'app.py').write_text('x = 1\n' * 10)
+    third, changed_metrics = run()
+    assert third.misses == 3  # content flags, line count and findings of app.py only
+    assert changed_metrics['total_lines'] == metrics['total_lines'] - 4 + 10
+
+
+def test_parallel_walk_matches_sequential(tmp_path):
+    repo = _make_repo(tmp_path)
+    for i in range(20):
+        (repo / f'pkg{i}' / 'sub').mkdir(parents=True)
+        (repo / f'pkg{i}' / 'sub' / 'mod.py').write_text('x = 1\n')
+
+    sequential = RepoScanner(workers=1).scan(repo)
+    parallel = RepoScanner(workers=4).scan(repo)
+
+    assert parallel == sequential
+    assert len(sequential.files) == 25
+    assert 'pkg3/sub' in sequential.directories
+
+
+def test_sniff_content_flags_binary_minified_and_generated():
+    from github_repo_agent.scanner import sniff_content
+
+    assert sniff_content('logo.c', b'\x89PNG\r\n\x1a\n\0\0\0\rIHDR') == FileFlag.BINARY
+    assert sniff_content('app.js', b'var a=1;' * 500) == FileFlag.MINIFIED
+    assert sniff_content('app.min.js', b'var a = 1;\n') == FileFlag.MINIFIED
+    assert sniff_content('api.go', b'// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n') == FileFlag.GENERATED
+    assert sniff_content('user_pb2.py', b'import sys\n') == FileFlag.GENERATED
+    assert sniff_content('app.py', 'print("héllo")\n'.encode() * 200) == FileFlag.NONE
+
+
+def test_unreadable_kinds_are_skipped_and_reported(tmp_path):
+    repo = _make_repo(tmp_path)
+    (repo / 'blob.c').write_bytes(b'\0\1\2' * 100)
+    (repo / 'vendor.min.js').write_text('eval("x");' * 10)
+    (repo / 'big.py').write_text('eval("x")\n' * 200)
+    (repo / 'gen.py').write_text('# @generated by tool\neval("x")\n')
+
+    manifest = RepoScanner(max_file_size=1000).scan(repo)
+    assert manifest.files[[e.path for e in manifest.files].index('big.py')].has(FileFlag.OVERSIZED)
+
+    metrics = CodeAnalyzer().calculate_metrics(repo, manifest)
+    assert sorted((s['file'], s['reason']) for s in metrics['skipped_files']) == [
+        ('big.py', 'oversized'), ('blob.c', 'binary')]
+    assert metrics['code_files'] == 7
+
+    quality = AIEnhancer().analyze_code_quality(repo, manifest)
+    assert sorted((s['file'], s['reason']) for s in quality['skipped_files']) == [
+        ('big.py', 'oversized'), ('blob.c', 'binary'), ('gen.py', 'generated'), ('vendor.min.js', 'minified')]
+    assert [c['file'] for c in quality['security_concerns']] == ['app.py']
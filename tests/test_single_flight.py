@@ -0,0 +1,109 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from github_repo_agent.agent import GitHubRepoAgent
+
+from test_git_objects import _make_bare_repo
+
+ROOT = Path(__file__).resolve().parents[1]
+
+WORKER = '''
+import sys
+sys.path.insert(0, {root!r})
+from github_repo_agent.agent import GitHubRepoAgent
+agent = GitHubRepoAgent(cache_dir={cache!r})
+agent.github_client.get_repo_info = lambda owner, name: {{}}
+agent._clone_url = lambda owner, name: {url!r}
+analysis = agent.analyze_repo('owner/repo')
+print('RESULT', analysis.clone_info['source'], analysis.metrics['total_files'])
+'''
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    work, _ = _make_bare_repo(tmp_path)
+    return work
+
+
+def test_concurrent_callers_share_one_analysis(tmp_path, upstream, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: {})
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: f'file://{upstream}')
+    clone_repo = agent._clone_repo
+    calls = []
+
+    def slow_clone(*args, **kwargs):
+        calls.append(args)
+        time.sleep(0.3)
+        return clone_repo(*args, **kwargs)
+
+    monkeypatch.setattr(agent, '_clone_repo', slow_clone)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(agent.analyze_repo('https://github.com/owner/repo')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and len(results) == 8
+    assert all(result is results[0] for result in results)
+    assert results[0].clone_info['source'] == 'clone'
+
+    # Later calls run a new analysis
+    assert agent.analyze_repo('owner/repo') is not results[0] and len(calls) == 2
+
+
+
+def test_a_forced_refresh_does_not_join_a_run_accepting_an_older_clone(tmp_path, upstream, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: {})
+    monkeypatch.setattr(agent, '_clone_url', lambda owner, name: f'file://{upstream}')
+    agent.analyze_repo('owner/repo')
+    clone_repo = agent._clone_repo
+    max_ages = []
+
+    def slow_clone(*args, **kwargs):
+        max_ages.append(kwargs['max_age'])
+        time.sleep(0.3)
+        return clone_repo(*args, **kwargs)
+
+    monkeypatch.setattr(agent, '_clone_repo', slow_clone)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i, max_age=max_age: results.update(
+                   {i: agent.analyze_repo('owner/repo', max_age=max_age)}))
+               for i, max_age in enumerate([None, 0, agent.repo_cache.max_age])]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    # The default max_age and the agent's own are the same analysis
+    assert sorted(max_ages, key=str) == [0, None] and results[0] is results[2] is not results[1]
+
+
+def test_failures_are_shared_and_not_cached(tmp_path, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    monkeypatch.setattr(agent, '_analyze_repo', lambda *args: 1 / 0)
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            agent.analyze_repo('owner/repo')
+    assert agent._inflight == {}
+
+
+def test_processes_sharing_a_cache_clone_once(tmp_path, upstream):
+    script = WORKER.format(root=str(ROOT), cache=str(tmp_path / 'cache'), url=f'file://{upstream}')
+    procs = [subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              text=True) for _ in range(4)]
+    outputs = [proc.communicate()[0] for proc in procs]
+
+    assert all(proc.returncode == 0 for proc in procs)
+    results = sorted(line.split()[1:] for out in outputs for line in out.splitlines() if line.startswith('RESULT'))
+    assert [source for source, _ in results] == ['clone', 'hit', 'hit', 'hit']
+    assert len({files for _, files in results}) == 1
@@ -0,0 +1,140 @@
+import io
+import json
+import tarfile
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from github_repo_agent.agent import GitHubRepoAgent
+from github_repo_agent.ai_enhancer import AIEnhancer
+from github_repo_agent.code_analyzer import CodeAnalyzer
+from github_repo_agent.scanner import FileFlag, RepoScanner
+
+from test_scanner import _make_repo
+
+COMMIT = 'c0ffee' * 6 + 'abcd'
+
+
+def _tarball(root, prefix='owner-repo-c0ffee', compression='gz'):
+    """Pack a directory like `git archive` does: sorted paths below one directory, commit in the pax header."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=f'w:{compression}', format=tarfile.PAX_FORMAT,
+                      pax_headers={'comment': COMMIT}) as tar:
+        tar.add(str(root), arcname=prefix, recursive=False)
+        for path in sorted(root.rglob('*'), key=lambda p: p.relative_to(root).as_posix()):
+            tar.add(str(path), arcname=f'{prefix}/{path.relative_to(root).as_posix()}', recursive=False)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def archive_server():
+    archives = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            data = archives.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-gzip')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', archives
+    server.shutdown()
+    server.server_close()
+
+
+def _repo(tmp_path):
+    repo = _make_repo(tmp_path / 'repo')
+    (repo / 'requirements.txt').write_text('requests>=2\nflask\n')
+    (repo / 'web' / 'package.json').parent.mkdir()
+    (repo / 'web' / 'package.json').write_text(json.dumps({'dependencies': {'react': '^18.0.0'}}))
+    (repo / '.gitignore').write_text('*.log\n')
+    (repo / 'debug.log').write_text('ignored\n')
+    (repo / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n' + b'\0' * 64)
+    return repo
+
+
+def test_tarball_analysis_matches_worktree(tmp_path, archive_server, monkeypatch):
+    base_url, archives = archive_server
+    repo = _repo(tmp_path)
+    archives['/repos/owner/repo/tarball'] = _tarball(repo)
+
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    agent.github_client.BASE_URL = base_url
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: {})
+    analysis = agent.analyze_repo('owner/repo', clone_strategy='tarball', code_quality=True)
+
+    manifest = RepoScanner().scan(repo)
+    analyzer = CodeAnalyzer()
+    assert analysis.structure == analyzer.analyze_structure(repo, manifest)
+    assert analysis.languages == analyzer.detect_languages(repo, manifest)
+    assert analysis.dependencies == analyzer.extract_dependencies(repo, manifest)
+    assert analysis.patterns == analyzer.identify_patterns(repo, manifest)
+    assert analysis.metrics == analyzer.calculate_metrics(repo, manifest)
+    assert analysis.code_quality == AIEnhancer().analyze_code_quality(repo, manifest)
+    assert analysis.metrics['code_files'] == 3 and 'flask' in analysis.dependencies['python']
+
+    assert analysis.clone_info['head'] == COMMIT and analysis.clone_info['source'] == 'download'
+    assert analysis.clone_info['download_bytes'] == len(archives['/repos/owner/repo/tarball'])
+    # Nothing was cloned or extracted
+    assert list((tmp_path / 'cache' / 'repos').iterdir()) == []
+
+
+def test_missing_archive_yields_an_empty_analysis(tmp_path, archive_server, monkeypatch):
+    agent = GitHubRepoAgent(cache_dir=str(tmp_path / 'cache'))
+    agent.github_client.BASE_URL = archive_server[0]
+    monkeypatch.setattr(agent.github_client, 'get_repo_info', lambda owner, name: {})
+
+    analysis = agent.analyze_repo('owner/missing', clone_strategy='tarball')
+    assert analysis.metrics == {} and analysis.clone_info['head'] is None
+
+
+@pytest.mark.parametrize('compression', ['gz', 'bz2'])
+def test_streaming_memory_is_bounded_by_the_largest_file(tmp_path, compression):
+    repo = tmp_path / 'big'
+    line = b'value = compute(item) + other  # some comment text\n'
+    for i in range(24):
+        path = repo / f'pkg{i % 4}' / f'module_{i}.py'
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(line * (300_000 // len(line)))
+    (repo / 'data.csv').write_bytes(b'1,2,3\n' * 500_000)  # 3 MB, above max_file_size
+    # Highly compressible: about 10 MB of files in a few tens of KB (xz is left out:
+    # its decoder allocates its whole dictionary, 8 MiB at the default preset)
+    data = _tarball(repo, compression=compression)
+
+    analyzer = CodeAnalyzer()
+    enhancer = AIEnhancer()
+
+    def on_file(manifest, entry):
+        analyzer.prepare_file(manifest, entry)
+        enhancer.prepare_file(manifest, entry)
+
+    tracemalloc.start()
+    manifest = RepoScanner().scan_tarball(io.BytesIO(data), on_file=on_file)
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    manifest = RepoScanner().scan_tarball(io.BytesIO(data), on_file=on_file)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    assert len(manifest.files) == 25
+    assert next(e for e in manifest.files if e.name == 'data.csv').has(FileFlag.OVERSIZED)
+    assert peak < 4 * 300_000 + (512 << 10), peak
+
+    # The stages only use the results computed while streaming
+    metrics = analyzer.calculate_metrics(None, manifest)
+    assert metrics['code_files'] == 24 and metrics['total_lines'] == 24 * (300_000 // len(line))
+    quality = enhancer.analyze_code_quality(None, manifest)
+    assert quality['skipped_files'] == []
@@ -8,9 +8,12 @@ from flask import Flask, render_template_string, request, jsonify
 from github_repo_agent import GitHubRepoAgent
 from github_repo_agent.ai_enhancer import AIEnhancer
 import json
+import os
 
 app = Flask(__name__)
-agent = GitHubRepoAgent()
+# With a token, the API data comes from one GraphQL query per repository
+github_token = os.getenv('GITHUB_TOKEN')
+agent = GitHubRepoAgent(github_token=github_token, graphql=bool(github_token))
 ai_enhancer = AIEnhancer()
 
 # HTML Template
@@ -299,7 +302,7 @@ def analyze():
             return jsonify({'error': 'Repository URL is required'}), 400
         
         # Perform analysis
-        analysis = agent.analyze_repo(repo_url, clone=True)
+        analysis = agent.analyze_repo(repo_url, clone=True, code_quality=True, clone_strategy='shallow')
         
         # Get AI-enhanced insights
         analysis_dict = {
@@ -317,11 +320,9 @@ def analyze():
         ai_insights = ai_enhancer.generate_deep_insights(analysis_dict)
         analysis_dict['ai_insights'] = ai_insights
         
-        # Add code quality analysis if repo was cloned
-        repo_path = agent.cache_dir / repo_url.split('/')[-1]
-        if repo_path.exists():
-            code_quality = ai_enhancer.analyze_code_quality(repo_path)
-            analysis_dict['code_quality'] = code_quality
+        # Add code quality analysis if repo was cloned (computed from the same scan)
+        if analysis.code_quality:
+            analysis_dict['code_quality'] = analysis.code_quality
         
         return jsonify(analysis_dict)
     